@@ -1,14 +1,44 @@
 import copy
 import json
 import os
-import shutil
-import pandas as pd
-from typing import Any, List, Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Dict, Tuple
 from datetime import datetime
 from pydantic import BaseModel
 from loguru import logger
 
+from dashboard.capture import FULL, SAMPLED_IMAGES, CaptureBuffer, CapturePolicy, validate_capture_level
+from dashboard.file_links import link_file
+from dashboard.merge_policies import BEST_SCORE, resolve_merge, results_frame, validate_merge_policy
+from dashboard.prompt_store import PROMPTS_FILE, PromptStore, interning_enabled, open_store
 from dashboard.id_utils import random_id_with_timestamp, mask_with_timestamp
+from dashboard.trajectory_pack import TrajectoryPack, has_pack
+from dashboard.trajectory_files import (
+    SCREENSHOT_DIR,
+    TRAJECTORY_SUFFIXES,
+    compress,
+    configured_encoding,
+    trajectory_name,
+    trajectory_task_id,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Set by the experiments server when it launches evaluator processes into an existing experiment folder
+EXPERIMENT_FOLDER_ENV = "CUGA_VIZ_EXPERIMENT_FOLDER"
+TASK_IDS_FILE_ENV = "CUGA_VIZ_TASK_IDS_FILE"
+SHARD_ID_ENV = "CUGA_VIZ_SHARD_ID"
+# How trajectories are stored: a JSON file per task, or appended to the experiment's pack file
+TRAJECTORY_STORE_ENV = "CUGA_VIZ_TRAJECTORY_STORE"
+STORE_FILES = "files"
+STORE_PACK = "pack"
+
+# How a run treats an existing experiment folder
+RUN_MODE_FULL = "full"
+RUN_MODE_RESUME = "resume"
+RUN_MODE_RERUN_FAILED = "rerun_failed"
+RUN_MODES = (RUN_MODE_FULL, RUN_MODE_RESUME, RUN_MODE_RERUN_FAILED)
 
 
 class Prompt(BaseModel):
@@ -36,6 +66,8 @@ class TasksMetadata(BaseModel):
     experiment_name: str
     experiment_folder: str
     created_at: str
+    # Set on merged experiments: the policy, its parameters and the source experiments
+    merge_policy: Optional[Dict[str, Any]] = None
 
 
 class ActivityTracker(object):
@@ -63,6 +95,16 @@ class ActivityTracker(object):
     # Base directory configuration
     _base_dir: str = "./logging/trajectory_data"
 
+    # How much of each step is written, read from CUGA_VIZ_CAPTURE_* on first use unless set
+    capture: Optional[CapturePolicy] = None
+    # Full copies of steps written reduced, and the indices of failed steps, of the current task
+    _capture_buffer: Optional[CaptureBuffer] = None
+    _failed_steps: List[int] = []
+    _capture_escalated: bool = False
+
+    # Callbacks notified with (experiment_folder, task_id) after trajectory or result writes
+    _write_listeners: List[Callable[[str, str], None]] = []
+
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
             cls._instance = super(ActivityTracker, cls).__new__(cls)
@@ -78,6 +120,41 @@ class ActivityTracker(object):
         self._base_dir = base_dir
         logger.info(f"Base directory set to: {self._base_dir}")
 
+    def set_capture_level(
+        self,
+        level: str,
+        sample_every: Optional[int] = None,
+        escalate_on_failure: Optional[bool] = None,
+        buffer_mb: Optional[float] = None,
+    ) -> None:
+        """
+        Set how much of each step the tracker writes.
+
+        Args:
+            level (str): full, no-images, sampled-images or summary-only (see dashboard.capture)
+            sample_every (int, optional): With sampled-images, keep the screenshot of every Nth step
+            escalate_on_failure (bool, optional): Rewrite tasks ending with score 0 or an exception in full
+            buffer_mb (float, optional): Memory for the full copies of steps kept for escalation
+
+        Raises:
+            ValueError: If the level is unknown
+        """
+        validate_capture_level(level)
+        updates: Dict[str, Any] = {"level": level}
+        if sample_every is not None:
+            updates["sample_every"] = max(1, sample_every)
+        if escalate_on_failure is not None:
+            updates["escalate_on_failure"] = escalate_on_failure
+        if buffer_mb is not None:
+            updates["buffer_bytes"] = int(buffer_mb * (1 << 20))
+        self.capture = self._capture_policy()._replace(**updates)
+        self._capture_buffer = None
+
+    def _capture_policy(self) -> CapturePolicy:
+        if self.capture is None:
+            self.capture = CapturePolicy.from_env()
+        return self.capture
+
     def get_base_dir(self) -> str:
         """
         Get the current base directory for logging trajectory data.
@@ -87,6 +164,27 @@ class ActivityTracker(object):
         """
         return self._base_dir
 
+    def add_write_listener(self, listener: Callable[[str, str], None]) -> None:
+        """
+        Register a callback invoked after the tracker writes trajectory or result files.
+
+        Args:
+            listener (Callable[[str, str], None]): Called with the experiment folder and task ID
+        """
+        if listener not in self._write_listeners:
+            self._write_listeners.append(listener)
+
+    def remove_write_listener(self, listener: Callable[[str, str], None]) -> None:
+        if listener in self._write_listeners:
+            self._write_listeners.remove(listener)
+
+    def _notify_write(self, task_id: str) -> None:
+        for listener in list(self._write_listeners):
+            try:
+                listener(self.experiment_folder or "", task_id)
+            except Exception as e:
+                logger.error(f"Write listener failed: {e}")
+
     def generate_session_id(self):
         self.session_id = random_id_with_timestamp(full_date=True)
 
@@ -101,6 +199,9 @@ class ActivityTracker(object):
         self.final_answer = None
         self.task_id = task_id
         self.intent = intent
+        self._capture_buffer = None
+        self._failed_steps = []
+        self._capture_escalated = False
 
     def start_experiment(
         self, task_ids: List[str], experiment_name: str, description: Optional[str] = ""
@@ -116,6 +217,10 @@ class ActivityTracker(object):
         Returns:
             str: The experiment folder name
         """
+        # Processes launched by the experiments server join the folder they were given
+        if os.environ.get(EXPERIMENT_FOLDER_ENV):
+            return self.resume_experiment(os.environ[EXPERIMENT_FOLDER_ENV])
+
         # Generate experiment folder name using mask_with_timestamp
         self.experiment_folder = mask_with_timestamp(experiment_name, full_date=True)
 
@@ -145,8 +250,72 @@ class ActivityTracker(object):
 
         return self.experiment_folder
 
+    def resume_experiment(self, experiment_folder: str) -> str:
+        """
+        Continue writing into an existing experiment folder, keeping its results.
+
+        Args:
+            experiment_folder (str): Folder name under the base directory, or an absolute path
+
+        Returns:
+            str: The experiment folder name
+        """
+        if os.path.isabs(experiment_folder):
+            self._base_dir, experiment_folder = os.path.split(experiment_folder.rstrip(os.sep))
+        experiment_dir = os.path.join(self._base_dir, experiment_folder)
+        if not os.path.isdir(experiment_dir):
+            raise ValueError(f"Experiment folder {experiment_dir} does not exist")
+
+        self.experiment_folder = experiment_folder
+        metadata_path = os.path.join(experiment_dir, "metadata.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                self.tasks_metadata = TasksMetadata(**json.load(f))
+
+        results_path = os.path.join(experiment_dir, self._results_json_name())
+        self.tasks = {}
+        if os.path.exists(results_path):
+            with open(results_path, 'r', encoding='utf-8') as f:
+                self.tasks = json.load(f)
+
+        logger.info(f"Resumed experiment {experiment_dir} with {len(self.tasks)} finished tasks")
+        return self.experiment_folder
+
+    @staticmethod
+    def get_assigned_task_ids(task_ids: Optional[List[str]] = None) -> Optional[List[str]]:
+        """
+        Restrict a task list to the tasks assigned to this process by the experiments server.
+
+        Evaluators call this with their full task list before starting an experiment. Outside of
+        a server-launched shard or resume run the list is returned unchanged.
+
+        Args:
+            task_ids (List[str], optional): The evaluator's task IDs, in execution order
+
+        Returns:
+            The assigned task IDs in the evaluator's order, or the assignment itself if task_ids is None
+        """
+        task_ids_file = os.environ.get(TASK_IDS_FILE_ENV)
+        if not task_ids_file:
+            return task_ids
+        with open(task_ids_file, 'r', encoding='utf-8') as f:
+            assigned = json.load(f)
+        if task_ids is None:
+            return assigned
+        assigned_set = set(assigned)
+        return [task_id for task_id in task_ids if task_id in assigned_set]
+
+    @staticmethod
+    def _results_json_name() -> str:
+        shard_id = os.environ.get(SHARD_ID_ENV)
+        # Shards write their own results file, the server folds them into results.json
+        return f"results.shard-{shard_id}.json" if shard_id else "results.json"
+
     def _initialize_experiment_files(self, experiment_dir: str) -> None:
         """Initialize empty result files for the experiment."""
+        # Imported on use, agents importing the tracker should not pay for pandas up front
+        import pandas as pd
+
         # Define column order for CSV
         columns = [
             'task_id',
@@ -191,18 +360,55 @@ class ActivityTracker(object):
     def collect_image(self, img: str) -> None:
         self.images.append(img)
 
-    def collect_step(self, step: Step) -> None:
+    def collect_step(self, step: Step, failed: bool = False) -> None:
         """
         Collects a step, adding it to the steps list.
 
+        Under a reduced capture level the step is kept as written, with the fields the level
+        does not capture emptied, and its full copy goes to the bounded escalation buffer.
+
         Args:
             step (str): The description of the step to collect.
+            failed (bool): Whether the step failed; sampled-images keeps the screenshots of failed steps
         """
         step.prompts = copy.deepcopy(self.prompts)
         self.prompts = []
+        policy = self._capture_policy()
+        if policy.level != FULL:
+            index = len(self.steps)
+            if failed:
+                self._failed_steps.append(index)
+            # The previous step is no longer the last one, its screenshot stays only if it is sampled
+            previous = index - 1
+            if policy.level == SAMPLED_IMAGES and previous >= 0:
+                keep = policy.keeps_image(previous, last=False, failed=previous in self._failed_steps)
+                self.steps[previous] = policy.reduce(self.steps[previous], keep)
+            if policy.escalate_on_failure:
+                if self._capture_buffer is None:
+                    self._capture_buffer = CaptureBuffer(policy.buffer_bytes)
+                self._capture_buffer.add(index, step)
+            step = policy.reduce(step, policy.keeps_image(index, last=True, failed=failed))
         self.steps.append(step)
         self.to_file()
 
+    def _escalate_capture(self, task_id: str, score: Optional[float], exception: Optional[bool]) -> None:
+        """Rewrite a failed task's trajectory with the full steps still in the escalation buffer."""
+        policy = self._capture_policy()
+        if policy.level == FULL or not policy.escalate_on_failure or self._capture_buffer is None:
+            return
+        if task_id != self.task_id or not (exception or (score is not None and score == 0)):
+            return
+        buffer = self._capture_buffer
+        for index in range(len(self.steps)):
+            full = buffer.get(index)
+            if full is not None:
+                self.steps[index] = full
+        if buffer.dropped:
+            logger.info(f"Task {task_id} escalated to full capture, {buffer.dropped} step(s) stay reduced")
+        self._capture_buffer = None
+        self._capture_escalated = True
+        self.to_file()
+
     def collect_score(self, score: float) -> None:
         """
         Collects a step, adding it to the steps list.
@@ -219,8 +425,17 @@ class ActivityTracker(object):
         """
         pass
 
-    def to_file(self):
-        """Save current task data to file in the experiment directory."""
+    def to_file(self, final: bool = False):
+        """
+        Save current task data to file in the experiment directory.
+
+        With the pack store the running task is still written to its own file, replaced on each
+        step, and only the finished trajectory is appended to the pack; appending on every step
+        would leave a replaced record per step in the pack.
+
+        Args:
+            final (bool): Whether the task is finished, set by finish_task
+        """
         if self.experiment_folder:
             # Save to experiment directory
             source_dir = os.path.join(self._base_dir, self.experiment_folder)
@@ -231,23 +446,45 @@ class ActivityTracker(object):
         os.makedirs(source_dir, exist_ok=True)
 
         filename = self.task_id if self.task_id != "default" else self.session_id
-        filepath = os.path.join(source_dir, f"{filename}.json")
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(
-                {
-                    "intent": self.intent,
-                    "dataset_name": self.dataset_name,
-                    "actions_count": self.actions_count,
-                    "task_id": self.task_id,
-                    "eval": self.eval,
-                    "steps": [d.model_dump() for d in self.steps],
-                    "score": self.score,
-                },
-                f,
-                ensure_ascii=False,
-                indent=4,
-            )
+        trajectory = {
+            "intent": self.intent,
+            "dataset_name": self.dataset_name,
+            "actions_count": self.actions_count,
+            "task_id": self.task_id,
+            "eval": self.eval,
+            "steps": [d.model_dump() for d in self.steps],
+            "score": self.score,
+        }
+        if self._capture_policy().level != FULL:
+            trajectory["capture"] = {"level": self.capture.level, "escalated": self._capture_escalated}
+        if self.experiment_folder and interning_enabled():
+            prompt_store = open_store(source_dir)
+            for step in trajectory["steps"]:
+                step["prompts"] = prompt_store.intern(step["prompts"])
+
+        filepath = None
+        if final and os.environ.get(TRAJECTORY_STORE_ENV, STORE_FILES) == STORE_PACK:
+            payload = json.dumps(trajectory, ensure_ascii=False, indent=4).encode('utf-8')
+            TrajectoryPack(source_dir).append(filename, payload)
+        else:
+            encoding = configured_encoding()
+            filepath = os.path.join(source_dir, trajectory_name(filename, encoding))
+            # Replace rather than rewrite the file: merged experiments hardlink trajectories of their sources
+            tmp_path = f"{filepath}.tmp"
+            if encoding is None:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(trajectory, f, ensure_ascii=False, indent=4)
+            else:
+                payload = json.dumps(trajectory, ensure_ascii=False, indent=4).encode('utf-8')
+                with open(tmp_path, 'wb') as f:
+                    f.write(compress(payload, encoding))
+            os.replace(tmp_path, filepath)
+        # Only one form of a trajectory is kept, readers would otherwise pick a stale one
+        for suffix in TRAJECTORY_SUFFIXES:
+            other = os.path.join(source_dir, f"{filename}{suffix}")
+            if other != filepath and os.path.exists(other):
+                os.remove(other)
+        self._notify_write(self.task_id)
 
     def finish_task(
         self,
@@ -296,9 +533,14 @@ class ActivityTracker(object):
             "agent_v": agent_v,
         }
 
+        self._escalate_capture(task_id, score, exception)
+        if task_id == self.task_id and os.environ.get(TRAJECTORY_STORE_ENV, STORE_FILES) == STORE_PACK:
+            self.to_file(final=True)
+
         # Update result files
         self._update_result_files()
         self._add_to_progress_file(task_id)
+        self._notify_write(task_id)
 
         return task_id
 
@@ -309,6 +551,12 @@ class ActivityTracker(object):
 
         experiment_dir = os.path.join(self._base_dir, self.experiment_folder)
 
+        if os.environ.get(SHARD_ID_ENV):
+            results_json_path = os.path.join(experiment_dir, self._results_json_name())
+            with open(results_json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.tasks, f, indent=2, ensure_ascii=False)
+            return
+
         # Update results.json
         results_json_path = os.path.join(experiment_dir, "results.json")
         with open(results_json_path, 'w', encoding='utf-8') as f:
@@ -319,6 +567,15 @@ class ActivityTracker(object):
 
     def _save_csv(self, experiment_dir: str) -> None:
         """Save current tasks to CSV file using pandas."""
+        self._write_results_csv(self.tasks, experiment_dir)
+
+    @staticmethod
+    def _write_results_csv(tasks: Dict[str, Dict[str, Any]], experiment_dir: str) -> None:
+        """Write a tasks dictionary to the experiment's results.csv and its typed copy."""
+        import pandas as pd
+
+        from dashboard.results_store import write_results_columns
+
         # Define the column order
         columns = [
             'task_id',
@@ -333,13 +590,13 @@ class ActivityTracker(object):
             'agent_v',
         ]
 
-        if not self.tasks:
+        if not tasks:
             # Create empty DataFrame with headers if no tasks
             df = pd.DataFrame(columns=columns)
         else:
             # Convert tasks dictionary to list of dictionaries for DataFrame
             data = []
-            for task_id, task_data in self.tasks.items():
+            for task_id, task_data in tasks.items():
                 row = {'task_id': task_id}
                 row.update(task_data)
                 data.append(row)
@@ -353,6 +610,117 @@ class ActivityTracker(object):
         # Save to CSV
         results_csv_path = os.path.join(experiment_dir, "results.csv")
         df.to_csv(results_csv_path, index=False, encoding='utf-8')
+        # Typed copy the server reads instead of parsing the CSV again
+        write_results_columns(df, results_csv_path)
+
+    @classmethod
+    def consolidate_shard_results(cls, experiment_dir: str) -> int:
+        """
+        Fold the results written by shard processes into results.json and results.csv.
+
+        Shard results override existing entries for the same task, so reruns replace
+        earlier outcomes in place. Shard files are kept until the run removes them.
+
+        Args:
+            experiment_dir (str): Path to the experiment folder
+
+        Returns:
+            int: Number of tasks in the consolidated results
+        """
+        results_json_path = os.path.join(experiment_dir, "results.json")
+        tasks: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(results_json_path):
+            try:
+                with open(results_json_path, 'r', encoding='utf-8') as f:
+                    tasks = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                # Kept aside rather than overwritten, the shard results are folded into a new one
+                logger.error(f"Could not read {results_json_path}, moving it to .unreadable: {e}")
+                os.replace(results_json_path, f"{results_json_path}.unreadable")
+
+        for file_name in sorted(os.listdir(experiment_dir)):
+            if file_name.startswith("results.shard-") and file_name.endswith(".json"):
+                try:
+                    with open(os.path.join(experiment_dir, file_name), 'r', encoding='utf-8') as f:
+                        tasks.update(json.load(f))
+                except (json.JSONDecodeError, IOError) as e:
+                    logger.error(f"Could not read shard results {file_name}: {e}")
+
+        tmp_path = f"{results_json_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tasks, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, results_json_path)
+        cls._write_results_csv(tasks, experiment_dir)
+        return len(tasks)
+
+    @staticmethod
+    def select_tasks_to_run(experiment_dir: str, mode: str) -> List[str]:
+        """
+        Select the tasks of an existing experiment that a run in the given mode executes.
+
+        Resuming skips every task listed in .progress. Rerunning failed tasks picks the tasks
+        whose result has an exception or no passing score.
+
+        Args:
+            experiment_dir (str): Path to the experiment folder
+            mode (str): One of RUN_MODES
+
+        Returns:
+            List[str]: Task IDs in the order of the experiment's metadata
+        """
+        if mode not in RUN_MODES:
+            raise ValueError(f"Unknown run mode '{mode}', expected one of {', '.join(RUN_MODES)}")
+
+        metadata_path = os.path.join(experiment_dir, "metadata.json")
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            task_ids = list(dict.fromkeys(json.load(f).get('task_ids', [])))
+        if mode == RUN_MODE_FULL:
+            return task_ids
+
+        if mode == RUN_MODE_RESUME:
+            progress_path = os.path.join(experiment_dir, ".progress")
+            completed = set()
+            if os.path.exists(progress_path):
+                with open(progress_path, 'r', encoding='utf-8') as f:
+                    completed = set(line.strip() for line in f if line.strip())
+            return [task_id for task_id in task_ids if task_id not in completed]
+
+        results_path = os.path.join(experiment_dir, "results.json")
+        results: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(results_path):
+            with open(results_path, 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        failed = {
+            task_id
+            for task_id, result in results.items()
+            if result.get("exception") is True or not result.get("score")
+        }
+        # Failed tasks that are not part of the metadata (e.g. after a merge) are rerun last
+        ordered = [task_id for task_id in task_ids if task_id in failed]
+        return ordered + sorted(failed - set(ordered))
+
+    @staticmethod
+    def reset_task_progress(experiment_dir: str, task_ids: List[str]) -> None:
+        """
+        Remove tasks from an experiment's .progress file so they count as pending again.
+
+        Their rows in results.json are kept until the rerun overwrites them.
+
+        Args:
+            experiment_dir (str): Path to the experiment folder
+            task_ids (List[str]): Task IDs to mark as not completed
+        """
+        progress_path = os.path.join(experiment_dir, ".progress")
+        if not task_ids or not os.path.exists(progress_path):
+            return
+        reset = set(task_ids)
+        with open(progress_path, 'r', encoding='utf-8') as f:
+            kept = [line.strip() for line in f if line.strip() and line.strip() not in reset]
+
+        tmp_path = f"{progress_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(task_id + '\n' for task_id in kept)
+        os.replace(tmp_path, progress_path)
 
     def _add_to_progress_file(self, task_id: str) -> None:
         """Add a task ID to the .progress file."""
@@ -553,13 +921,15 @@ class ActivityTracker(object):
 
         return stats
 
-    def get_dataframe(self) -> pd.DataFrame:
+    def get_dataframe(self) -> "pd.DataFrame":
         """
         Get all tasks as a pandas DataFrame.
 
         Returns:
             pd.DataFrame: DataFrame containing all tasks
         """
+        import pandas as pd
+
         columns = [
             'task_id',
             'site',
@@ -585,77 +955,220 @@ class ActivityTracker(object):
         df = pd.DataFrame(data)
         return df.reindex(columns=columns)
 
+    @staticmethod
+    def _read_merge_source(
+        folder_path: str,
+    ) -> Tuple[Optional[Dict[str, Any]], str, Dict[str, Optional[str]]]:
+        """Read a source's results.json and creation time and list its trajectories in one directory scan."""
+        results = None
+        results_json_path = os.path.join(folder_path, "results.json")
+        if os.path.exists(results_json_path):
+            with open(results_json_path, 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        created_at = ""
+        metadata_path = os.path.join(folder_path, "metadata.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                created_at = json.load(f).get("created_at") or ""
+        if not created_at and os.path.isdir(folder_path):
+            created_at = datetime.fromtimestamp(os.path.getctime(folder_path)).isoformat()
+        task_files = ActivityTracker._list_trajectories(folder_path) if os.path.isdir(folder_path) else {}
+        return results, created_at, task_files
+
+    @staticmethod
+    def _list_trajectories(folder_path: str) -> Dict[str, Optional[str]]:
+        """File name of every trajectory in a folder by task ID, plain or compressed; None when only packed."""
+        task_files: Dict[str, Optional[str]] = {}
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                task_id = trajectory_task_id(entry.name)
+                if task_id is not None:
+                    task_files[task_id] = entry.name
+        if has_pack(folder_path):
+            for task_id in TrajectoryPack(folder_path).entries():
+                task_files.setdefault(task_id, None)
+        return task_files
+
     def _copy_task_json_files(
         self,
         source_folders: List[str],
         target_folder: str,
         selected_task_ids: List[str],
         base_dir: str = None,
-    ) -> None:
+        preferred_sources: Optional[Dict[str, str]] = None,
+        source_files: Optional[Dict[str, Dict[str, Optional[str]]]] = None,
+        progress: Optional[Callable[[str, int, int], None]] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, int]:
         """
-        Copy individual task JSON files from source folders to target folder.
+        Place individual task JSON files from source folders into the target folder.
+
+        Files are hardlinked where possible, cloned or copied otherwise (see file_links.link_file).
+        Trajectories only held in a source's pack are written out as files of the target.
+        Each task's file comes from its preferred source, or the first source folder holding it.
 
         Args:
             source_folders (List[str]): List of source experiment folder names
             target_folder (str): Target experiment folder name
             selected_task_ids (List[str]): List of task IDs to copy
             base_dir (str, optional): Base directory. If None, uses instance base_dir
+            preferred_sources (Dict[str, str], optional): Source folder to take each task from
+            source_files (Dict[str, Dict], optional): Trajectory file names by task ID per source folder, listed if omitted
+            progress (Callable[[str, int, int], None], optional): Called with the phase, done and total counts
+            max_workers (int, optional): Threads placing files concurrently
+
+        Returns:
+            Dict[str, int]: Number of files per placement method, plus skipped files, placed screenshots and prompts
         """
         if base_dir is None:
             base_dir = self._base_dir
-
-        target_dir = os.path.join(base_dir, target_folder)
-
-        copied_files = 0
-        skipped_files = 0
-
-        for task_id in selected_task_ids:
-            file_found = False
-
-            # Look for the task JSON file in each source folder
+        preferred_sources = preferred_sources or {}
+        if source_files is None:
+            source_files = {}
             for folder_name in source_folders:
-                source_dir = os.path.join(base_dir, folder_name)
-                source_file = os.path.join(source_dir, f"{task_id}.json")
+                folder_path = os.path.join(base_dir, folder_name)
+                if os.path.isdir(folder_path):
+                    source_files[folder_name] = self._list_trajectories(folder_path)
 
-                if os.path.exists(source_file):
-                    target_file = os.path.join(target_dir, f"{task_id}.json")
+        # One pass over the listings instead of an exists() probe per task and source
+        first_source: Dict[str, str] = {}
+        for folder_name in reversed(source_folders):
+            for task_id in source_files.get(folder_name, ()):
+                first_source[task_id] = folder_name
 
-                    try:
-                        # Copy the file
-                        shutil.copy2(source_file, target_file)
-                        logger.debug(f"Copied {task_id}.json from {folder_name}")
-                        copied_files += 1
-                        file_found = True
-                        break  # Found and copied, move to next task
-
-                    except Exception as e:
-                        logger.error(f"Failed to copy {task_id}.json from {folder_name}: {e}")
-
-            if not file_found:
+        target_dir = os.path.join(base_dir, target_folder)
+        packs: Dict[str, Dict[str, Any]] = {}
+        for folder_name in source_folders:
+            if has_pack(os.path.join(base_dir, folder_name)):
+                pack = TrajectoryPack(os.path.join(base_dir, folder_name))
+                packs[folder_name] = {"pack": pack, "entries": pack.entries()}
+        placements = []
+        counts = {"skipped": 0}
+        for task_id in selected_task_ids:
+            folder_name = preferred_sources.get(task_id)
+            if folder_name is None or task_id not in source_files.get(folder_name, ()):
+                folder_name = first_source.get(task_id)
+            if folder_name is None:
                 logger.warning(f"Task JSON file {task_id}.json not found in any source folder")
-                skipped_files += 1
+                counts["skipped"] += 1
+                continue
+            # Compressed trajectories keep their form in the merged experiment
+            file_name = source_files.get(folder_name, {}).get(task_id) or f"{task_id}.json"
+            packed = packs.get(folder_name, {}).get("entries", {}).get(task_id)
+            placements.append(
+                (
+                    os.path.join(base_dir, folder_name, file_name),
+                    os.path.join(target_dir, file_name),
+                    (packs[folder_name]["pack"], packed) if packed else None,
+                )
+            )
 
-        logger.info(f"Task JSON files - Copied: {copied_files}, Skipped: {skipped_files}")
+        def place(placement: Tuple[str, str, Optional[Tuple[TrajectoryPack, Any]]]) -> Optional[str]:
+            source, target, packed = placement
+            try:
+                # Loose files win over the pack, as they do when the server serves a task
+                if packed is None or os.path.exists(source):
+                    return link_file(source, target)
+                pack, entry = packed
+                tmp_path = f"{target}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    for chunk in pack.iter_chunks(entry):
+                        f.write(chunk)
+                os.replace(tmp_path, target)
+                return "unpacked"
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to place {os.path.basename(source)} from {source}: {e}")
+                return None
+
+        total = len(placements)
+        step = max(1, total // 100)
+        with ThreadPoolExecutor(max_workers=max_workers or min(16, (os.cpu_count() or 1) * 4)) as pool:
+            for done, method in enumerate(pool.map(place, placements), start=1):
+                if method is None:
+                    counts["skipped"] += 1
+                else:
+                    counts[method] = counts.get(method, 0) + 1
+                if progress and (done % step == 0 or done == total):
+                    progress("linking", done, total)
+
+        # Screenshots extracted by compaction are named after their content, any source's copy will do
+        target_screenshots = os.path.join(target_dir, SCREENSHOT_DIR)
+        for folder_name in source_folders:
+            source_screenshots = os.path.join(base_dir, folder_name, SCREENSHOT_DIR)
+            if not os.path.isdir(source_screenshots):
+                continue
+            os.makedirs(target_screenshots, exist_ok=True)
+            for entry in os.scandir(source_screenshots):
+                target = os.path.join(target_screenshots, entry.name)
+                if entry.is_file() and not os.path.exists(target):
+                    try:
+                        link_file(entry.path, target)
+                        counts["screenshots"] = counts.get("screenshots", 0) + 1
+                    except OSError as e:
+                        logger.error(f"Failed to place screenshot {entry.name} from {folder_name}: {e}")
+
+        # Interned prompts of the placed trajectories live in their sources' prompt stores
+        for folder_name in source_folders:
+            if os.path.isfile(os.path.join(base_dir, folder_name, PROMPTS_FILE)):
+                os.makedirs(target_dir, exist_ok=True)
+                counts["prompts"] = counts.get("prompts", 0) + open_store(target_dir).merge(
+                    PromptStore(os.path.join(base_dir, folder_name))
+                )
+
+        logger.info(f"Task JSON files - {counts}")
+        return counts
 
     def merge_experiments(
         self,
         experiment_folders: List[str],
         output_experiment_name: str,
         description: Optional[str] = "Merged experiments",
+        progress: Optional[Callable[[str, int, int], None]] = None,
+        max_workers: Optional[int] = None,
+        policy: str = BEST_SCORE,
+        agent_v: Optional[str] = None,
     ) -> str:
         """
-        Merge multiple experiment folders, preferring tasks with score 1.0 over 0.0.
-        Also copies individual task JSON files from source experiments.
+        Merge multiple experiment folders, keeping one result per task chosen by a merge policy.
+        Also links individual task JSON files from source experiments.
+
+        Sources are read concurrently; each task's trajectory is taken from the source whose
+        result was kept, and hardlinked instead of copied where the filesystem allows. The
+        policy is recorded in the merged experiment's metadata.
 
         Args:
             experiment_folders (List[str]): List of experiment folder names to merge
             output_experiment_name (str): Name for the merged experiment
             description (str, optional): Description for the merged experiment
+            progress (Callable[[str, int, int], None], optional): Called with the phase, done and total counts
+            max_workers (int, optional): Threads reading sources and placing files
+            policy (str): One of merge_policies.MERGE_POLICIES, the best score by default
+            agent_v (str, optional): Agent version kept by the agent_version policy
 
         Returns:
             str: The merged experiment folder name
+
+        Raises:
+            ValueError: If the policy is unknown or misses its parameters
         """
-        logger.info(f"Starting merge of {len(experiment_folders)} experiments")
+        validate_merge_policy(policy, agent_v)
+        logger.info(f"Starting merge of {len(experiment_folders)} experiments with policy {policy}")
+        workers = max_workers or min(16, (os.cpu_count() or 1) * 4)
+
+        # Read all sources at once, merging below still follows the given folder order
+        sources: Dict[str, Tuple[Optional[Dict[str, Any]], str, set]] = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                folder_name: pool.submit(self._read_merge_source, os.path.join(self._base_dir, folder_name))
+                for folder_name in experiment_folders
+            }
+            for done, (folder_name, future) in enumerate(futures.items(), start=1):
+                try:
+                    sources[folder_name] = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing {folder_name}: {e}")
+                if progress:
+                    progress("reading", done, len(experiment_folders))
 
         # Create new experiment for merged results
         merged_folder = self.start_experiment(
@@ -664,78 +1177,41 @@ class ActivityTracker(object):
             description=description,
         )
 
-        merged_tasks = {}
-        all_task_ids = set()
-        task_source_mapping = {}  # Track which folder each task came from
-
-        # First pass: collect all tasks and identify duplicates
+        merge_sources = []
         for folder_name in experiment_folders:
-            folder_path = os.path.join(self._base_dir, folder_name)
-            results_json_path = os.path.join(folder_path, "results.json")
-
-            if not os.path.exists(results_json_path):
+            folder_tasks, created_at, _ = sources.get(folder_name, (None, "", set()))
+            if folder_tasks is None:
                 logger.warning(f"Results file not found in {folder_name}, skipping")
                 continue
+            logger.info(f"Processing {len(folder_tasks)} tasks from {folder_name}")
+            merge_sources.append({"name": folder_name, "results": folder_tasks, "created_at": created_at})
 
-            try:
-                with open(results_json_path, 'r', encoding='utf-8') as f:
-                    folder_tasks = json.load(f)
-
-                logger.info(f"Processing {len(folder_tasks)} tasks from {folder_name}")
-
-                for task_id, task_data in folder_tasks.items():
-                    all_task_ids.add(task_id)
-
-                    if task_id not in merged_tasks:
-                        # First occurrence of this task
-                        merged_tasks[task_id] = {**task_data, 'source_experiment': folder_name}
-                        task_source_mapping[task_id] = folder_name
-                        logger.debug(f"Added new task {task_id} from {folder_name}")
-                    else:
-                        # Task already exists, apply preference logic
-                        existing_score = merged_tasks[task_id].get('score', 0.0)
-                        new_score = task_data.get('score', 0.0)
-
-                        # Prefer score 1.0 over others, then higher scores
-                        should_replace = False
-
-                        if existing_score == 1.0 and new_score != 1.0:
-                            # Keep existing (perfect score)
-                            should_replace = False
-                        elif existing_score != 1.0 and new_score == 1.0:
-                            # Replace with perfect score
-                            should_replace = True
-                        elif existing_score == new_score:
-                            # Same score, keep existing (first found)
-                            should_replace = False
-                        else:
-                            # Different scores, prefer higher
-                            should_replace = new_score > existing_score
-
-                        if should_replace:
-                            merged_tasks[task_id] = {**task_data, 'source_experiment': folder_name}
-                            task_source_mapping[task_id] = folder_name
-                            logger.debug(
-                                f"Replaced task {task_id}: {existing_score} -> {new_score} from {folder_name}"
-                            )
-                        else:
-                            logger.debug(
-                                f"Kept existing task {task_id}: score {existing_score} vs {new_score}"
-                            )
-
-            except Exception as e:
-                logger.error(f"Error processing {folder_name}: {e}")
-                continue
+        # Resolve every task at once over the concatenated results of all sources
+        frame = results_frame(merge_sources)
+        all_task_ids = list(dict.fromkeys(frame["task_id"]))
+        merged_tasks = {}
+        task_source_mapping = {}  # Track which folder each task came from
+        for task_id, order in resolve_merge(frame, policy, agent_v).items():
+            source = merge_sources[order]
+            merged_tasks[task_id] = {**source["results"][task_id], 'source_experiment': source["name"]}
+            task_source_mapping[task_id] = source["name"]
+        if progress:
+            progress("resolving", len(merged_tasks), len(all_task_ids))
 
         # Update the merged experiment with final task list
         self.tasks = merged_tasks
+        experiment_dir = os.path.join(self._base_dir, merged_folder)
 
         # Update metadata with actual task IDs
         if self.tasks_metadata:
-            self.tasks_metadata.task_ids = list(all_task_ids)
+            self.tasks_metadata.task_ids = all_task_ids
+            self.tasks_metadata.merge_policy = {
+                "name": policy,
+                "agent_v": agent_v,
+                "sources": [source["name"] for source in merge_sources],
+            }
 
             # Save updated metadata
-            experiment_dir = os.path.join(self._base_dir, merged_folder)
             metadata_path = os.path.join(experiment_dir, "metadata.json")
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(self.tasks_metadata.model_dump(), f, indent=2, ensure_ascii=False)
@@ -743,14 +1219,21 @@ class ActivityTracker(object):
         # Update result files with merged data
         self._update_result_files()
 
-        # Update progress file with all task IDs
-        for task_id in merged_tasks.keys():
-            self._add_to_progress_file(task_id)
-
-        # Copy individual task JSON files
-        logger.info("Copying individual task JSON files...")
-        selected_task_ids = list(merged_tasks.keys())
-        self._copy_task_json_files(experiment_folders, merged_folder, selected_task_ids)
+        # Update progress file with all task IDs in one write
+        with open(os.path.join(experiment_dir, ".progress"), 'a', encoding='utf-8') as f:
+            f.writelines(task_id + '\n' for task_id in merged_tasks)
+
+        # Link individual task JSON files
+        logger.info("Linking individual task JSON files...")
+        self._copy_task_json_files(
+            experiment_folders,
+            merged_folder,
+            list(merged_tasks.keys()),
+            preferred_sources=task_source_mapping,
+            source_files={folder_name: files for folder_name, (_, _, files) in sources.items()},
+            progress=progress,
+            max_workers=workers,
+        )
 
         logger.success(f"Successfully merged {len(merged_tasks)} tasks into {merged_folder}")
         logger.info(f"Source experiments: {experiment_folders}")
@@ -766,6 +1249,7 @@ class ActivityTracker(object):
 
         logger.info(f"Score distribution in merged results: {score_distribution}")
         logger.info(f"Source distribution in merged results: {source_distribution}")
+        self._notify_write("")
 
         return merged_folder
 
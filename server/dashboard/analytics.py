@@ -0,0 +1,184 @@
+import json
+import math
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_KS = (1, 3, 5)
+
+
+def _binomial_ratio(successes: np.ndarray, attempts: np.ndarray, k: int) -> np.ndarray:
+    """
+    C(successes, k) / C(attempts, k) for every task at once, NaN where fewer than k attempts.
+
+    Computed as the product of (successes - i) / (attempts - i) for i < k, which stays exact
+    for the small counts of repeated runs and needs no factorials.
+    """
+    steps = np.arange(k)
+    numerators = np.clip(successes[:, None] - steps, 0, None)
+    denominators = attempts[:, None] - steps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.prod(numerators / denominators, axis=1)
+    return np.where(attempts >= k, ratio, np.nan)
+
+
+def pass_at_k(passes: np.ndarray, attempts: np.ndarray, k: int) -> np.ndarray:
+    """Unbiased probability that at least one of k runs drawn from the attempts passes."""
+    return 1.0 - _binomial_ratio(attempts - passes, attempts, k)
+
+
+def pass_hat_k(passes: np.ndarray, attempts: np.ndarray, k: int) -> np.ndarray:
+    """Unbiased probability that all of k runs drawn from the attempts pass (pass^k)."""
+    return _binomial_ratio(passes, attempts, k)
+
+
+def flip_rate(passes: np.ndarray, attempts: np.ndarray) -> np.ndarray:
+    """Probability that two different runs of a task disagree, NaN for tasks run less than twice."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = 2.0 * passes * (attempts - passes) / (attempts * (attempts - 1))
+    return np.where(attempts >= 2, rate, np.nan)
+
+
+def _mean(values: np.ndarray) -> Optional[float]:
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.size else None
+
+
+def _score(result: Dict[str, Any]) -> float:
+    try:
+        return float(result.get("score") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _json_number(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def consistency_report(
+    runs: Sequence[Tuple[str, Dict[str, Dict[str, Any]]]], ks: Sequence[int] = DEFAULT_KS
+) -> Dict[str, Any]:
+    """
+    Per-task and per-site consistency of repeated runs of the same task set.
+
+    A result passes when its score is at least 1.0. Tasks missing from a run do not count as
+    attempts of that run, so k larger than a task's attempts gives no estimate for it.
+
+    Args:
+        runs (Sequence[Tuple[str, Dict]]): Experiment name and results.json mapping of every run
+        ks (Sequence[int]): The k of pass@k and pass^k
+
+    Returns:
+        Dict with a summary over all tasks, a row per task and a row per site
+    """
+    ks = sorted({k for k in ks if k >= 1})
+    task_ids: List[str] = list(dict.fromkeys(task_id for _, results in runs for task_id in results))
+    task_index = {task_id: index for index, task_id in enumerate(task_ids)}
+
+    # Task x run matrices of outcomes, built once and reduced column-wise below
+    attempted = np.zeros((len(task_ids), len(runs)), dtype=bool)
+    passed = np.zeros((len(task_ids), len(runs)), dtype=bool)
+    sites = [""] * len(task_ids)
+    for column, (_, results) in enumerate(runs):
+        rows = np.fromiter((task_index[task_id] for task_id in results), dtype=np.int64, count=len(results))
+        scores = np.fromiter(
+            (_score(result) for result in results.values()), dtype=np.float64, count=len(results)
+        )
+        attempted[rows, column] = True
+        passed[rows, column] = scores >= 1.0
+        for task_id, result in results.items():
+            if not sites[task_index[task_id]] and result.get("site"):
+                sites[task_index[task_id]] = str(result["site"])
+
+    attempts = attempted.sum(axis=1)
+    passes = passed.sum(axis=1)
+    pass_at = {k: pass_at_k(passes, attempts, k) for k in ks}
+    pass_hat = {k: pass_hat_k(passes, attempts, k) for k in ks}
+    flips = flip_rate(passes, attempts)
+
+    tasks = []
+    for index, task_id in enumerate(task_ids):
+        row = {
+            "task_id": task_id,
+            "site": sites[index],
+            "attempts": int(attempts[index]),
+            "passes": int(passes[index]),
+            "flip_rate": _json_number(flips[index]),
+        }
+        for k in ks:
+            row[f"pass@{k}"] = _json_number(pass_at[k][index])
+            row[f"pass^{k}"] = _json_number(pass_hat[k][index])
+        tasks.append(row)
+
+    # Pass rate of every site in every run, then its spread across runs
+    site_names, site_codes = np.unique(np.array(sites, dtype=object), return_inverse=True)
+    site_attempts = np.zeros((len(site_names), len(runs)))
+    site_passes = np.zeros((len(site_names), len(runs)))
+    np.add.at(site_attempts, site_codes, attempted)
+    np.add.at(site_passes, site_codes, passed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        site_rates = np.where(site_attempts > 0, site_passes / site_attempts, np.nan)
+    site_rows = []
+    for index, site in enumerate(site_names):
+        rates = site_rates[index][~np.isnan(site_rates[index])]
+        in_site = site_codes == index
+        site_rows.append(
+            {
+                "site": site,
+                "tasks": int(in_site.sum()),
+                "runs": int(rates.size),
+                "mean_pass_rate": float(rates.mean()) if rates.size else None,
+                "pass_rate_variance": float(rates.var(ddof=1)) if rates.size > 1 else None,
+                "pass_rate_std": float(rates.std(ddof=1)) if rates.size > 1 else None,
+                "mean_flip_rate": _mean(flips[in_site]),
+            }
+        )
+
+    summary = {
+        "runs": len(runs),
+        "tasks": len(task_ids),
+        "flaky_tasks": int(((passes > 0) & (passes < attempts)).sum()),
+        "mean_flip_rate": _mean(flips),
+    }
+    for k in ks:
+        summary[f"pass@{k}"] = _mean(pass_at[k])
+        summary[f"pass^{k}"] = _mean(pass_hat[k])
+    return {
+        "experiments": [name for name, _ in runs],
+        "k": ks,
+        "summary": summary,
+        "sites": site_rows,
+        "tasks": tasks,
+    }
+
+
+def _results_versions(experiment_dirs: Sequence[str]) -> Tuple[Tuple[str, int], ...]:
+    versions = []
+    for experiment_dir in experiment_dirs:
+        results_path = os.path.join(experiment_dir, "results.json")
+        versions.append((results_path, os.stat(results_path).st_mtime_ns))
+    return tuple(versions)
+
+
+@lru_cache(maxsize=16)
+def _cached_report(versions: Tuple[Tuple[str, int], ...], ks: Tuple[int, ...]) -> Dict[str, Any]:
+    runs = []
+    for results_path, _ in versions:
+        with open(results_path, 'r', encoding='utf-8') as f:
+            runs.append((os.path.basename(os.path.dirname(results_path)), json.load(f)))
+    return consistency_report(runs, ks)
+
+
+def analyze_experiments(experiment_dirs: Sequence[str], ks: Sequence[int] = DEFAULT_KS) -> Dict[str, Any]:
+    """
+    Consistency report of a group of experiment folders, see consistency_report.
+
+    Reports are cached per group of results.json versions, so repeated requests only stat
+    the files until one of the runs writes a new result.
+
+    Raises:
+        FileNotFoundError: If a folder has no results.json
+    """
+    return _cached_report(_results_versions(experiment_dirs), tuple(sorted(set(ks))))
@@ -0,0 +1,526 @@
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+bench_app = typer.Typer(help="Benchmarks for the dashboard server.", add_completion=False)
+
+console = Console()
+
+DEFAULT_STARTUP_BUDGET_MS = 1500
+
+# Runs in a fresh interpreter so every measurement sees a cold import
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from dashboard import server
+imported = time.perf_counter()
+server.create_app(server.parse_server_args(sys.argv[1:]))
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "pandas_loaded": "pandas" in sys.modules,
+}))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_args(work_dir: str) -> List[str]:
+    return ["--data_dir", work_dir, "--state_db", os.path.join(work_dir, "state.sqlite3")]
+
+
+def measure_import(work_dir: str) -> Dict[str, Any]:
+    """Time importing the server module and building the app in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE, *_server_args(work_dir)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _launch_server(server_args: List[str], port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "dashboard.server", *server_args, "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _wait_for_server(process: subprocess.Popen, port: int, timeout: float = 30.0) -> None:
+    """Poll a launched server until it answers, raising TimeoutError or RuntimeError if it never does."""
+    url = f"http://127.0.0.1:{port}/api/config"
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before answering")
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            time.sleep(0.01)
+    raise TimeoutError(f"Server did not answer within {timeout}s")
+
+
+def _stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def measure_first_response(work_dir: str, timeout: float = 30.0) -> float:
+    """
+    Time from launching the server process until it answers its first request.
+
+    Args:
+        work_dir (str): Scratch directory used as data directory and for the state database
+        timeout (float): Seconds to wait for the server before giving up
+
+    Returns:
+        float: Milliseconds until the first successful response
+
+    Raises:
+        TimeoutError: If the server did not answer in time
+    """
+    port = _free_port()
+    start = time.perf_counter()
+    process = _launch_server(_server_args(work_dir), port)
+    try:
+        _wait_for_server(process, port, timeout)
+        return (time.perf_counter() - start) * 1000
+    finally:
+        _stop_server(process)
+
+
+@bench_app.command("startup")
+def startup(
+    runs: int = typer.Option(5, "--runs", "-n", help="Number of cold starts to measure"),
+    budget_ms: float = typer.Option(
+        DEFAULT_STARTUP_BUDGET_MS, "--budget-ms", help="Median time to first response the server must meet"
+    ),
+):
+    """Measure server import time and time to first response, failing when over budget."""
+    import_ms, create_app_ms, first_response_ms = [], [], []
+    pandas_loaded = False
+    with tempfile.TemporaryDirectory(prefix="cuga-viz-bench-") as work_dir:
+        for _ in range(max(1, runs)):
+            probe = measure_import(work_dir)
+            import_ms.append(probe["import_ms"])
+            create_app_ms.append(probe["create_app_ms"])
+            pandas_loaded = pandas_loaded or probe["pandas_loaded"]
+            first_response_ms.append(measure_first_response(work_dir))
+
+    table = Table(title=f"Server startup ({len(first_response_ms)} runs)")
+    table.add_column("Phase")
+    table.add_column("Median (ms)", justify="right")
+    table.add_column("Max (ms)", justify="right")
+    for phase, values in (
+        ("import dashboard.server", import_ms),
+        ("create_app()", create_app_ms),
+        ("launch to first response", first_response_ms),
+    ):
+        table.add_row(phase, f"{statistics.median(values):.0f}", f"{max(values):.0f}")
+    console.print(table)
+
+    if pandas_loaded:
+        console.print("[bold yellow]pandas was imported during startup, it should load on first use[/]")
+    median = statistics.median(first_response_ms)
+    if median > budget_ms:
+        console.print(
+            f"[bold red]Median time to first response {median:.0f} ms is over the {budget_ms:.0f} ms budget[/]"
+        )
+        raise typer.Exit(code=1)
+    console.print(
+        f"[bold green]Median time to first response {median:.0f} ms is within the {budget_ms:.0f} ms budget[/]"
+    )
+
+
+def _timings(durations: List[float], items: int = 1) -> Dict[str, Any]:
+    """Summary of per-run durations in seconds, in milliseconds."""
+    ordered = sorted(durations)
+    return {
+        "runs": len(ordered),
+        "items": items,
+        "median_ms": statistics.median(ordered) * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+def _time_runs(function, repeat: int, setup=None) -> List[float]:
+    # One untimed run first, so lazy imports and first-touch costs do not count
+    if setup is not None:
+        setup()
+    function()
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run_suite(
+    work_dir: str,
+    experiments: int,
+    tasks: int,
+    steps: int,
+    screenshot_bytes: int,
+    repeat: int,
+    seed: int = 0,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Time the tracker and server hot paths against a synthetic experiment tree.
+
+    Server functions are called directly, without HTTP, and the parsed results caches are
+    cleared before every run so each run measures a cold read.
+
+    Args:
+        work_dir (str): Scratch directory for the synthetic tree and server state
+        experiments (int): Number of experiments generated
+        tasks (int): Tasks per experiment
+        steps (int): Steps per task
+        screenshot_bytes (int): Screenshot size attached to every step
+        repeat (int): Runs per benchmark
+        seed (int): Seed of the synthetic data
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Timing summary per benchmark
+    """
+    import asyncio
+    import random
+    import shutil
+
+    from dashboard import server
+    from dashboard.activity_tracker import ActivityTracker
+    from dashboard.synthetic import generate_experiment_tree, synthetic_step
+
+    tree = os.path.join(work_dir, "experiments")
+    os.makedirs(tree, exist_ok=True)
+    start = time.perf_counter()
+    folders = generate_experiment_tree(
+        tree,
+        experiments=experiments,
+        tasks_per_experiment=tasks,
+        steps_per_task=steps,
+        screenshot_bytes=screenshot_bytes,
+        seed=seed,
+    )
+    console.print(f"Generated {len(folders)} experiments in {time.perf_counter() - start:.1f}s")
+
+    server.create_app(
+        server.parse_server_args(
+            ["--experiments_dir", tree, "--state_db", os.path.join(work_dir, "state.sqlite3")]
+        )
+    )
+
+    def clear_caches():
+        server._load_results_csv.cache_clear()
+        server._load_results_records.cache_clear()
+
+    def download():
+        response = asyncio.run(server.download_experiment(folders[0]))
+        shutil.rmtree(os.path.dirname(response.path), ignore_errors=True)
+
+    results = {
+        "load_logged_experiments": _timings(
+            _time_runs(server.load_logged_experiments, repeat), items=len(folders)
+        ),
+        "get_csv_as_json": _timings(
+            _time_runs(lambda: asyncio.run(server.get_csv_as_json(folders[0])), repeat, clear_caches),
+            items=tasks,
+        ),
+        "generate_statistics": _timings(
+            _time_runs(lambda: asyncio.run(server.generate_statistics(folders[0])), repeat, clear_caches),
+            items=tasks,
+        ),
+        "download_experiment": _timings(_time_runs(download, repeat), items=tasks),
+    }
+
+    tracker = ActivityTracker()
+    merge_runs = []
+    for index in range(repeat):
+        begin = time.perf_counter()
+        merged = tracker.merge_experiments(folders, f"bench_merged_{index}")
+        merge_runs.append(time.perf_counter() - begin)
+        shutil.rmtree(os.path.join(tree, merged), ignore_errors=True)
+    results["tracker_merge_experiments"] = _timings(merge_runs, items=len(folders) * tasks)
+
+    # A fresh experiment the size of one synthetic experiment, recorded step by step
+    rng = random.Random(seed)
+    prepared = [synthetic_step(rng, index, screenshot_bytes) for index in range(steps)]
+    tracker.start_experiment([f"task_{index:05d}" for index in range(tasks)], "bench_tracker")
+    step_runs, finish_runs = [], []
+    for index in range(tasks):
+        task_id = f"task_{index:05d}"
+        tracker.reset(intent="synthetic task", task_id=task_id)
+        for step in prepared:
+            tracker.collect_prompt("user", "synthetic prompt")
+            begin = time.perf_counter()
+            tracker.collect_step(step.model_copy())
+            step_runs.append(time.perf_counter() - begin)
+        begin = time.perf_counter()
+        tracker.finish_task(task_id, site="shopping", intent="synthetic task", score=1.0, num_steps=steps)
+        finish_runs.append(time.perf_counter() - begin)
+    results["tracker_collect_step"] = _timings(step_runs, items=steps)
+    results["tracker_finish_task"] = _timings(finish_runs, items=tasks)
+    return results
+
+
+def compare_results(
+    current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], max_regression: float
+) -> List[Dict[str, Any]]:
+    """Median ratio of every benchmark present in both result sets, flagging regressions."""
+    comparison = []
+    for name, timing in current.items():
+        if name not in baseline or not baseline[name].get("median_ms"):
+            continue
+        ratio = timing["median_ms"] / baseline[name]["median_ms"]
+        comparison.append(
+            {
+                "benchmark": name,
+                "baseline_ms": baseline[name]["median_ms"],
+                "current_ms": timing["median_ms"],
+                "ratio": ratio,
+                "regression": ratio > 1 + max_regression,
+            }
+        )
+    return comparison
+
+
+@bench_app.command("suite")
+def suite(
+    experiments: int = typer.Option(5, "--experiments", help="Number of synthetic experiments"),
+    tasks: int = typer.Option(50, "--tasks", help="Tasks per experiment"),
+    steps: int = typer.Option(10, "--steps", help="Steps per task"),
+    screenshot_kb: int = typer.Option(0, "--screenshot-kb", help="Screenshot size per step in KiB"),
+    repeat: int = typer.Option(5, "--repeat", "-n", help="Runs per benchmark"),
+    seed: int = typer.Option(0, "--seed", help="Seed of the synthetic data"),
+    output: Path = typer.Option(None, "--output", "-o", help="Write the results to this JSON file"),
+    baseline: Path = typer.Option(
+        None, "--baseline", help="Results JSON of a previous release to compare against", exists=True
+    ),
+    max_regression: float = typer.Option(
+        0.2, "--max-regression", help="Allowed median slowdown against the baseline, 0.2 is 20%"
+    ),
+):
+    """Benchmark tracker and server hot paths on synthetic data, optionally against a baseline."""
+    with tempfile.TemporaryDirectory(prefix="cuga-viz-bench-") as work_dir:
+        results = run_suite(work_dir, experiments, tasks, steps, screenshot_kb * 1024, max(1, repeat), seed)
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "version": _package_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": {
+            "experiments": experiments,
+            "tasks_per_experiment": tasks,
+            "steps_per_task": steps,
+            "screenshot_bytes": screenshot_kb * 1024,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+    table = Table(title="Benchmark suite")
+    table.add_column("Benchmark")
+    table.add_column("Median (ms)", justify="right")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_column("Runs", justify="right")
+    for name, timing in results.items():
+        table.add_row(name, f"{timing['median_ms']:.2f}", f"{timing['p95_ms']:.2f}", str(timing["runs"]))
+    console.print(table)
+
+    regressions = []
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            comparison = compare_results(results, json.load(f)["results"], max_regression)
+        report["comparison"] = comparison
+        regressions = [entry for entry in comparison if entry["regression"]]
+        for entry in comparison:
+            color = "red" if entry["regression"] else "green"
+            console.print(
+                f"[{color}]{entry['benchmark']}: {entry['baseline_ms']:.2f} ms -> "
+                f"{entry['current_ms']:.2f} ms ({entry['ratio']:.2f}x)[/]"
+            )
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[bold blue]Results written to[/] {output}")
+
+    if regressions:
+        console.print(
+            f"[bold red]{len(regressions)} benchmark(s) regressed more than {max_regression:.0%}[/]"
+        )
+        raise typer.Exit(code=1)
+
+
+def _package_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("cugaviz")
+    except Exception:
+        return "unknown"
+
+
+async def _load_test_in_process(tree: str, state_db: str, **options) -> Dict[str, Any]:
+    import httpx
+
+    from dashboard import server
+    from dashboard.loadtest import run_load_test
+
+    app = server.create_app(server.parse_server_args(["--experiments_dir", tree, "--state_db", state_db]))
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            return await run_load_test(client, **options)
+
+
+async def _load_test_url(url: str, users: int, **options) -> Dict[str, Any]:
+    import httpx
+
+    from dashboard.loadtest import run_load_test
+
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        return await run_load_test(client, users=users, **options)
+
+
+@bench_app.command("load")
+def load(
+    users: int = typer.Option(20, "--users", "-u", help="Concurrent simulated dashboard users"),
+    duration: float = typer.Option(30, "--duration", "-d", help="Test duration in seconds"),
+    think_time: float = typer.Option(
+        1.0, "--think-time", help="Mean pause between a user's requests in seconds"
+    ),
+    ramp_up: float = typer.Option(0, "--ramp-up", help="Seconds over which users are started"),
+    url: str = typer.Option(None, "--url", help="Test a running server instead of a synthetic tree"),
+    real_server: bool = typer.Option(
+        False,
+        "--server",
+        help="Serve the synthetic tree with a real uvicorn process instead of in-process ASGI",
+    ),
+    workers: int = typer.Option(1, "--workers", "-w", help="Server worker processes, with --server"),
+    experiments: int = typer.Option(5, "--experiments", help="Number of synthetic experiments"),
+    tasks: int = typer.Option(50, "--tasks", help="Tasks per experiment"),
+    steps: int = typer.Option(10, "--steps", help="Steps per task"),
+    screenshot_kb: int = typer.Option(0, "--screenshot-kb", help="Screenshot size per step in KiB"),
+    seed: int = typer.Option(0, "--seed", help="Seed of the synthetic data and the users' choices"),
+    output: Path = typer.Option(None, "--output", "-o", help="Write the report to this JSON file"),
+    max_error_rate: float = typer.Option(
+        0.01, "--max-error-rate", help="Fail when more than this share of the requests fail"
+    ),
+):
+    """Replay concurrent dashboard sessions and report throughput, tail latency and errors per route."""
+    import asyncio
+
+    options = {"duration": duration, "think_time": think_time, "ramp_up": ramp_up, "seed": seed}
+    with tempfile.TemporaryDirectory(prefix="cuga-viz-load-") as work_dir:
+        target = url
+        if not url:
+            from dashboard.synthetic import generate_experiment_tree
+
+            tree = os.path.join(work_dir, "experiments")
+            os.makedirs(tree)
+            generate_experiment_tree(
+                tree,
+                experiments=experiments,
+                tasks_per_experiment=tasks,
+                steps_per_task=steps,
+                screenshot_bytes=screenshot_kb * 1024,
+                seed=seed,
+            )
+            target = "in-process ASGI app"
+        state_db = os.path.join(work_dir, "state.sqlite3")
+
+        console.print(
+            f"[bold blue]Load testing[/] {target if not real_server else 'uvicorn'} with {users} users"
+        )
+        if url:
+            report = asyncio.run(_load_test_url(url.rstrip("/"), users, **options))
+        elif real_server:
+            port = _free_port()
+            process = _launch_server(
+                ["--experiments_dir", tree, "--state_db", state_db, "--workers", str(workers)], port
+            )
+            try:
+                _wait_for_server(process, port)
+                report = asyncio.run(_load_test_url(f"http://127.0.0.1:{port}", users, **options))
+            finally:
+                _stop_server(process)
+        else:
+            report = asyncio.run(_load_test_in_process(tree, state_db, users=users, **options))
+
+    table = Table(title=f"Load test: {users} users, {report['duration_s']:.0f}s")
+    table.add_column("Route", overflow="fold")
+    table.add_column("Requests", justify="right")
+    table.add_column("RPS", justify="right")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_column("p99 (ms)", justify="right")
+    table.add_column("Errors", justify="right")
+    for route, summary in report["routes"].items():
+        table.add_row(
+            route,
+            str(summary["requests"]),
+            f"{summary['throughput_rps']:.1f}",
+            f"{summary['p50_ms']:.1f}",
+            f"{summary['p95_ms']:.1f}",
+            f"{summary['p99_ms']:.1f}",
+            f"{summary['errors']} ({summary['error_rate']:.1%})",
+        )
+    total = report["total"]
+    console.print(table)
+    console.print(
+        f"Total: {total['requests']} requests, {total['throughput_rps']:.1f} req/s, "
+        f"p99 {total['p99_ms'] or 0:.1f} ms, error rate {total['error_rate']:.2%}"
+    )
+
+    if output:
+        report["target"] = url or ("uvicorn" if real_server else "asgi")
+        report["scale"] = (
+            None
+            if url
+            else {"experiments": experiments, "tasks_per_experiment": tasks, "steps_per_task": steps}
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[bold blue]Report written to[/] {output}")
+
+    if total["error_rate"] > max_error_rate:
+        console.print(f"[bold red]Error rate {total['error_rate']:.2%} is over {max_error_rate:.2%}[/]")
+        raise typer.Exit(code=1)
@@ -0,0 +1,133 @@
+import os
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from loguru import logger
+
+# How much of each step the tracker writes, set per process (e.g. by the experiments server for evaluators)
+CAPTURE_LEVEL_ENV = "CUGA_VIZ_CAPTURE_LEVEL"
+CAPTURE_SAMPLE_EVERY_ENV = "CUGA_VIZ_CAPTURE_SAMPLE_EVERY"
+CAPTURE_ESCALATE_ENV = "CUGA_VIZ_CAPTURE_ESCALATE"
+CAPTURE_BUFFER_MB_ENV = "CUGA_VIZ_CAPTURE_BUFFER_MB"
+
+FULL = "full"
+NO_IMAGES = "no-images"
+# A screenshot every Nth step, plus on the first, the last and failed steps
+SAMPLED_IMAGES = "sampled-images"
+# The action log only: no screenshots, observations, prompts or step data
+SUMMARY_ONLY = "summary-only"
+CAPTURE_LEVELS = (FULL, NO_IMAGES, SAMPLED_IMAGES, SUMMARY_ONLY)
+
+SUMMARY_FIELDS = ("name", "plan", "current_url", "action_formatted", "action_type", "action_args")
+_IMAGE_FIELD = "image_before"
+
+
+def validate_capture_level(level: str) -> None:
+    """
+    Raises:
+        ValueError: If the level is not one of CAPTURE_LEVELS
+    """
+    if level not in CAPTURE_LEVELS:
+        raise ValueError(f"capture level must be one of {', '.join(CAPTURE_LEVELS)}")
+
+
+class CapturePolicy(NamedTuple):
+    level: str = FULL
+    sample_every: int = 10
+    # Rewrite tasks ending with score 0 or an exception with the full steps still in the buffer
+    escalate_on_failure: bool = True
+    buffer_bytes: int = 64 << 20
+
+    @classmethod
+    def from_env(cls) -> "CapturePolicy":
+        """The policy set through the CUGA_VIZ_CAPTURE_* variables, full capture when unset or invalid."""
+        default = cls()
+        level = os.environ.get(CAPTURE_LEVEL_ENV, "").strip().lower() or FULL
+        if level not in CAPTURE_LEVELS:
+            logger.warning(f"Unsupported {CAPTURE_LEVEL_ENV}={level}, capturing full trajectories")
+            level = FULL
+        try:
+            sample_every = max(1, int(os.environ.get(CAPTURE_SAMPLE_EVERY_ENV) or default.sample_every))
+            buffer_bytes = int(
+                float(os.environ.get(CAPTURE_BUFFER_MB_ENV) or default.buffer_bytes / (1 << 20)) * (1 << 20)
+            )
+        except ValueError:
+            logger.warning(
+                f"Invalid {CAPTURE_SAMPLE_EVERY_ENV} or {CAPTURE_BUFFER_MB_ENV}, using the defaults"
+            )
+            sample_every, buffer_bytes = default.sample_every, default.buffer_bytes
+        escalate = os.environ.get(CAPTURE_ESCALATE_ENV, "1").strip().lower() not in ("0", "false", "no")
+        return cls(level, sample_every, escalate, buffer_bytes)
+
+    def keeps_image(self, index: int, last: bool, failed: bool) -> bool:
+        """Whether the step at this index keeps its screenshot."""
+        if self.level == FULL:
+            return True
+        if self.level == SAMPLED_IMAGES:
+            return index % self.sample_every == 0 or last or failed
+        return False
+
+    def reduce(self, step: Any, keep_image: bool) -> Any:
+        """A copy of a step (a pydantic model) with the fields this level does not capture emptied."""
+        if self.level == SUMMARY_ONLY:
+            return step.model_copy(
+                update={
+                    field: [] if isinstance(getattr(step, field), list) else ""
+                    for field in type(step).model_fields
+                    if field not in SUMMARY_FIELDS
+                }
+            )
+        if not keep_image and getattr(step, _IMAGE_FIELD, None):
+            return step.model_copy(update={_IMAGE_FIELD: ""})
+        return step
+
+
+def step_bytes(step: Any) -> int:
+    """Approximate size of a step's text fields and prompts, for bounding the capture buffer."""
+    size = 0
+    for value in step.__dict__.values():
+        if isinstance(value, str):
+            size += len(value)
+        elif isinstance(value, list):
+            size += sum(len(getattr(prompt, "value", "") or "") for prompt in value)
+    return size
+
+
+class CaptureBuffer:
+    """
+    Full copies of the steps the tracker wrote reduced, for escalating a failed task to full capture.
+
+    Bounded by bytes: once full, the oldest steps are dropped and stay reduced on escalation.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._steps: "OrderedDict[int, Any]" = OrderedDict()
+        self._sizes: Dict[int, int] = {}
+        self.bytes = 0
+        self.dropped = 0
+
+    def add(self, index: int, step: Any) -> None:
+        size = step_bytes(step)
+        if size > self.max_bytes:
+            self.dropped += 1
+            return
+        self._steps[index] = step
+        self._sizes[index] = size
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            evicted, _ = self._steps.popitem(last=False)
+            self.bytes -= self._sizes.pop(evicted)
+            self.dropped += 1
+
+    def get(self, index: int) -> Optional[Any]:
+        return self._steps.get(index)
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def clear(self) -> None:
+        self._steps.clear()
+        self._sizes.clear()
+        self.bytes = 0
+        self.dropped = 0
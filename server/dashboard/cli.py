@@ -1,22 +1,28 @@
+import json
 import os
 import signal
-import subprocess
 import sys
 from pathlib import Path
 import threading
-from typing import Literal
+from typing import List, Literal, Optional
 import webbrowser
 import typer
 import time
 from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
 from loguru import logger
 
+from dashboard.bench import bench_app
+
 app = typer.Typer(
     name="cuga-viz",
     help="CugaViz CLI for server management. Use 'start' for trajectory logs or 'run' for experiment management.",
     add_completion=False,
 )
 
+app.add_typer(bench_app, name="bench")
+
 console = Console()
 
 
@@ -25,16 +31,6 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 
-def get_server_path():
-    """Find the server.py file from the package."""
-    try:
-        # Always use the dashboard.server module for reliability
-        return "dashboard.server"
-    except Exception as e:
-        console.print(f"[bold red]Error finding server path:[/] {e}")
-        return "dashboard.server"
-
-
 def _open_browser(type: Literal["dashboard", "experiments"] = "dashboard", delay: int = 2):
     """Opens the dashboard URL in a separate thread with delay."""
 
@@ -75,32 +71,14 @@ def start(
     signal.signal(signal.SIGINT, signal_handler)
 
     try:
-        server_path = get_server_path()
-
-        # Run the server using python
-        if server_path.endswith(".py"):
-            console.print(f"[bold blue]Running server from:[/] {server_path}")
-            _open_browser("dashboard")
-            subprocess.run(
-                [sys.executable, server_path, "--data_dir", logs_abs_path, "--port", str(port)],
-                check=True,
-            )
-        else:
-            # Run as module
-            console.print(f"[bold blue]Running server module:[/] {server_path}")
-            _open_browser("dashboard")
-            subprocess.run(
-                [sys.executable, "-m", server_path, "--data_dir", logs_abs_path, "--port", str(port)],
-                check=True,
-            )
-    except subprocess.CalledProcessError as e:
-        console.print(f"[bold red]Error starting server:[/] {e}")
-        sys.exit(1)
-    except FileNotFoundError as e:
-        console.print(f"[bold red]Error:[/] {e}")
-        sys.exit(1)
+        # The server module is only imported here, so CLI commands that do not serve start fast
+        from dashboard import server
+
+        console.print("[bold blue]Serving dashboard in-process[/]")
+        _open_browser("dashboard")
+        server.main(["--data_dir", logs_abs_path, "--port", str(port)])
     except Exception as e:
-        console.print(f"[bold red]Unexpected error:[/] {e}")
+        console.print(f"[bold red]Error starting server:[/] {e}")
         sys.exit(1)
 
 
@@ -116,6 +94,15 @@ def run(
     port: int = typer.Option(
         8988, "--port", "-p", help="Port to run the experiments server on (default 8988)"
     ),
+    max_concurrent_runs: int = typer.Option(
+        1, "--max-concurrent-runs", help="Maximum number of experiment runs executing at the same time"
+    ),
+    cpu_slots: int = typer.Option(
+        0, "--cpu-slots", help="CPU slots shared by experiment runs (0 uses the number of CPUs)"
+    ),
+    workers: int = typer.Option(
+        1, "--workers", "-w", help="Number of server worker processes sharing the run state"
+    ),
 ):
     """Start the experiments manager server with the specified experiments directory."""
     # Get absolute path of experiments directory
@@ -127,45 +114,229 @@ def run(
     # Register signal handler for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
 
+    scheduler_args = ["--max_concurrent_runs", str(max_concurrent_runs)]
+    if cpu_slots:
+        scheduler_args += ["--cpu_slots", str(cpu_slots)]
+    if workers > 1:
+        scheduler_args += ["--workers", str(workers)]
+
     try:
-        server_path = get_server_path()
-
-        # Run the server using python with experiments_dir parameter
-        if server_path.endswith(".py"):
-            console.print(f"[bold blue]Running experiments server from:[/] {server_path}")
-            _open_browser("experiments")
-            subprocess.run(
-                [sys.executable, server_path, "--experiments_dir", experiments_abs_path, "--port", str(port)],
-                check=True,
-            )
-
-        else:
-            # Run as module
-            console.print(f"[bold blue]Running experiments server module:[/] {server_path}")
-            _open_browser("experiments")
-            subprocess.run(
-                [
-                    sys.executable,
-                    "-m",
-                    server_path,
-                    "--experiments_dir",
-                    experiments_abs_path,
-                    "--port",
-                    str(port),
-                ],
-                check=True,
-            )
-
-    except subprocess.CalledProcessError as e:
+        from dashboard import server
+
+        console.print("[bold blue]Serving experiments manager in-process[/]")
+        _open_browser("experiments")
+        server.main(["--experiments_dir", experiments_abs_path, "--port", str(port), *scheduler_args])
+    except Exception as e:
         console.print(f"[bold red]Error starting experiments server:[/] {e}")
         sys.exit(1)
+
+
+@app.command("consistency")
+def consistency(
+    experiments_dir: Path = typer.Argument(
+        ...,
+        help="Directory containing experiment folders",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    experiment_names: List[str] = typer.Argument(..., help="Experiments that ran the same task set"),
+    k: List[int] = typer.Option([1, 3, 5], "--k", "-k", help="k of pass@k and pass^k, repeatable"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write the full report as JSON"),
+):
+    """Compute pass@k, pass^k, flip rate and per-site variance over repeated runs."""
+    from dashboard.analytics import analyze_experiments
+
+    try:
+        report = analyze_experiments([os.path.join(experiments_dir, name) for name in experiment_names], k)
     except FileNotFoundError as e:
-        console.print(f"[bold red]Error:[/] {e}")
+        console.print(f"[bold red]Results not found:[/] {e.filename}")
         sys.exit(1)
-    except Exception as e:
-        console.print(f"[bold red]Unexpected error:[/] {e}")
+
+    def number(value) -> str:
+        return "-" if value is None else f"{value:.3f}"
+
+    summary = report["summary"]
+    console.print(
+        f"[bold green]{summary['tasks']} tasks over {summary['runs']} runs,[/] "
+        f"{summary['flaky_tasks']} flaky, mean flip rate {number(summary['mean_flip_rate'])}"
+    )
+    table = Table("metric", *(f"k={value}" for value in report["k"]))
+    table.add_row("pass@k", *(number(summary[f"pass@{value}"]) for value in report["k"]))
+    table.add_row("pass^k", *(number(summary[f"pass^{value}"]) for value in report["k"]))
+    console.print(table)
+
+    sites = Table("site", "tasks", "runs", "mean pass rate", "std across runs", "mean flip rate")
+    for row in report["sites"]:
+        sites.add_row(
+            row["site"] or "-",
+            str(row["tasks"]),
+            str(row["runs"]),
+            number(row["mean_pass_rate"]),
+            number(row["pass_rate_std"]),
+            number(row["mean_flip_rate"]),
+        )
+    console.print(sites)
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        console.print(f"[bold blue]Report written to[/] {output}")
+
+
+@app.command("scan")
+def scan(
+    experiments_dir: Path = typer.Argument(
+        ...,
+        help="Directory containing experiment folders",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    pattern: str = typer.Argument(..., help="Python regular expression matched against step fields"),
+    experiment_names: Optional[List[str]] = typer.Option(
+        None, "--experiment", "-e", help="Experiment to scan, repeatable (default: all)"
+    ),
+    fields: Optional[List[str]] = typer.Option(
+        None, "--field", "-f", help="Step field to match, repeatable (default: all but screenshots)"
+    ),
+    ignore_case: bool = typer.Option(False, "--ignore-case", "-i", help="Match case-insensitively"),
+    limit: int = typer.Option(100, "--limit", "-n", help="Stop after this many hits"),
+    workers: int = typer.Option(0, "--workers", "-w", help="Worker processes (0 uses the number of CPUs)"),
+    as_json: bool = typer.Option(False, "--json", help="Print events as NDJSON"),
+):
+    """Scan trajectories with a regex in parallel, printing matches as they are found."""
+    from dashboard.regex_scan import RegexScan, scan_targets
+
+    names = experiment_names or sorted(
+        entry.name
+        for entry in os.scandir(experiments_dir)
+        if entry.is_dir() and not entry.name.startswith(".")
+    )
+    missing = [name for name in names if not (experiments_dir / name).is_dir()]
+    if missing:
+        console.print(f"[bold red]Experiments not found:[/] {', '.join(missing)}")
+        sys.exit(1)
+
+    targets = scan_targets({name: str(experiments_dir / name) for name in names})
+    try:
+        regex_scan = RegexScan(
+            targets, pattern, fields=fields, ignore_case=ignore_case, limit=limit, workers=workers or None
+        )
+    except ValueError as e:
+        console.print(f"[bold red]{e}[/]")
         sys.exit(1)
 
+    try:
+        for event in regex_scan:
+            if as_json:
+                print(json.dumps(event), flush=True)
+            elif event["type"] == "hit":
+                console.print(
+                    f"[cyan]{event['experiment']}/{event['task_id']}[/] step {event['step']} "
+                    f"[yellow]{event['field']}[/]: {escape(event['context'])}",
+                    highlight=False,
+                )
+            elif event["type"] == "done":
+                console.print(
+                    f"[bold green]{event['hits']} hit(s)[/] in {event['files_scanned']}/{event['files']} files, "
+                    f"{event['took_ms'] / 1000:.1f}s" + (" (limit reached)" if event["limit_reached"] else "")
+                )
+                for error in event["errors"]:
+                    console.print(f"[bold red]Error:[/] {error}")
+    except KeyboardInterrupt:
+        regex_scan.cancel()
+        console.print("[bold yellow]Scan cancelled[/]")
+
+
+@app.command("compact")
+def compact(
+    experiments_dir: Path = typer.Argument(
+        ...,
+        help="Directory containing experiment folders",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    experiment_names: Optional[List[str]] = typer.Option(
+        None, "--experiment", "-e", help="Experiment to compact, repeatable (default: all)"
+    ),
+    compression: Optional[str] = typer.Option(
+        None, "--compression", "-c", help="Compress trajectories with gzip or zstd (default: compact JSON)"
+    ),
+    keep_screenshots: bool = typer.Option(
+        False, "--keep-screenshots", help="Leave screenshots inline instead of extracting them"
+    ),
+    intern_prompts: bool = typer.Option(
+        False, "--intern-prompts", help="Store each distinct prompt once per experiment, referenced by hash"
+    ),
+    workers: int = typer.Option(0, "--workers", "-w", help="Worker processes (0 uses the number of CPUs)"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write the full report as JSON"),
+):
+    """Rewrite experiments compactly in place, extracting screenshots and generating sidecars."""
+    from dashboard.compaction import compact_experiments
+    from dashboard.trajectory_files import available_encodings
+
+    if compression is not None and compression not in available_encodings():
+        console.print(
+            f"[bold red]Unsupported compression:[/] {compression} (available: {', '.join(available_encodings())})"
+        )
+        sys.exit(1)
+    names = experiment_names or sorted(
+        entry.name
+        for entry in os.scandir(experiments_dir)
+        if entry.is_dir() and not entry.name.startswith(".")
+    )
+    missing = [name for name in names if not (experiments_dir / name).is_dir()]
+    if missing:
+        console.print(f"[bold red]Experiments not found:[/] {', '.join(missing)}")
+        sys.exit(1)
+
+    def megabytes(value: int) -> str:
+        return f"{value / (1 << 20):.1f} MB"
+
+    with console.status("Compacting trajectories...") as status:
+        report = compact_experiments(
+            {name: str(experiments_dir / name) for name in names},
+            encoding=compression,
+            screenshots=not keep_screenshots,
+            prompts=intern_prompts,
+            workers=workers or None,
+            progress=lambda done, total: status.update(f"Compacting trajectories... {done}/{total}"),
+        )
+
+    table = Table(
+        "experiment", "compacted", "unchanged", "skipped", "failed", "screenshots", "before", "after", "saved"
+    )
+    for name, row in report["experiments"].items():
+        table.add_row(
+            name,
+            str(row["compacted"]),
+            str(row["unchanged"]),
+            str(row["skipped"]),
+            str(row["failed"] + row["changed"]),
+            str(row["screenshots"]),
+            megabytes(row["bytes_before"] + row["pack_bytes_before"]),
+            megabytes(
+                row["bytes_after"] + row["screenshot_bytes"] + row["prompt_bytes"] + row["pack_bytes_after"]
+            ),
+            megabytes(row["bytes_saved"]),
+        )
+    console.print(table)
+    totals = report["totals"]
+    console.print(
+        f"[bold green]{megabytes(totals.get('bytes_saved', 0))} saved[/] over {len(names)} experiment(s) "
+        f"in {report['took_s']:.1f}s"
+    )
+    for name, row in report["experiments"].items():
+        for error in row["errors"]:
+            console.print(f"[bold red]{name}:[/] {escape(error)}")
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        console.print(f"[bold blue]Report written to[/] {output}")
+
 
 @app.command("examples")
 def examples():
@@ -0,0 +1,415 @@
+import base64
+import binascii
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from dashboard.prompt_store import PROMPTS_FILE, open_store
+from dashboard.trajectory_files import (
+    READ_ERRORS,
+    SCREENSHOT_DIR,
+    compress,
+    decompress_chunks,
+    file_chunks,
+    read_trajectory,
+    trajectory_name,
+    trajectory_task_id,
+)
+from dashboard.trajectory_pack import TrajectoryPack, has_pack
+
+# Content types of the screenshots extracted to SCREENSHOT_DIR
+SCREENSHOT_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+# One JSON line per compacted file of an experiment, so an interrupted run resumes where it stopped
+COMPACTION_LOG = ".compaction.log"
+_TMP_SUFFIX = ".compact.tmp"
+_HEX = set("0123456789abcdef")
+
+STATUSES = ("compacted", "unchanged", "skipped", "changed", "failed")
+
+
+def screenshot_path(experiment_dir: str, name: str) -> Optional[str]:
+    """Path of an extracted screenshot, None for names that are not one."""
+    digest, _, ext = name.partition(".")
+    if len(digest) != 64 or not set(digest) <= _HEX or ext not in SCREENSHOT_TYPES:
+        return None
+    return os.path.join(experiment_dir, SCREENSHOT_DIR, name)
+
+
+def _split_data_url(value: Any) -> Optional[Tuple[str, bytes]]:
+    """(extension, image bytes) of a base64 image data URL, None unless it re-encodes to the same string."""
+    if not isinstance(value, str) or not value.startswith("data:image/"):
+        return None
+    header, comma, data = value.partition(",")
+    ext = header[len("data:image/") :]
+    if not comma or not ext.endswith(";base64") or ext[: -len(";base64")] not in SCREENSHOT_TYPES:
+        return None
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    # Line breaks or unusual padding would not survive the round trip, such images stay inline
+    if base64.b64encode(raw).decode('ascii') != data:
+        return None
+    return ext[: -len(";base64")], raw
+
+
+def _store_screenshot(experiment_dir: str, ext: str, raw: bytes) -> Tuple[str, int]:
+    """Name of the stored screenshot and the bytes written for it, 0 when it was already there."""
+    name = f"{hashlib.sha256(raw).hexdigest()}.{ext}"
+    path = os.path.join(experiment_dir, SCREENSHOT_DIR, name)
+    if os.path.exists(path):
+        return name, 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}{_TMP_SUFFIX}"
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+    os.replace(tmp_path, path)
+    return name, len(raw)
+
+
+def _steps(trajectory: Any) -> List[Dict[str, Any]]:
+    steps = trajectory.get("steps") if isinstance(trajectory, dict) else None
+    return [step for step in steps if isinstance(step, dict)] if isinstance(steps, list) else []
+
+
+def extract_screenshots(trajectory: Any, experiment_dir: str) -> Tuple[int, int]:
+    """
+    Replace inline screenshots of a trajectory's steps with references to extracted files, in place.
+
+    Returns:
+        Tuple of the number of screenshots replaced and the bytes of newly stored ones
+    """
+    replaced = written = 0
+    for step in _steps(trajectory):
+        image = _split_data_url(step.get("image_before"))
+        if image is None:
+            continue
+        name, size = _store_screenshot(experiment_dir, *image)
+        step["image_before"] = f"{SCREENSHOT_DIR}/{name}"
+        replaced += 1
+        written += size
+    return replaced, written
+
+
+def inline_screenshots(trajectory: Any, experiment_dir: str) -> Any:
+    """Put extracted screenshots back into a trajectory's steps as data URLs, in place."""
+    for step in _steps(trajectory):
+        value = step.get("image_before")
+        if not isinstance(value, str) or not value.startswith(f"{SCREENSHOT_DIR}/"):
+            continue
+        name = value[len(SCREENSHOT_DIR) + 1 :]
+        path = screenshot_path(experiment_dir, name)
+        if path is None:
+            continue
+        with open(path, 'rb') as f:
+            data = base64.b64encode(f.read()).decode('ascii')
+        step["image_before"] = f"data:image/{name.partition('.')[2]};base64,{data}"
+    return trajectory
+
+
+def _expanded(trajectory: Any, experiment_dir: str) -> Any:
+    """A trajectory as the tracker first wrote it: screenshots inline and prompts expanded, in place."""
+    inline_screenshots(trajectory, experiment_dir)
+    prompt_store = open_store(experiment_dir)
+    for step in _steps(trajectory):
+        if "prompts" in step:
+            step["prompts"] = prompt_store.expand(step["prompts"])
+    return trajectory
+
+
+def compact_trajectory(
+    experiment_dir: str, file_name: str, encoding: Optional[str], screenshots: bool, prompts: bool = False
+) -> Dict[str, Any]:
+    """
+    Rewrite one trajectory as compact JSON, optionally compressed, without inline screenshots and
+    with its prompts interned into the experiment's prompt store.
+
+    The new file is written next to the old one and parsed back, with its screenshots put back
+    inline and prompts expanded, and only replaces the old file when it equals the original
+    trajectory. Runs in the worker processes of compact_experiments.
+
+    Returns:
+        Dict with the file's status, its name before and after, sizes, and screenshots extracted
+    """
+    path = os.path.join(experiment_dir, file_name)
+    result: Dict[str, Any] = {
+        "file": file_name,
+        "output": file_name,
+        "status": "unchanged",
+        "bytes_before": 0,
+        "bytes_after": 0,
+        "screenshots": 0,
+        "screenshot_bytes": 0,
+    }
+    tmp_path = None
+    try:
+        st = os.stat(path)
+        result["bytes_before"] = result["bytes_after"] = st.st_size
+        trajectory = read_trajectory(path)
+        if screenshots:
+            result["screenshots"], result["screenshot_bytes"] = extract_screenshots(
+                trajectory, experiment_dir
+            )
+        if prompts:
+            prompt_store = open_store(experiment_dir)
+            for step in _steps(trajectory):
+                if "prompts" in step:
+                    step["prompts"] = prompt_store.intern(step["prompts"])
+        compact = json.dumps(trajectory, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+        payload = compress(compact, encoding)
+        output = trajectory_name(trajectory_task_id(file_name), encoding)
+        if output == file_name and len(payload) == st.st_size:
+            with open(path, 'rb') as f:
+                if f.read() == payload:
+                    result.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                    return result
+
+        output_path = os.path.join(experiment_dir, output)
+        tmp_path = f"{output_path}.{os.getpid()}{_TMP_SUFFIX}"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        written = json.loads(b"".join(decompress_chunks(file_chunks(tmp_path), encoding)))
+        if _expanded(written, experiment_dir) != _expanded(read_trajectory(path), experiment_dir):
+            result.update(status="failed", error="round trip changed the trajectory")
+            return result
+        # The tracker may have rewritten the task meanwhile, its new version is left alone
+        current = os.stat(path)
+        if (current.st_mtime_ns, current.st_size) != (st.st_mtime_ns, st.st_size):
+            result["status"] = "changed"
+            return result
+        os.replace(tmp_path, output_path)
+        tmp_path = None
+        if output_path != path:
+            os.remove(path)
+        out = os.stat(output_path)
+        result.update(
+            status="compacted",
+            output=output,
+            bytes_after=out.st_size,
+            mtime_ns=out.st_mtime_ns,
+            size=out.st_size,
+        )
+    except READ_ERRORS as e:
+        result.update(status="failed", error=str(e))
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return result
+
+
+def finish_experiment(experiment_dir: str) -> Dict[str, Any]:
+    """
+    Compact an experiment's pack and bring its sidecars up to date: the typed columnar copy of
+    results.csv and the step table. Runs in the worker processes of compact_experiments.
+    """
+    from dashboard.results_store import load_results
+    from dashboard.step_table import StepTable
+
+    result: Dict[str, Any] = {
+        "pack_bytes_before": 0,
+        "pack_bytes_after": 0,
+        "results_rows": None,
+        "step_rows": 0,
+    }
+    errors = []
+    if has_pack(experiment_dir):
+        try:
+            result["pack_bytes_before"], result["pack_bytes_after"] = TrajectoryPack(experiment_dir).compact()
+        except (OSError, ValueError) as e:
+            errors.append(f"trajectories.pack: {e}")
+    csv_path = os.path.join(experiment_dir, "results.csv")
+    if os.path.isfile(csv_path):
+        try:
+            result["results_rows"] = len(load_results(csv_path))
+        except (OSError, ValueError) as e:
+            errors.append(f"results.csv: {e}")
+    try:
+        result["step_rows"] = StepTable(experiment_dir).refresh(force=True)["rows"]
+    except (OSError, ValueError) as e:
+        errors.append(f"step table: {e}")
+    result["errors"] = errors
+    return result
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _read_log(experiment_dir: str) -> Dict[str, List[Any]]:
+    done = {}
+    try:
+        with open(os.path.join(experiment_dir, COMPACTION_LOG), encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    done[record["file"]] = [
+                        record["mtime_ns"],
+                        record["size"],
+                        record["encoding"],
+                        record["screenshots"],
+                        record.get("prompts", False),
+                    ]
+                except (ValueError, KeyError, TypeError):
+                    continue  # A line cut short by an interrupted run
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _pending_files(
+    experiment_dir: str, encoding: Optional[str], screenshots: bool, prompts: bool
+) -> Tuple[List[str], int]:
+    """Trajectory files still to compact with these options, and the number already done."""
+    done = _read_log(experiment_dir)
+    pending, skipped = [], 0
+    with os.scandir(experiment_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(_TMP_SUFFIX):
+                # Left behind by an interrupted run
+                os.remove(entry.path)
+                continue
+            if trajectory_task_id(entry.name) is None or not entry.is_file():
+                continue
+            st = entry.stat()
+            if done.get(entry.name) == [st.st_mtime_ns, st.st_size, encoding, screenshots, prompts]:
+                skipped += 1
+            else:
+                pending.append(entry.name)
+    return sorted(pending), skipped
+
+
+def compact_experiments(
+    experiment_dirs: Dict[str, str],
+    encoding: Optional[str] = None,
+    screenshots: bool = True,
+    prompts: bool = False,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Rewrite experiments in place in a compact form, in parallel across worker processes.
+
+    Every trajectory is rewritten as compact JSON (compressed when an encoding is given) with
+    its screenshots extracted into the experiment's content-addressed screenshot folder and,
+    optionally, its prompts interned into the experiment's prompt store. Packs
+    are rewritten without replaced records, and the results and step table sidecars are
+    generated. Files compacted with the same options are recorded in each experiment's
+    compaction log and skipped by later runs, so an interrupted run picks up where it stopped
+    and running it again changes nothing.
+
+    Args:
+        experiment_dirs: Folder of each experiment by name
+        encoding: Trajectory compression, None for plain compact JSON
+        screenshots: Whether to extract inline screenshots
+        prompts: Whether to intern prompts
+        workers: Worker processes, the number of CPUs by default
+        progress: Called with the number of trajectories done and the total
+
+    Returns:
+        Dict with per-experiment and total counts of files by status and bytes before and after
+    """
+    start = time.perf_counter()
+    experiments: Dict[str, Dict[str, Any]] = {}
+    jobs: List[Tuple[str, str]] = []
+    for name, experiment_dir in experiment_dirs.items():
+        pending, skipped = _pending_files(experiment_dir, encoding, screenshots, prompts)
+        experiments[name] = {status: 0 for status in STATUSES}
+        experiments[name].update(
+            skipped=skipped,
+            bytes_before=0,
+            bytes_after=0,
+            screenshots=0,
+            screenshot_bytes=0,
+            prompt_bytes=_size(os.path.join(experiment_dir, PROMPTS_FILE)),
+            errors=[],
+        )
+        jobs.extend((name, file_name) for file_name in pending)
+
+    total = len(jobs)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=context) as pool:
+        futures = {
+            pool.submit(
+                compact_trajectory, experiment_dirs[name], file_name, encoding, screenshots, prompts
+            ): name
+            for name, file_name in jobs
+        }
+        logs = {
+            name: open(os.path.join(experiment_dirs[name], COMPACTION_LOG), 'a', encoding='utf-8')
+            for name in experiments
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                result = future.result()
+                report = experiments[name]
+                report[result["status"]] += 1
+                for key in ("bytes_before", "bytes_after", "screenshots", "screenshot_bytes"):
+                    report[key] += result[key]
+                if result["status"] in ("compacted", "unchanged"):
+                    record = {
+                        "file": result["output"],
+                        "mtime_ns": result["mtime_ns"],
+                        "size": result["size"],
+                        "encoding": encoding,
+                        "screenshots": screenshots,
+                        "prompts": prompts,
+                    }
+                    logs[name].write(json.dumps(record) + "\n")
+                    logs[name].flush()
+                elif result.get("error"):
+                    report["errors"].append(f"{result['file']}: {result['error']}")
+                    logger.warning(f"Not compacting {name}/{result['file']}: {result['error']}")
+                if progress:
+                    progress(done, total)
+        finally:
+            for log in logs.values():
+                log.close()
+
+        finished = {pool.submit(finish_experiment, experiment_dirs[name]): name for name in experiments}
+        for future in as_completed(finished):
+            result = future.result()
+            report = experiments[finished[future]]
+            report["errors"].extend(result.pop("errors"))
+            report.update(result)
+
+    totals: Dict[str, Any] = {}
+    for name, report in experiments.items():
+        # Growth of the prompt store, which started out holding the size it had before the run
+        report["prompt_bytes"] = (
+            _size(os.path.join(experiment_dirs[name], PROMPTS_FILE)) - report["prompt_bytes"]
+        )
+        report["bytes_saved"] = (
+            report["bytes_before"]
+            - report["bytes_after"]
+            - report["screenshot_bytes"]
+            - report["prompt_bytes"]
+            + report["pack_bytes_before"]
+            - report["pack_bytes_after"]
+        )
+        for key, value in report.items():
+            if isinstance(value, int) and key not in ("results_rows", "step_rows"):
+                totals[key] = totals.get(key, 0) + value
+    return {
+        "experiments": experiments,
+        "totals": totals,
+        "encoding": encoding,
+        "screenshots": screenshots,
+        "prompts": prompts,
+        "took_s": round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,384 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from dashboard.trajectory_files import READ_ERRORS, read_trajectory, trajectory_task_id
+
+STEP_APPENDED = "step-appended"
+TASK_FINISHED = "task-finished"
+EXPERIMENT_PROGRESS = "experiment-progress"
+RESET = "reset"
+
+
+class EventBus:
+    """
+    In-memory ring buffer of sequenced events.
+
+    Every event gets a monotonically increasing id which clients use as a cursor to resume
+    after a reconnect. Cursors older than the buffer are reported as expired so the client
+    knows to re-fetch the full state once.
+
+    Each server worker has its own bus, so event ids sent to clients carry the bus's epoch
+    ("{epoch}:{seq}"): a client reconnecting to another worker, or to a restarted one, presents
+    an id of an unknown epoch and is told to re-fetch instead of resuming from a foreign counter.
+    """
+
+    def __init__(self, max_events: int = 10000):
+        self.epoch = f"{os.getpid()}-{time.time_ns()}"
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def event_id(self, seq: int) -> str:
+        """The id sent to clients for a sequence number of this bus."""
+        return f"{self.epoch}:{seq}"
+
+    def parse_event_id(self, value: str) -> Optional[int]:
+        """The sequence number of an id this bus sent, None for ids of another epoch or malformed ones."""
+        epoch, _, seq = value.rpartition(":")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        return int(seq)
+
+    def publish(self, event_type: str, experiment: str, data: Dict[str, Any]) -> int:
+        """
+        Append an event to the buffer and wake up waiting subscribers.
+
+        Args:
+            event_type (str): One of the event type constants of this module
+            experiment (str): Experiment folder the event belongs to
+            data (Dict[str, Any]): JSON serializable payload
+
+        Returns:
+            int: The id assigned to the event
+        """
+        with self._lock:
+            self._seq += 1
+            self._events.append(
+                {
+                    "id": self._seq,
+                    "type": event_type,
+                    "experiment": experiment,
+                    "ts": time.time(),
+                    "data": data,
+                }
+            )
+            waiters, self._waiters = self._waiters, []
+            seq = self._seq
+
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed, the subscriber is gone
+                pass
+        return seq
+
+    def events_since(
+        self, cursor: int, experiment: Optional[str] = None, task_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        Get the events published after a cursor.
+
+        Args:
+            cursor (int): Id of the last event the client has seen
+            experiment (str, optional): Only return events of this experiment
+            task_id (str, optional): Only return task scoped events of this task
+
+        Returns:
+            Tuple of the matching events, the new cursor and whether the cursor had expired
+        """
+        with self._lock:
+            if cursor >= self._seq:
+                return [], self._seq, False
+            expired = bool(self._events) and cursor < self._events[0]["id"] - 1
+            candidates = [e for e in self._events if e["id"] > cursor]
+            new_cursor = self._seq
+
+        matching = []
+        for event in candidates:
+            if experiment and event["experiment"] != experiment:
+                continue
+            if task_id and event["data"].get("task_id") not in (None, task_id):
+                continue
+            matching.append(event)
+        return matching, new_cursor, expired
+
+    async def wait_for_events(self, cursor: int, timeout: float) -> bool:
+        """Wait until an event newer than the cursor is published. Returns False on timeout."""
+        loop = asyncio.get_running_loop()
+        waiter = asyncio.Event()
+        with self._lock:
+            if self._seq > cursor:
+                return True
+            self._waiters.append((loop, waiter))
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+
+
+class _ExperimentState:
+    def __init__(self):
+        self.progress_offset = 0
+        self.completed: set = set()
+        self.total_tasks = 0
+        self.metadata_mtime = 0
+        self.last_change = 0.0
+        # task_id -> (mtime_ns, size, step_count)
+        self.trajectories: Dict[str, Tuple[int, int, int]] = {}
+
+
+class ExperimentWatcher:
+    """
+    Turns tracker writes in an experiments directory into delta events.
+
+    The watcher polls cheap stat() calls: `.progress` is tailed from the last read offset to
+    emit task-finished and experiment-progress events, and trajectory files of experiments
+    that are running or explicitly watched are re-read only when their size or mtime change,
+    emitting just the newly appended steps.
+    """
+
+    def __init__(self, bus: EventBus, base_dir: str, interval: float = 1.0, hot_window: float = 600.0):
+        self.bus = bus
+        self.base_dir = base_dir
+        self.interval = interval
+        self.hot_window = hot_window
+        self._states: Dict[str, _ExperimentState] = {}
+        self._watched: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._baseline_done = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def experiment_count(self) -> int:
+        """Number of experiment folders found by the last scan."""
+        return len(self._states)
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            self._stopped.clear()
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="experiment-watcher", daemon=True)
+            self._thread.start()
+        logger.info(f"Experiment watcher started for {self.base_dir}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def poke(self, *_args) -> None:
+        """Request an immediate scan, e.g. right after the tracker wrote a file."""
+        self._wake.set()
+
+    def watch(self, experiment: str) -> None:
+        """Always follow trajectory changes of an experiment while a client is subscribed to it."""
+        with self._lock:
+            self._watched[experiment] = self._watched.get(experiment, 0) + 1
+
+    def unwatch(self, experiment: str) -> None:
+        with self._lock:
+            count = self._watched.get(experiment, 0) - 1
+            if count > 0:
+                self._watched[experiment] = count
+            else:
+                self._watched.pop(experiment, None)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                logger.error(f"Experiment watcher scan failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def scan(self) -> None:
+        """Scan all experiment folders once and publish events for what changed."""
+        if not os.path.isdir(self.base_dir):
+            return
+        seen = set()
+        with os.scandir(self.base_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    seen.add(entry.name)
+                    self._scan_experiment(entry.name, entry.path)
+        for name in set(self._states) - seen:
+            del self._states[name]
+        self._baseline_done = True
+
+    def _scan_experiment(self, name: str, path: str) -> None:
+        state = self._states.get(name)
+        # Experiments already present when the watcher starts only establish a baseline
+        is_baseline = state is None and not self._baseline_done
+        if state is None:
+            state = self._states[name] = _ExperimentState()
+
+        self._read_metadata(path, state)
+        new_task_ids = self._read_progress(path, state)
+
+        # New task files bump the folder mtime, finished tasks bump .progress
+        for marker in (path, os.path.join(path, ".progress")):
+            try:
+                state.last_change = max(state.last_change, os.stat(marker).st_mtime)
+            except OSError:
+                pass
+
+        with self._lock:
+            watched = name in self._watched
+        if watched or time.time() - state.last_change < self.hot_window:
+            self._scan_trajectories(name, path, state)
+
+        if new_task_ids and not is_baseline:
+            results = self._read_results(path)
+            for task_id in new_task_ids:
+                self.bus.publish(TASK_FINISHED, name, {"task_id": task_id, "result": results.get(task_id)})
+            self.bus.publish(
+                EXPERIMENT_PROGRESS,
+                name,
+                {"completed_tasks": len(state.completed), "total_tasks": state.total_tasks},
+            )
+
+    def _read_metadata(self, path: str, state: _ExperimentState) -> None:
+        metadata_path = os.path.join(path, "metadata.json")
+        try:
+            mtime = os.stat(metadata_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == state.metadata_mtime:
+            return
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                state.total_tasks = len(set(json.load(f).get('task_ids', [])))
+            state.metadata_mtime = mtime
+        except (json.JSONDecodeError, IOError):
+            pass
+
+    def _read_progress(self, path: str, state: _ExperimentState) -> List[str]:
+        progress_path = os.path.join(path, ".progress")
+        try:
+            size = os.stat(progress_path).st_size
+        except OSError:
+            return []
+        if size < state.progress_offset:
+            # The progress file was truncated (cleared or rerun), start over
+            state.progress_offset = 0
+            state.completed = set()
+        if size == state.progress_offset:
+            return []
+
+        with open(progress_path, 'rb') as f:
+            f.seek(state.progress_offset)
+            chunk = f.read(size - state.progress_offset)
+        # Only consume complete lines, a partial line is picked up on the next scan
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return []
+        state.progress_offset += end + 1
+
+        new_task_ids = []
+        for line in chunk[:end].decode('utf-8', errors='replace').splitlines():
+            task_id = line.strip()
+            if task_id and task_id not in state.completed:
+                state.completed.add(task_id)
+                new_task_ids.append(task_id)
+        return new_task_ids
+
+    @staticmethod
+    def _read_results(path: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(path, "results.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def _scan_trajectories(self, name: str, path: str, state: _ExperimentState) -> None:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                task_id = trajectory_task_id(entry.name)
+                if task_id is None:
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                known = state.trajectories.get(task_id)
+                if known and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+                    continue
+
+                steps = self._read_steps(entry.path)
+                if steps is None:
+                    # Partially written, retry on the next scan
+                    continue
+
+                if known is not None:
+                    previous = known[2]
+                elif st.st_mtime < self._started_at:
+                    # Existing file seen for the first time, only use it as a baseline
+                    previous = len(steps)
+                else:
+                    previous = 0
+
+                state.trajectories[task_id] = (st.st_mtime_ns, st.st_size, len(steps))
+                if len(steps) < previous:
+                    # Trajectory was restarted, resend from the beginning
+                    previous = 0
+                for index in range(previous, len(steps)):
+                    self.bus.publish(
+                        STEP_APPENDED,
+                        name,
+                        {"task_id": task_id, "step_index": index, "step": _strip_step(steps[index])},
+                    )
+                if len(steps) > previous:
+                    state.last_change = time.time()
+
+    @staticmethod
+    def _read_steps(file_path: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            data = read_trajectory(file_path)
+        except READ_ERRORS:
+            return None
+        steps = data.get("steps") if isinstance(data, dict) else None
+        return steps if isinstance(steps, list) else []
+
+
+def _strip_step(step: Any) -> Any:
+    """Drop the screenshot from a step event, clients fetch it with the trajectory when needed."""
+    if not isinstance(step, dict) or not step.get("image_before"):
+        return step
+    stripped = {k: v for k, v in step.items() if k != "image_before"}
+    stripped["has_image"] = True
+    return stripped
+
+
+def format_sse(event: Dict[str, Any], bus: EventBus) -> str:
+    """Format an event of a bus for a text/event-stream response."""
+    payload = json.dumps(
+        {"experiment": event["experiment"], "ts": event["ts"], **event["data"]}, ensure_ascii=False
+    )
+    return f"id: {bus.event_id(event['id'])}\nevent: {event['type']}\ndata: {payload}\n\n"
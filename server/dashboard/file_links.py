@@ -0,0 +1,59 @@
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+HARDLINK = "hardlink"
+REFLINK = "reflink"
+COPY = "copy"
+
+# ioctl request cloning a whole file on Linux filesystems with copy-on-write extents (btrfs, xfs)
+_FICLONE = 0x40049409
+
+
+def _reflink(source: str, target: str) -> bool:
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        return False
+    shutil.copystat(source, target)
+    return True
+
+
+def link_file(source: str, target: str) -> str:
+    """
+    Make `target` hold the content of `source` without copying data where possible.
+
+    Tries a hardlink, then a copy-on-write clone, then falls back to a regular copy. Hardlinked
+    files share their content, so writers must replace such files (write a temporary file and
+    rename it over the target) rather than rewrite them in place.
+
+    Args:
+        source (str): Existing file
+        target (str): Path to create, replaced if it exists
+
+    Returns:
+        str: How the file was placed: HARDLINK, REFLINK or COPY
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+        return HARDLINK
+    except OSError:
+        # Different filesystem, no hardlink support or link limit reached
+        pass
+    if _reflink(source, target):
+        return REFLINK
+    shutil.copy2(source, target)
+    return COPY
@@ -0,0 +1,199 @@
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+from loguru import logger
+
+# Relative weight of the actions a dashboard user takes between page loads
+SESSION_ACTIONS = {
+    "list_experiments": 2,
+    "open_experiment": 2,
+    "open_trajectory": 4,
+    "poll_stats": 3,
+    "poll_active_runs": 3,
+}
+
+
+class RouteStats:
+    """Latencies and failures of the requests to one route."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.status_codes: Dict[int, int] = defaultdict(int)
+
+    def record(self, latency: float, status: Optional[int]) -> None:
+        self.latencies.append(latency)
+        if status is None:
+            self.errors += 1
+            return
+        self.status_codes[status] += 1
+        if status >= 400:
+            self.errors += 1
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return ordered[min(count - 1, int(count * fraction))] * 1000
+
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "throughput_rps": count / duration if duration else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": ordered[-1] * 1000 if ordered else None,
+            "mean_ms": statistics.fmean(ordered) * 1000 if ordered else None,
+            "status_codes": {str(code): seen for code, seen in sorted(self.status_codes.items())},
+        }
+
+
+class DashboardSession:
+    """
+    One simulated dashboard user.
+
+    The user finds experiments and task IDs through the API like the frontend does: it lists
+    experiments, opens an experiment's table and stats, opens trajectories from the table and
+    keeps polling stats and active runs, pausing for a think time between requests.
+    """
+
+    def __init__(self, client, stats: Dict[str, RouteStats], rng: random.Random, think_time: float):
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.experiments: List[str] = []
+        self.experiment: Optional[str] = None
+        self.task_ids: List[str] = []
+
+    async def _get(self, route: str, url: str, **params) -> Optional[Any]:
+        start = time.perf_counter()
+        status = None
+        body = None
+        try:
+            response = await self.client.get(url, params=params or None)
+            status = response.status_code
+            if status < 400 and response.headers.get("content-type", "").startswith("application/json"):
+                body = response.json()
+        except Exception as e:
+            logger.debug(f"Request to {url} failed: {e}")
+        self.stats[route].record(time.perf_counter() - start, status)
+        return body
+
+    async def list_experiments(self) -> None:
+        body = await self._get("/api/experiments/logged", "/api/experiments/logged", page=1, per_page=15)
+        if body:
+            self.experiments = list(body.get("experiments", {}))
+
+    async def open_experiment(self) -> None:
+        if not self.experiments:
+            await self.list_experiments()
+            if not self.experiments:
+                return
+        self.experiment = self.rng.choice(self.experiments)
+        name = quote(self.experiment, safe="")
+        body = await self._get(
+            "/api/experiments/{experiment_name}/data_table", f"/api/experiments/{name}/data_table"
+        )
+        if body:
+            self.task_ids = [row["task_id"] for row in body.get("data", []) if "task_id" in row]
+        await self.poll_stats()
+
+    async def open_trajectory(self) -> None:
+        if not self.task_ids:
+            await self.open_experiment()
+            if not self.task_ids:
+                return
+        name = quote(self.experiment, safe="")
+        task_id = quote(str(self.rng.choice(self.task_ids)), safe="")
+        await self._get(
+            "/api/experiments/{experiment_name}/trajectories/{task_id}",
+            f"/api/experiments/{name}/trajectories/{task_id}",
+        )
+
+    async def poll_stats(self) -> None:
+        if not self.experiment:
+            return
+        name = quote(self.experiment, safe="")
+        await self._get("/api/experiments/{experiment_name}/stats", f"/api/experiments/{name}/stats")
+
+    async def poll_active_runs(self) -> None:
+        await self._get("/api/experiments/active", "/api/experiments/active")
+
+    async def run(self, deadline: float) -> None:
+        actions = list(SESSION_ACTIONS)
+        weights = [SESSION_ACTIONS[action] for action in actions]
+        await self.list_experiments()
+        while time.perf_counter() < deadline:
+            action = self.rng.choices(actions, weights)[0]
+            await getattr(self, action)()
+            if self.think_time:
+                # Exponential think times keep users from marching in lockstep
+                await asyncio.sleep(
+                    min(self.rng.expovariate(1 / self.think_time), deadline - time.perf_counter())
+                )
+
+
+async def run_load_test(
+    client,
+    users: int = 10,
+    duration: float = 30.0,
+    think_time: float = 1.0,
+    ramp_up: float = 0.0,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run concurrent dashboard sessions against a server.
+
+    Args:
+        client: httpx.AsyncClient pointed at the server, either over HTTP or an ASGI transport
+        users (int): Number of concurrent simulated users
+        duration (float): Seconds the test runs
+        think_time (float): Mean pause between a user's requests, in seconds
+        ramp_up (float): Seconds over which the users are started
+        seed (int): Seed of the users' choices
+
+    Returns:
+        Dict with the test settings, totals and a summary per route
+    """
+    stats: Dict[str, RouteStats] = defaultdict(RouteStats)
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def user(index: int) -> None:
+        if ramp_up and users > 1:
+            await asyncio.sleep(ramp_up * index / users)
+        session = DashboardSession(client, stats, random.Random(f"{seed}:{index}"), think_time)
+        await session.run(deadline)
+
+    await asyncio.gather(*(user(index) for index in range(users)))
+    elapsed = time.perf_counter() - start
+
+    routes = {route: route_stats.summary(elapsed) for route, route_stats in sorted(stats.items())}
+    total_requests = sum(summary["requests"] for summary in routes.values())
+    total_errors = sum(summary["errors"] for summary in routes.values())
+    all_latencies = sorted(latency for route_stats in stats.values() for latency in route_stats.latencies)
+    return {
+        "users": users,
+        "duration_s": elapsed,
+        "think_time_s": think_time,
+        "total": {
+            "requests": total_requests,
+            "errors": total_errors,
+            "error_rate": total_errors / total_requests if total_requests else 0.0,
+            "throughput_rps": total_requests / elapsed if elapsed else 0.0,
+            "p95_ms": all_latencies[int(len(all_latencies) * 0.95)] * 1000 if all_latencies else None,
+            "p99_ms": all_latencies[int(len(all_latencies) * 0.99)] * 1000 if all_latencies else None,
+        },
+        "routes": routes,
+    }
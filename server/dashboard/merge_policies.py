@@ -0,0 +1,115 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BEST_SCORE = "best_score"
+LATEST_RUN = "latest_run"
+MAJORITY_VOTE = "majority_vote"
+AGENT_VERSION = "agent_version"
+EXCLUDE_EXCEPTION = "exclude_exception"
+
+MERGE_POLICIES = {
+    BEST_SCORE: "Highest score, the first source in the given order on ties",
+    LATEST_RUN: "Result of the most recently created source that ran the task",
+    MAJORITY_VOTE: "A result agreeing with the pass/fail outcome of most sources (ties count as fail)",
+    AGENT_VERSION: "Best score among the results of one agent_v, tasks without such a result are left out",
+    EXCLUDE_EXCEPTION: "Best score among results without an exception, tasks that always failed are left out",
+}
+
+
+def validate_merge_policy(policy: str, agent_v: Optional[str] = None) -> None:
+    """
+    Check a policy name and its parameters.
+
+    Raises:
+        ValueError: If the policy is unknown or agent_version is used without an agent_v
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"policy must be one of {', '.join(MERGE_POLICIES)}")
+    if policy == AGENT_VERSION and not agent_v:
+        raise ValueError(f"policy {AGENT_VERSION} needs an agent_v")
+
+
+def results_frame(sources: List[Dict[str, Any]]) -> "pd.DataFrame":
+    """
+    Concatenate the results of all sources into one frame with the columns the policies use.
+
+    Args:
+        sources (List[Dict[str, Any]]): Per source, in merge order, its "name", "results" (the
+            results.json mapping) and "created_at" (sortable creation time)
+
+    Returns:
+        pd.DataFrame: One row per (source, task) with task_id, source_order (index into
+        sources), created_at, score, exception and agent_v columns
+    """
+    import pandas as pd
+
+    task_ids, orders, scores, exceptions, agent_versions = [], [], [], [], []
+    for order, source in enumerate(sources):
+        results = source["results"] or {}
+        task_ids.extend(results.keys())
+        orders.extend([order] * len(results))
+        for task in results.values():
+            scores.append(task.get("score"))
+            exceptions.append(task.get("exception"))
+            agent_versions.append(task.get("agent_v"))
+
+    frame = pd.DataFrame(
+        {
+            "task_id": task_ids,
+            "source_order": orders,
+            "score": pd.to_numeric(pd.Series(scores, dtype=object), errors="coerce").fillna(0.0),
+            "exception": pd.Series(exceptions, dtype=object).astype(str).str.lower() == "true",
+            "agent_v": pd.Series(agent_versions, dtype=object).astype(str),
+        }
+    )
+    created = [source.get("created_at") or "" for source in sources]
+    frame["created_at"] = frame["source_order"].map(dict(enumerate(created)))
+    return frame
+
+
+def _first_by(frame: "pd.DataFrame", columns: List[str], ascending: List[bool]) -> "pd.DataFrame":
+    ordered = frame.sort_values(columns, ascending=ascending, kind="stable")
+    return ordered.drop_duplicates("task_id", keep="first")
+
+
+def resolve_merge(
+    frame: "pd.DataFrame", policy: str = BEST_SCORE, agent_v: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Pick the source of every task according to a merge policy.
+
+    Each policy is a handful of column operations over the concatenated results, no per-task
+    Python code runs.
+
+    Args:
+        frame (pd.DataFrame): Results of all sources, see results_frame
+        policy (str): One of MERGE_POLICIES
+        agent_v (str, optional): Agent version kept by the agent_version policy
+
+    Returns:
+        Dict[str, int]: Task ID to the order of the source whose result is kept, in first-seen task order
+    """
+    validate_merge_policy(policy, agent_v)
+    if frame.empty:
+        return {}
+
+    if policy == LATEST_RUN:
+        winners = _first_by(frame, ["created_at", "source_order"], [False, False])
+    elif policy == MAJORITY_VOTE:
+        passed = frame["score"] >= 1.0
+        majority_passed = passed.groupby(frame["task_id"]).transform("mean") > 0.5
+        winners = _first_by(frame[passed == majority_passed], ["source_order"], [True])
+    else:
+        candidates = frame
+        if policy == AGENT_VERSION:
+            candidates = frame[frame["agent_v"] == str(agent_v)]
+        elif policy == EXCLUDE_EXCEPTION:
+            candidates = frame[~frame["exception"]]
+        winners = _first_by(candidates, ["score", "source_order"], [False, True])
+
+    # Keep the order tasks were first seen in, like the sequential merge did
+    first_seen = frame.drop_duplicates("task_id", keep="first").reset_index()[["task_id", "index"]]
+    winners = winners.merge(first_seen.rename(columns={"index": "seen"}), on="task_id").sort_values("seen")
+    return dict(zip(winners["task_id"], winners["source_order"].tolist()))
@@ -0,0 +1,312 @@
+import asyncio
+import bisect
+import math
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds, the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in values]
+
+
+class Gauge(_Metric):
+    """Gauge set directly or read from a callback when the metrics are rendered."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(float(self._function()))}"]
+            except Exception as e:
+                # A failing collector must not take the whole endpoint down
+                logger.debug(f"Metric {self.name} could not be collected: {e}")
+                return []
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in values]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per bucket counts with a final +Inf bucket, sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(counts), total[0]) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-local set of metrics rendered in the Prometheus text exposition format.
+
+    Each server worker keeps its own registry, so with several workers every scrape reports
+    the worker that answered it; the process ID gauge tells them apart.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, function))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+class HttpMetrics:
+    """Request metrics recorded by MetricsMiddleware and the event loop lag monitor."""
+
+    def __init__(self, registry: MetricsRegistry, prefix: str = "cuga_viz"):
+        self.requests = registry.counter(
+            f"{prefix}_http_requests_total",
+            "HTTP requests by route, method and status",
+            ("route", "method", "status"),
+        )
+        self.latency = registry.histogram(
+            f"{prefix}_http_request_duration_seconds", "HTTP request latency by route", ("route", "method")
+        )
+        self.response_bytes = registry.histogram(
+            f"{prefix}_http_response_size_bytes", "HTTP response body size by route", ("route",), SIZE_BUCKETS
+        )
+        self.in_flight = registry.gauge(f"{prefix}_http_requests_in_flight", "HTTP requests being served")
+        self.loop_lag = registry.histogram(
+            f"{prefix}_event_loop_lag_seconds",
+            "Delay of event loop callbacks past their due time",
+            (),
+            LAG_BUCKETS,
+        )
+        self.loop_lag_last = registry.gauge(
+            f"{prefix}_event_loop_lag_last_seconds", "Most recent event loop lag"
+        )
+        registry.gauge(
+            f"{prefix}_process_pid", "Process ID of the worker that served the scrape", function=os.getpid
+        )
+
+
+def route_label(scope) -> str:
+    """Route template of a handled request, so paths with parameters do not create a series each."""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    # Static mounts only leave their root path behind
+    if scope.get("root_path"):
+        return scope["root_path"] + "/{path}"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency, response size and in-flight requests.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware so streaming responses such as the
+    event stream are passed through untouched. It also writes the access log: every request is
+    sampled at `access_log_sample_rate`, while server errors and slow requests are always logged.
+    """
+
+    def __init__(
+        self,
+        app,
+        metrics: HttpMetrics,
+        access_log_sample_rate: float = 0.01,
+        slow_request_seconds: float = 1.0,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.access_log_sample_rate = access_log_sample_rate
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            self.metrics.in_flight.dec()
+            route = route_label(scope)
+            method = scope.get("method", "")
+            self.metrics.requests.inc(route=route, method=method, status=str(status))
+            self.metrics.latency.observe(duration, route=route, method=method)
+            self.metrics.response_bytes.observe(size, route=route)
+            if (
+                status >= 500
+                or duration >= self.slow_request_seconds
+                or random.random() < self.access_log_sample_rate
+            ):
+                logger.bind(
+                    access=True, method=method, path=scope.get("path", ""), route=route, status=status
+                ).info(f"{method} {scope.get('path', '')} {status} {size}B {duration * 1000:.1f}ms")
+
+
+async def monitor_event_loop_lag(metrics: HttpMetrics, interval: float = 0.5) -> None:
+    """Measure how late the event loop wakes up from a sleep, until the task is cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        due = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - due)
+        metrics.loop_lag.observe(lag)
+        metrics.loop_lag_last.set(lag)
@@ -0,0 +1,347 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter as CounterDict
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from starlette.routing import Match
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+PROFILE_MODES = (MODE_SAMPLE, MODE_CPROFILE)
+
+# Innermost frames in these files mean the thread is idle, not working on the request
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "base_events.py")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # No line numbers, so samples in different lines of one function merge into one frame
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _collapse(frame) -> Optional[str]:
+    """Render a thread's stack root first in the collapsed format, None when the thread is idle."""
+    if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+        return None
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """
+    Profiles the next `requests` requests handled by one route.
+
+    In sample mode a background thread records the stacks of the event loop thread and the
+    worker threads endpoints hand blocking work to, every `interval` seconds while a profiled
+    request is in flight. The result is in the collapsed-stack format flamegraph tools read.
+    In cprofile mode the event loop thread runs under cProfile instead; work done in worker
+    threads is not covered, and other requests interleaving on the loop are included.
+    """
+
+    def __init__(self, route: str, requests: int = 10, mode: str = MODE_SAMPLE, interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"mode must be one of {', '.join(PROFILE_MODES)}")
+        if requests < 1:
+            raise ValueError("requests must be at least 1")
+        self.session_id = uuid.uuid4().hex[:12]
+        self.route = route
+        self.requests = requests
+        self.mode = mode
+        self.interval = max(0.001, interval)
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.profiled = 0
+        self.total_seconds = 0.0
+        self._claimed = 0
+        self._in_flight = 0
+        self._stacks: CounterDict = CounterDict()
+        self._samples = 0
+        self._profile = cProfile.Profile() if mode == MODE_CPROFILE else None
+        self._loop_thread: Optional[int] = None
+        self._lock = threading.Lock()
+        self._sampling = threading.Event()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def claim(self) -> bool:
+        """Reserve one of the remaining request slots."""
+        with self._lock:
+            if self.done or self._claimed >= self.requests:
+                return False
+            self._claimed += 1
+            return True
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+            if self._in_flight > 1:
+                return
+            self._loop_thread = threading.get_ident()
+            if self._profile is not None:
+                self._profile.enable()
+            else:
+                if self._sampler is None:
+                    self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+                    self._sampler.start()
+                self._sampling.set()
+
+    def request_finished(self, duration: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.profiled += 1
+            self.total_seconds += duration
+            if self._in_flight == 0:
+                if self._profile is not None:
+                    self._profile.disable()
+                self._sampling.clear()
+            if self.profiled >= self.requests and self._in_flight == 0:
+                self._finish()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._profile is not None and self._in_flight:
+                self._profile.disable()
+            self._finish()
+
+    def _finish(self) -> None:
+        if self.finished_at is None:
+            self.finished_at = time.time()
+            self._stopped.set()
+            self._sampling.set()
+            logger.info(f"Profiling of {self.route} finished after {self.profiled} request(s)")
+
+    def _sample(self) -> None:
+        own_thread = threading.get_ident()
+        while not self._stopped.is_set():
+            self._sampling.wait()
+            if self._stopped.is_set():
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                name = names.get(thread_id, "")
+                if thread_id != self._loop_thread and not name.startswith(("asyncio_", "AnyIO worker")):
+                    continue
+                stack = _collapse(frame)
+                if stack is not None:
+                    with self._lock:
+                        self._stacks[stack] += 1
+            with self._lock:
+                self._samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """Sampled stacks, one `frame;frame;... count` line each."""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def cprofile_stats(self, limit: int = 50) -> str:
+        if self._profile is None:
+            return ""
+        with self._lock:
+            output = io.StringIO()
+            try:
+                pstats.Stats(self._profile, stream=output).sort_stats("cumulative").print_stats(limit)
+            except TypeError:
+                # Nothing was recorded yet
+                return ""
+        return output.getvalue()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            report = {
+                "session_id": self.session_id,
+                "route": self.route,
+                "mode": self.mode,
+                "status": "finished" if self.done else "profiling",
+                "requests": self.requests,
+                "profiled_requests": self.profiled,
+                "mean_request_ms": self.total_seconds / self.profiled * 1000 if self.profiled else None,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+            if self.mode == MODE_SAMPLE:
+                report["samples"] = self._samples
+                report["distinct_stacks"] = len(self._stacks)
+        return report
+
+    def output(self) -> str:
+        """Collapsed stacks in sample mode, the cProfile table in cprofile mode."""
+        return self.collapsed() if self.mode == MODE_SAMPLE else self.cprofile_stats()
+
+
+class RequestProfiler:
+    """Holds the current profile session; only one route is profiled at a time per worker."""
+
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+        self._lock = threading.Lock()
+
+    def start(self, session: ProfileSession) -> ProfileSession:
+        with self._lock:
+            if self.session is not None and not self.session.done:
+                raise RuntimeError(f"Route {self.session.route} is already being profiled")
+            self.session = session
+        logger.info(f"Profiling the next {session.requests} request(s) to {session.route} ({session.mode})")
+        return session
+
+    def cancel(self) -> Optional[ProfileSession]:
+        with self._lock:
+            session = self.session
+        if session is not None:
+            session.cancel()
+        return session
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware handing requests to the active profile session.
+
+    Without an active session a request costs one attribute check. The route of a request is
+    resolved against the router's templates, so `/api/experiments/{experiment_name}/stats`
+    profiles every experiment; a literal path matches as well.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, routes: List[Any]):
+        self.app = app
+        self.profiler = profiler
+        self.routes = routes
+
+    def _route_of(self, scope) -> Optional[str]:
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", None)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        session = self.profiler.session
+        if scope["type"] != "http" or session is None or session.done:
+            await self.app(scope, receive, send)
+            return
+        if session.route not in (scope.get("path"), self._route_of(scope)) or not session.claim():
+            await self.app(scope, receive, send)
+            return
+
+        session.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.request_finished(time.perf_counter() - start)
+
+
+class MemoryProfiler:
+    """
+    tracemalloc snapshots and diffs for tracking memory growth.
+
+    Tracing starts with the first snapshot, as it slows down every allocation, and runs
+    until stopped. The most recent snapshots are kept for diffing.
+    """
+
+    def __init__(self, frames: int = 10, keep: int = 5):
+        self.frames = frames
+        self.keep = keep
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot(self, limit: int = 25) -> Dict[str, Any]:
+        """
+        Take a snapshot, starting tracemalloc if needed.
+
+        Args:
+            limit (int): Number of top allocation sites to return
+
+        Returns:
+            Dict with the snapshot ID, traced memory and the largest allocation sites
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info("Started tracemalloc")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._snapshots[snapshot_id] = {"snapshot": snapshot, "taken_at": time.time()}
+            while len(self._snapshots) > self.keep:
+                self._snapshots.pop(next(iter(self._snapshots)))
+        return {
+            "snapshot_id": snapshot_id,
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "top": [
+                {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ],
+        }
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"snapshot_id": key, "taken_at": value["taken_at"]} for key, value in self._snapshots.items()
+            ]
+
+    def diff(self, base_id: str, target_id: Optional[str] = None, limit: int = 25) -> Dict[str, Any]:
+        """
+        Compare two snapshots, or a snapshot with the current state.
+
+        Raises:
+            KeyError: If a snapshot ID is unknown
+        """
+        with self._lock:
+            base = self._snapshots[base_id]["snapshot"]
+        if target_id:
+            with self._lock:
+                target = self._snapshots[target_id]["snapshot"]
+        else:
+            target_id = self.snapshot(limit=0)["snapshot_id"]
+            with self._lock:
+                target = self._snapshots[target_id]["snapshot"]
+        stats = target.compare_to(base, "lineno")
+        return {
+            "base": base_id,
+            "target": target_id,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def stop(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("Stopped tracemalloc")
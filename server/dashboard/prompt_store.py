@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows, where a single process writes an experiment
+    fcntl = None
+
+# Set to 1 to store each distinct prompt once per experiment and reference it from steps by hash
+INTERN_PROMPTS_ENV = "CUGA_VIZ_INTERN_PROMPTS"
+PROMPTS_FILE = "prompts.jsonl"
+# Key of the body's hash in a step's prompt, in place of "value"
+REF_KEY = "ref"
+
+
+def interning_enabled() -> bool:
+    return os.environ.get(INTERN_PROMPTS_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=4096)
+def prompt_hash(value: str) -> str:
+    # Cached: the tracker re-interns every step's prompts each time it rewrites the trajectory
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def is_interned(prompts: Any) -> bool:
+    return isinstance(prompts, list) and any(
+        isinstance(prompt, dict) and REF_KEY in prompt for prompt in prompts
+    )
+
+
+def parse_prompt_lines(data: bytes) -> Dict[str, str]:
+    """Prompt bodies by hash from the lines of a prompts.jsonl, skipping malformed lines."""
+    bodies = {}
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+            bodies[record["hash"]] = record["value"]
+        except (ValueError, KeyError, TypeError):
+            continue
+    return bodies
+
+
+def expand_prompts(prompts: Any, bodies: Dict[str, str]) -> Any:
+    """A step's prompts with references replaced by their bodies; prompts stored inline pass through."""
+    if not isinstance(prompts, list):
+        return prompts
+    return [
+        {"role": prompt.get("role"), "value": bodies.get(prompt[REF_KEY])}
+        if isinstance(prompt, dict) and REF_KEY in prompt
+        else prompt
+        for prompt in prompts
+    ]
+
+
+class PromptStore:
+    """
+    Prompt bodies of one experiment, each stored once under its SHA-256.
+
+    prompts.jsonl is append-only with one {"hash", "value"} line per distinct body. Shard
+    processes of one experiment append under a file lock; a body appended twice by racing
+    writers is harmless. Steps keep {"role", "ref"} in place of {"role", "value"}.
+
+    The store keeps the bodies in memory and only parses the lines appended since it last looked.
+    """
+
+    def __init__(self, experiment_dir: str):
+        self.experiment_dir = experiment_dir
+        self.path = os.path.join(experiment_dir, PROMPTS_FILE)
+        self._bodies: Dict[str, str] = {}
+        self._read = 0  # Bytes of the file already parsed
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            self._bodies, self._read = {}, 0
+            return
+        if size < self._read:
+            # Replaced, e.g. by extracting an older copy of the experiment
+            self._bodies, self._read = {}, 0
+        if size == self._read:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._read)
+            chunk = f.read(size - self._read)
+        # Only consume complete lines, a partial line is picked up on the next read
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return
+        self._read += end + 1
+        self._bodies.update(parse_prompt_lines(chunk[:end]))
+
+    def bodies(self) -> Dict[str, str]:
+        """Every stored body by hash."""
+        with self._lock:
+            self._refresh()
+            return dict(self._bodies)
+
+    def get(self, ref: str) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            return self._bodies.get(ref)
+
+    def expand(self, prompts: Any) -> Any:
+        """A step's prompts with references replaced by their stored bodies."""
+        with self._lock:
+            self._refresh()
+            return expand_prompts(prompts, self._bodies)
+
+    def _append(self, bodies: Dict[str, str]) -> None:
+        lines = "".join(
+            json.dumps({"hash": ref, "value": value}, ensure_ascii=False) + "\n"
+            for ref, value in bodies.items()
+        )
+        with open(self.path, 'a', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(lines)
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def intern(self, prompts: Any) -> Any:
+        """
+        Store the bodies of a step's prompts that are new to the experiment and return the step's
+        prompts as references. Prompts that are already references, or have no string body, are
+        kept as they are.
+        """
+        if not isinstance(prompts, list):
+            return prompts
+        interned: List[Any] = []
+        new: Dict[str, str] = {}
+        with self._lock:
+            self._refresh()
+            for prompt in prompts:
+                value = prompt.get("value") if isinstance(prompt, dict) else None
+                if not isinstance(value, str):
+                    interned.append(prompt)
+                    continue
+                ref = prompt_hash(value)
+                if ref not in self._bodies and ref not in new:
+                    new[ref] = value
+                interned.append({"role": prompt.get("role"), REF_KEY: ref})
+            if new:
+                self._append(new)
+                # Picked up again by the next refresh, which is harmless
+                self._bodies.update(new)
+        return interned
+
+    def merge(self, other: "PromptStore") -> int:
+        """Add the bodies of another experiment's store, returning how many were new."""
+        bodies = other.bodies()
+        with self._lock:
+            self._refresh()
+            new = {ref: value for ref, value in bodies.items() if ref not in self._bodies}
+            if new:
+                self._append(new)
+                self._bodies.update(new)
+        return len(new)
+
+
+_stores: Dict[str, PromptStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(experiment_dir: str) -> PromptStore:
+    """The shared prompt store of an experiment folder in this process."""
+    path = os.path.realpath(experiment_dir)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = PromptStore(path)
+        return store
@@ -0,0 +1,358 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from dashboard.prompt_store import is_interned, open_store
+from dashboard.trajectory_files import READ_ERRORS, open_trajectory
+from dashboard.trajectory_pack import TrajectoryPack, trajectory_chunks, trajectory_versions
+
+# Step fields skipped unless named explicitly, screenshots are large and never what a regex is after
+SKIPPED_FIELDS = {"image_before"}
+CONTEXT_CHARS = 80
+# Events buffered for a slow reader before the scan stops taking hits from the workers
+MAX_BUFFERED_EVENTS = 1000
+
+# JSON bytes that change nesting or string state; everything else is skipped in bulk
+_STRUCTURAL = re.compile(rb'[\\"{}\[\]]')
+_BACKSLASH, _QUOTE = ord("\\"), ord('"')
+_OPENERS, _CLOSERS = b"{[", b"}]"
+
+
+def iter_steps(path: str, chunk_size: int = 1 << 20) -> Iterator[Tuple[int, bytes]]:
+    """
+    Stream the elements of a trajectory file's top-level "steps" array without loading the file.
+
+    Compressed trajectories are decompressed as they are read, see iter_chunk_steps.
+    """
+    with open_trajectory(path) as f:
+        yield from iter_chunk_steps(iter(lambda: f.read(chunk_size), b""))
+
+
+def iter_chunk_steps(chunks: Iterable[bytes]) -> Iterator[Tuple[int, bytes]]:
+    """
+    Stream the elements of the top-level "steps" array of a trajectory's JSON bytes.
+
+    Only the step being read is buffered, so memory stays at about one step plus one chunk
+    however large the trajectory is. Steps are yielded as raw JSON bytes with their index;
+    other keys of the trajectory are skipped.
+    """
+    depth = 0
+    in_string = False
+    skip = -1  # Position of the character escaped by a backslash
+    string_start: Optional[int] = None
+    last_string = b""
+    in_steps = False
+    step_start: Optional[int] = None
+    index = 0
+    buf = bytearray()
+    buf_start = 0  # Stream offset of buf[0]
+    for chunk in chunks:
+        scanned = buf_start + len(buf)
+        buf += chunk
+        for match in _STRUCTURAL.finditer(buf, scanned - buf_start):
+            pos = buf_start + match.start()
+            if pos == skip:
+                continue
+            char = buf[match.start()]
+            if in_string:
+                if char == _BACKSLASH:
+                    skip = pos + 1
+                elif char == _QUOTE:
+                    in_string = False
+                    if string_start is not None:
+                        # Keys of the top-level object, the one before "[" names the array
+                        last_string = bytes(buf[string_start - buf_start : match.start()])
+                        string_start = None
+                continue
+            if char == _QUOTE:
+                in_string = True
+                string_start = pos + 1 if depth == 1 else None
+            elif char in _OPENERS:
+                depth += 1
+                if depth == 2 and char == ord("[") and last_string == b"steps":
+                    in_steps = True
+                elif depth == 3 and in_steps and char == ord("{"):
+                    step_start = pos
+            elif char in _CLOSERS:
+                if depth == 3 and step_start is not None:
+                    yield index, bytes(buf[step_start - buf_start : match.start() + 1])
+                    index += 1
+                    step_start = None
+                elif depth == 2 and in_steps:
+                    in_steps = False
+                depth -= 1
+
+        # Keep the step being read and a key being read, drop everything else
+        end = buf_start + len(buf)
+        if string_start is not None and end - string_start > 1024:
+            # Long top-level strings are values, not the key of the steps array
+            string_start = None
+        keep = min(p for p in (step_start, string_start, end) if p is not None)
+        del buf[: keep - buf_start]
+        buf_start = keep
+
+
+# Set in every worker process by _init_worker
+_messages = None
+_stop = None
+# Packs of the experiments a worker scanned, so each worker parses a pack's index once
+_packs: Dict[str, TrajectoryPack] = {}
+
+
+def _init_worker(messages, stop) -> None:
+    global _messages, _stop
+    _messages, _stop = messages, stop
+    # A cancelled scan stops reading; exiting workers must not wait for their queue to drain
+    messages.cancel_join_thread()
+
+
+def _emit(message: Dict[str, Any]) -> bool:
+    while not _stop.is_set():
+        try:
+            _messages.put(message, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _field_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _scan_file(
+    experiment: str,
+    experiment_dir: str,
+    task_id: str,
+    pattern: str,
+    flags: int,
+    fields: Optional[List[str]],
+    limit: int,
+) -> int:
+    """Scan one trajectory in a worker, emitting hits as found and a file message at the end."""
+    regex = re.compile(pattern, flags)
+    found = 0
+    error = None
+    try:
+        pack = _packs.get(experiment_dir)
+        if pack is None:
+            pack = _packs[experiment_dir] = TrajectoryPack(experiment_dir)
+        chunks = trajectory_chunks(experiment_dir, task_id, pack)
+        if chunks is None:
+            raise FileNotFoundError(f"Trajectory {task_id} of {experiment} is gone")
+        for index, raw in iter_chunk_steps(chunks):
+            if _stop.is_set() or found >= limit:
+                break
+            try:
+                step = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(step, dict):
+                continue
+            if is_interned(step.get("prompts")):
+                # Match the prompt bodies, not their hashes
+                step["prompts"] = open_store(experiment_dir).expand(step["prompts"])
+            for field, value in step.items():
+                if (field not in fields) if fields else (field in SKIPPED_FIELDS):
+                    continue
+                text = _field_text(value)
+                if not text:
+                    continue
+                for match in regex.finditer(text):
+                    hit = {
+                        "type": "hit",
+                        "experiment": experiment,
+                        "task_id": task_id,
+                        "step": index,
+                        "field": field,
+                        "match": match.group(0)[: CONTEXT_CHARS * 2],
+                        "start": match.start(),
+                        "context": text[max(0, match.start() - CONTEXT_CHARS) : match.end() + CONTEXT_CHARS],
+                    }
+                    if not _emit(hit):
+                        return found
+                    found += 1
+                    if found >= limit:
+                        break
+    except READ_ERRORS as e:
+        error = str(e)
+    _emit({"type": "file", "experiment": experiment, "task_id": task_id, "hits": found, "error": error})
+    return found
+
+
+def scan_targets(experiment_dirs: Dict[str, str]) -> List[Tuple[str, str, str]]:
+    """(experiment, experiment folder, task ID) of every trajectory in the given folders, files or packed."""
+    targets = []
+    for experiment, experiment_dir in experiment_dirs.items():
+        versions = trajectory_versions(experiment_dir, TrajectoryPack(experiment_dir))
+        targets.extend((experiment, experiment_dir, task_id) for task_id in versions)
+    return targets
+
+
+class RegexScan:
+    """
+    Brute-force regex scan over trajectories, loose or packed, fanned out over a process pool.
+
+    Every trajectory is one pool task; workers stream each step with iter_chunk_steps, match
+    the regex against the step's fields and send hits back as they find them. The scan runs in
+    a background thread and publishes events to `events`: one "started", "hit" events, a
+    "progress" event at most every half second and a final "done". The scan stops at
+    `limit` hits or when cancelled; both stop the workers within a step.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[Tuple[str, str, str]],
+        pattern: str,
+        fields: Optional[List[str]] = None,
+        ignore_case: bool = False,
+        limit: int = 100,
+        workers: Optional[int] = None,
+    ):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.flags = re.IGNORECASE if ignore_case else 0
+        try:
+            re.compile(pattern, self.flags)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern: {e}")
+        self.scan_id = uuid.uuid4().hex[:12]
+        self.targets = list(targets)
+        self.pattern = pattern
+        self.fields = list(fields) if fields else None
+        self.limit = limit
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(self.targets) or 1))
+        self.events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> "RegexScan":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"regex-scan-{self.scan_id}", daemon=True)
+            self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self.start()
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            yield event
+
+    async def ndjson(self) -> AsyncIterator[str]:
+        """Events as NDJSON lines for a streaming response; the scan is cancelled if the client goes away."""
+        self.start()
+        try:
+            while True:
+                try:
+                    event = await asyncio.to_thread(self.events.get, True, 0.5)
+                except queue.Empty:
+                    continue
+                if event is None:
+                    return
+                yield json.dumps(event) + "\n"
+        finally:
+            self.cancel()
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        hits = files_done = 0
+        errors: List[str] = []
+        crashed: List[str] = []
+        self.events.put({"type": "started", "scan_id": self.scan_id, "files": len(self.targets)})
+        # Spawned workers, forking a server with running threads is not safe
+        context = multiprocessing.get_context("spawn")
+        messages = context.Queue(maxsize=1024)
+        stop = context.Event()
+        try:
+            if self.targets:
+                with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(messages, stop),
+                ) as pool:
+                    futures = [
+                        pool.submit(
+                            _scan_file,
+                            experiment,
+                            experiment_dir,
+                            task_id,
+                            self.pattern,
+                            self.flags,
+                            self.fields,
+                            self.limit,
+                        )
+                        for experiment, experiment_dir, task_id in self.targets
+                    ]
+                    last_progress = time.monotonic()
+                    while (
+                        files_done + len(crashed) < len(futures) and hits < self.limit and not self.cancelled
+                    ):
+                        if self.events.qsize() > MAX_BUFFERED_EVENTS:
+                            time.sleep(0.05)
+                            continue
+                        try:
+                            message = messages.get(timeout=0.2)
+                        except queue.Empty:
+                            # Files whose worker died never send their file message
+                            crashed = [str(f.exception()) for f in futures if f.done() and f.exception()]
+                            continue
+                        if message["type"] == "hit":
+                            hits += 1
+                            self.events.put(message)
+                        else:
+                            files_done += 1
+                            if message["error"]:
+                                errors.append(message["error"])
+                        if time.monotonic() - last_progress > 0.5:
+                            last_progress = time.monotonic()
+                            self.events.put(
+                                {
+                                    "type": "progress",
+                                    "files_done": files_done,
+                                    "files": len(futures),
+                                    "hits": hits,
+                                }
+                            )
+                    stop.set()
+                    pool.shutdown(wait=True, cancel_futures=True)
+        except Exception as e:
+            logger.error(f"Regex scan {self.scan_id} failed: {e}")
+            errors.append(str(e))
+        finally:
+            stop.set()
+            self.events.put(
+                {
+                    "type": "done",
+                    "scan_id": self.scan_id,
+                    "hits": hits,
+                    "files_scanned": files_done,
+                    "files": len(self.targets),
+                    "limit_reached": hits >= self.limit,
+                    "cancelled": self.cancelled,
+                    "errors": (errors + crashed)[:20],
+                    "took_ms": (time.perf_counter() - start) * 1000,
+                }
+            )
+            self.events.put(None)
@@ -0,0 +1,265 @@
+import json
+import mmap
+import os
+import threading
+import zipfile
+from typing import TYPE_CHECKING, Any, Callable, Dict, Tuple
+
+import numpy as np
+from loguru import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Typed copies of results.csv, Feather when pyarrow is installed and a NumPy archive otherwise
+ARROW_FILE = ".results_columns.feather"
+NUMPY_FILE = ".results_columns.npz"
+
+# Columns written by the tracker with a fixed type, everything else is free text
+FLOAT_COLUMNS = ("score",)
+INTEGER_COLUMNS = ("num_steps",)
+BOOLEAN_COLUMNS = ("exception",)
+_TRUE = {"true", "1", "yes"}
+_FALSE = {"false", "0", "no"}
+
+
+def _has_arrow() -> bool:
+    try:
+        import pyarrow.feather  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def _to_boolean(values: "pd.Series") -> "pd.Series":
+    import pandas as pd
+
+    text = values.astype("str").str.strip().str.lower()
+    result = pd.Series(pd.NA, index=values.index, dtype="boolean")
+    result[text.isin(_TRUE)] = True
+    result[text.isin(_FALSE)] = False
+    return result
+
+
+def typed_results(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Give a results frame the same dtypes however it was read.
+
+    Scores are floats, step counts nullable integers, the exception flag a nullable boolean
+    and every other column text, so a task id like "123" stays a string and a column that
+    happens to be empty does not turn into floats.
+    """
+    import pandas as pd
+
+    df = df.copy()
+    for column in df.columns:
+        if column in FLOAT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype("float64")
+        elif column in INTEGER_COLUMNS:
+            numbers = pd.to_numeric(df[column], errors='coerce')
+            whole = numbers.isna() | (numbers == numbers.round())
+            df[column] = numbers.astype("Int64") if whole.all() else numbers.astype("float64")
+        elif column in BOOLEAN_COLUMNS:
+            df[column] = df[column] if df[column].dtype == "boolean" else _to_boolean(df[column])
+        elif not pd.api.types.is_string_dtype(df[column]) or df[column].dtype == object:
+            df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value)).astype("str")
+    return df
+
+
+def read_results_csv(csv_path: str) -> "pd.DataFrame":
+    """Parse a results.csv into a typed frame, see typed_results."""
+    import pandas as pd
+
+    return typed_results(pd.read_csv(csv_path, dtype=str, keep_default_na=True))
+
+
+def _source_stamp(csv_path: str) -> Dict[str, int]:
+    stat = os.stat(csv_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _encode_strings(values: "pd.Series") -> Dict[str, np.ndarray]:
+    """Codes into a table of the distinct strings, the table stored as one UTF-8 blob plus offsets."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    encoded = [str(value).encode('utf-8') for value in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {
+        "codes": codes.astype(np.int32),
+        "offsets": offsets,
+        "data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+
+def _decode_strings(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    data = arrays["data"].tobytes()
+    offsets = arrays["offsets"].tolist()
+    # The table gets one trailing NaN so missing values (code -1) index it directly
+    table = np.empty(len(offsets), dtype=object)
+    table[:-1] = [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+    table[-1] = np.nan
+    return table[arrays["codes"]]
+
+
+def _write_numpy(df: "pd.DataFrame", path: str, stamp: Dict[str, int]) -> None:
+    import pandas as pd
+
+    arrays: Dict[str, np.ndarray] = {}
+    columns = []
+    for index, column in enumerate(df.columns):
+        series = df[column]
+        prefix = f"c{index}"
+        if series.dtype in ("boolean", "Int64"):
+            kind = "boolean" if series.dtype == "boolean" else "Int64"
+            arrays[f"{prefix}_mask"] = series.isna().to_numpy()
+            fill = False if kind == "boolean" else 0
+            numpy_dtype = np.bool_ if kind == "boolean" else np.int64
+            arrays[f"{prefix}_values"] = series.to_numpy(dtype=numpy_dtype, na_value=fill)
+        elif pd.api.types.is_float_dtype(series) or pd.api.types.is_integer_dtype(series):
+            kind = str(series.dtype)
+            arrays[f"{prefix}_values"] = series.to_numpy()
+        elif pd.api.types.is_bool_dtype(series):
+            kind = "bool"
+            arrays[f"{prefix}_values"] = series.to_numpy()
+        else:
+            kind = "str"
+            arrays.update({f"{prefix}_{key}": value for key, value in _encode_strings(series).items()})
+        columns.append({"name": str(column), "kind": kind})
+    meta = {"rows": len(df), "columns": columns, "source": stamp}
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        # Stored uncompressed so every member can be memory mapped in place
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _map_npz(path: str) -> Dict[str, np.ndarray]:
+    """
+    Arrays of an uncompressed .npz as read-only views onto a memory map of the file.
+
+    np.load ignores mmap_mode for archives, but np.savez stores members as plain .npy
+    files, so each array starts at a fixed offset after its zip and .npy headers.
+    """
+    arrays = {}
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with zipfile.ZipFile(f) as archive:
+            for info in archive.infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError(f"{path} member {info.filename} is compressed")
+                # Local header: 30 fixed bytes, then the file name and extra field
+                name_length = int.from_bytes(
+                    buffer[info.header_offset + 26 : info.header_offset + 28], "little"
+                )
+                extra_length = int.from_bytes(
+                    buffer[info.header_offset + 28 : info.header_offset + 30], "little"
+                )
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                if np.lib.format.read_magic(f) == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                if dtype.hasobject:
+                    raise ValueError(f"{path} member {info.filename} holds objects")
+                count = int(np.prod(shape))
+                array = np.frombuffer(buffer, dtype=dtype, count=count, offset=f.tell())
+                arrays[info.filename[: -len(".npy")]] = array.reshape(
+                    shape, order='F' if fortran_order else 'C'
+                )
+    return arrays
+
+
+def _read_numpy(path: str) -> Tuple["pd.DataFrame", Dict[str, int]]:
+    import pandas as pd
+
+    arrays = _map_npz(path)
+    meta = json.loads(arrays["meta"].tobytes())
+    data: Dict[str, Any] = {}
+    for index, column in enumerate(meta["columns"]):
+        prefix, kind = f"c{index}", column["kind"]
+        if kind == "str":
+            strings = _decode_strings(
+                {key: arrays[f"{prefix}_{key}"] for key in ("codes", "offsets", "data")}
+            )
+            data[column["name"]] = pd.array(strings, dtype="str")
+        elif kind in ("boolean", "Int64"):
+            array_type = pd.arrays.BooleanArray if kind == "boolean" else pd.arrays.IntegerArray
+            data[column["name"]] = array_type(
+                arrays[f"{prefix}_values"], arrays[f"{prefix}_mask"], copy=False
+            )
+        else:
+            # Numbers are used straight from the mapped file
+            data[column["name"]] = arrays[f"{prefix}_values"]
+    df = pd.DataFrame(data, index=pd.RangeIndex(meta["rows"]), copy=False)
+    return df, meta["source"]
+
+
+def _write_arrow(df: "pd.DataFrame", path: str, stamp: Dict[str, int]) -> None:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), b"results_source": json.dumps(stamp).encode('utf-8')}
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    feather.write_feather(table.replace_schema_metadata(metadata), tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def _read_arrow(path: str) -> Tuple["pd.DataFrame", Dict[str, int]]:
+    import pyarrow as pa
+
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    stamp = json.loads((table.schema.metadata or {}).get(b"results_source", b"{}"))
+    return table.to_pandas(), stamp
+
+
+def _columns_format(csv_path: str) -> Tuple[str, Callable, Callable]:
+    """Path, reader and writer of the typed copy of a results.csv, Feather if pyarrow is installed."""
+    if _has_arrow():
+        return os.path.join(os.path.dirname(csv_path), ARROW_FILE), _read_arrow, _write_arrow
+    return os.path.join(os.path.dirname(csv_path), NUMPY_FILE), _read_numpy, _write_numpy
+
+
+def write_results_columns(df: "pd.DataFrame", csv_path: str) -> None:
+    """
+    Write the typed copy of a results.csv that was just written from df.
+
+    The copy records the size and modification time of the CSV, so an edit to the CSV by
+    anything else makes load_results fall back to it and rebuild the copy.
+    """
+    path, _, writer = _columns_format(csv_path)
+    writer(typed_results(df), path, _source_stamp(csv_path))
+
+
+def load_results(csv_path: str) -> "pd.DataFrame":
+    """
+    Typed results of an experiment, read from the memory-mapped copy while it matches the CSV.
+
+    A missing or stale copy is rebuilt from the CSV; folders that cannot be written to are
+    served from the CSV alone.
+
+    Raises:
+        FileNotFoundError: If the CSV does not exist
+    """
+    stamp = _source_stamp(csv_path)
+    path, reader, writer = _columns_format(csv_path)
+    if os.path.exists(path):
+        try:
+            df, source = reader(path)
+            if source == stamp:
+                return df
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning(f"Ignoring unreadable results copy {path}: {e}")
+
+    df = read_results_csv(csv_path)
+    try:
+        writer(df, path, stamp)
+    except OSError as e:
+        logger.debug(f"Could not write results copy {path}: {e}")
+    return df
@@ -0,0 +1,196 @@
+import os
+import threading
+from collections import deque
+from typing import IO, Any, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_TAIL_LINES = 2000
+# Bytes read from the log per tail request, more lines are left for the next one
+TAIL_READ_BYTES = 1 << 20
+STDERR_PREFIX = "[stderr] "
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+
+class RunLog:
+    """
+    Line-by-line sink for the output of an experiment subprocess.
+
+    Every line is appended to a size-rotated log file, which read_log_tail serves to any
+    server worker. Only the last stderr lines are kept in memory, for the run's failure details.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.stderr_seen = False
+        self.closed = False
+        self._stderr_tail: Deque[str] = deque(maxlen=20)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Keep the previous run's log as the first backup
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._rotate()
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+
+    def write(self, line: str, stream: str = "stdout") -> None:
+        """
+        Record one line of output.
+
+        Args:
+            line (str): The line, with or without trailing newline
+            stream (str): "stdout" or "stderr"
+        """
+        text = line.rstrip("\r\n")
+        with self._lock:
+            if stream == "stderr":
+                self.stderr_seen = True
+                self._stderr_tail.append(text)
+            if not self.closed:
+                self._file.write(f"{STDERR_PREFIX}{text}\n" if stream == "stderr" else f"{text}\n")
+                self._file.flush()
+                if self._file.tell() >= self.max_bytes:
+                    self._file.close()
+                    self._rotate()
+                    self._file = open(self.path, 'a', encoding='utf-8', newline='')
+
+    def pump(self, pipe: IO[str], stream: str = "stdout", prefix: str = "") -> None:
+        """Copy a subprocess pipe into the log until it is closed, prefixing every line."""
+        for line in iter(pipe.readline, ''):
+            self.write(prefix + line, stream)
+        pipe.close()
+
+    @property
+    def stderr_tail(self) -> List[str]:
+        with self._lock:
+            return list(self._stderr_tail)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._file.close()
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def _inode(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+def _split_lines(data: bytes, start: int) -> List[Tuple[int, int, str, str]]:
+    """(offset, end offset, stream, text) of the complete lines in bytes read at offset start."""
+    lines = []
+    position = start
+    # Split on "\n" only, a "\r" inside a line (progress bars) stays part of it
+    for raw in data.split(b"\n")[:-1]:
+        text = raw.decode('utf-8', errors='replace')
+        stream = "stderr" if text.startswith(STDERR_PREFIX) else "stdout"
+        if stream == "stderr":
+            text = text[len(STDERR_PREFIX) :]
+        lines.append((position, position + len(raw) + 1, stream, text))
+        position += len(raw) + 1
+    return lines
+
+
+def _response(lines: List[Tuple[int, int, str, str]], next_offset: int, truncated: bool) -> Dict[str, Any]:
+    return {
+        "lines": [{"offset": offset, "stream": stream, "text": text} for offset, _, stream, text in lines],
+        "next_offset": lines[-1][1] if lines else next_offset,
+        "truncated": truncated,
+    }
+
+
+def _read_from(path: str, since: int, max_lines: int) -> Dict[str, Any]:
+    """Complete lines from a byte offset, at most TAIL_READ_BYTES of them."""
+    truncated = False
+    try:
+        with open(path, 'rb') as f:
+            if since > os.fstat(f.fileno()).st_size:
+                # Shorter than where the client stopped, a new file under the same inode
+                since, truncated = 0, True
+            f.seek(since)
+            data = f.read(TAIL_READ_BYTES)
+    except FileNotFoundError:
+        return _response([], since, False)
+    lines = _split_lines(data, since)
+    if not lines and len(data) == TAIL_READ_BYTES:
+        # A single line longer than a read, returned in pieces
+        lines = [
+            (offset, offset + len(data), stream, text)
+            for offset, _, stream, text in _split_lines(data + b"\n", since)
+        ]
+    return _response(lines[:max_lines], since, truncated)
+
+
+def _read_last(path: str, max_lines: int) -> Dict[str, Any]:
+    """The last complete lines of a file, reading blocks backwards from its end."""
+    try:
+        with open(path, 'rb') as f:
+            position = os.fstat(f.fileno()).st_size
+            data = b""
+            while position > 0 and data.count(b"\n") <= max_lines and len(data) < 8 * TAIL_READ_BYTES:
+                block = min(TAIL_READ_BYTES, position)
+                position -= block
+                f.seek(position)
+                data = f.read(block) + data
+    except FileNotFoundError:
+        return _response([], 0, False)
+    if position > 0:
+        # Drop the line cut by the first block
+        cut = data.find(b"\n") + 1
+        data, position = data[cut:], position + cut
+    lines = _split_lines(data, position)[-max_lines:]
+    return _response(lines, position, bool(lines) and lines[0][0] > 0)
+
+
+def read_log_tail(
+    path: str, since: int = -1, generation: Optional[int] = None, max_lines: int = DEFAULT_TAIL_LINES
+) -> Dict[str, Any]:
+    """
+    Tail a run's log file from a byte offset, without reading the lines before it.
+
+    Lines are numbered by the byte offset they start at and only complete lines are returned, so
+    a line being written is picked up whole by the next request. The generation is the file's
+    inode: after a rotation, a client still on the previous generation first gets the rest of
+    the rotated file, then continues at the start of the new one.
+
+    Args:
+        path (str): Path to the experiment log
+        since (int): Byte offset to read from, the previous response's next_offset; -1 for the last lines
+        generation (int, optional): The previous response's generation
+        max_lines (int): Maximum number of lines returned
+
+    Returns:
+        Dict with the lines, the next_offset and generation to resume from and whether lines were skipped
+    """
+    current = _inode(path)
+    if since < 0:
+        return {**_read_last(path, max_lines), "generation": current}
+    if generation is not None and generation != current:
+        rotated = f"{path}.1"
+        if _inode(rotated) == generation:
+            content = _read_from(rotated, since, max_lines)
+            if content["lines"]:
+                return {**content, "generation": generation}
+            return {**_read_from(path, 0, max_lines), "generation": current}
+        # Rotated more than once since the client's last request
+        return {**_read_from(path, 0, max_lines), "generation": current, "truncated": True}
+    return {**_read_from(path, since, max_lines), "generation": current}
@@ -0,0 +1,288 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from dashboard.state_store import LeaderLock, StateStore
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+
+class QueuedRun(BaseModel):
+    run_id: str = Field(default_factory=lambda: uuid.uuid4().hex[:12])
+    experiment_name: str
+    priority: int = 0
+    cpus: int = 1
+    submitted_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    status: str = QUEUED
+    cpu_ids: List[int] = []
+    options: Dict[str, Any] = {}
+
+
+class RunScheduler:
+    """
+    Bounded scheduler for experiment runs.
+
+    Runs wait in a priority queue (higher priority first, FIFO within a priority) and are
+    started only while both the concurrent run limit and the CPU slot budget allow it. The
+    queue head is never overtaken, so a large run cannot be starved by smaller ones.
+
+    The queue lives in a StateStore shared by all server workers: any worker can submit,
+    cancel and inspect runs, while the worker holding the leader lock dispatches and executes
+    them. Queued runs survive a restart; runs that were executing are reported as interrupted.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[QueuedRun], None],
+        store: StateStore,
+        leader_lock_path: str,
+        max_concurrent_runs: int = 1,
+        cpu_slots: Optional[int] = None,
+        on_cancel: Optional[Callable[[QueuedRun], None]] = None,
+        poll_interval: float = 0.5,
+    ):
+        self.runner = runner
+        self.store = store
+        self.max_concurrent_runs = max(1, max_concurrent_runs)
+        self.cpu_slots = max(1, cpu_slots or os.cpu_count() or 1)
+        self.on_cancel = on_cancel
+        self.poll_interval = poll_interval
+        self._leader_lock = LeaderLock(leader_lock_path)
+        # Runs executed by this worker, only populated on the leader
+        self._running: Dict[str, QueuedRun] = {}
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_lock.held
+
+    def start(self) -> None:
+        """Start competing for the leader lock and dispatching runs once it is held."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name="run-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def submit(
+        self, experiment_name: str, priority: int = 0, cpus: int = 1, options: Optional[Dict[str, Any]] = None
+    ) -> QueuedRun:
+        """
+        Queue a run, it is started by the leader as soon as capacity allows.
+
+        Args:
+            experiment_name (str): Evaluation key of the experiment to run
+            priority (int): Higher values are started first
+            cpus (int): Number of CPU slots reserved for the run
+            options (Dict[str, Any], optional): Extra settings passed through to the runner
+
+        Returns:
+            QueuedRun: The queued run
+
+        Raises:
+            ValueError: If the experiment is already queued or running, or asks for too many CPUs
+        """
+        if cpus < 1 or cpus > self.cpu_slots:
+            raise ValueError(f"cpus must be between 1 and {self.cpu_slots}")
+        run = QueuedRun(experiment_name=experiment_name, priority=priority, cpus=cpus, options=options or {})
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT status FROM runs WHERE experiment_name = ?", (experiment_name,)
+            ).fetchone()
+            if row and row["status"] in (QUEUED, RUNNING):
+                raise ValueError(f"Experiment '{experiment_name}' is already queued or running")
+            # Replaces an interrupted run of the same experiment
+            self._write_run(conn, run)
+        logger.info(f"Queued run {run.run_id} for '{experiment_name}' (priority {priority}, cpus {cpus})")
+        self._wake.set()
+        if self.is_leader:
+            self._dispatch()
+        return run
+
+    def cancel(self, experiment_name: str) -> Optional[QueuedRun]:
+        """
+        Cancel a queued or running run of an experiment.
+
+        A running run is flagged in the store and stopped by the leader, whichever worker
+        received the request.
+
+        Returns:
+            The cancelled run, or None if the experiment was neither queued nor running
+        """
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT status, data FROM runs WHERE experiment_name = ?", (experiment_name,)
+            ).fetchone()
+            if row is None or row["status"] not in (QUEUED, RUNNING):
+                return None
+            run = QueuedRun(**json.loads(row["data"]))
+            if row["status"] == QUEUED:
+                conn.execute("DELETE FROM runs WHERE experiment_name = ?", (experiment_name,))
+            else:
+                conn.execute(
+                    "UPDATE runs SET cancel_requested = 1 WHERE experiment_name = ?", (experiment_name,)
+                )
+        if run.status == QUEUED:
+            logger.info(f"Removed run {run.run_id} for '{experiment_name}' from the queue")
+        else:
+            logger.info(f"Cancellation requested for running run {run.run_id} of '{experiment_name}'")
+            self._wake.set()
+            if self.is_leader:
+                self._apply_cancellations()
+        run.status = CANCELLED
+        return run
+
+    def find(self, experiment_name: str) -> Optional[QueuedRun]:
+        row = (
+            self.store.connection()
+            .execute(
+                "SELECT data FROM runs WHERE experiment_name = ? AND status IN (?, ?)",
+                (experiment_name, QUEUED, RUNNING),
+            )
+            .fetchone()
+        )
+        return QueuedRun(**json.loads(row["data"])) if row else None
+
+    def position(self, experiment_name: str) -> Optional[int]:
+        """1-based position of a queued experiment, None when it is not waiting."""
+        for index, run in enumerate(self._runs(QUEUED)):
+            if run.experiment_name == experiment_name:
+                return index + 1
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        running = self._runs(RUNNING)
+        used_cpus = set(cpu_id for run in running for cpu_id in run.cpu_ids)
+        return {
+            "queued": [run.model_dump() for run in self._runs(QUEUED)],
+            "running": [run.model_dump() for run in running],
+            "interrupted": [run.model_dump() for run in self._runs(INTERRUPTED)],
+            "limits": {
+                "max_concurrent_runs": self.max_concurrent_runs,
+                "cpu_slots": self.cpu_slots,
+                "free_cpu_slots": self.cpu_slots - len(used_cpus),
+            },
+        }
+
+    def _runs(self, status: str) -> List[QueuedRun]:
+        rows = self.store.connection().execute("SELECT data FROM runs WHERE status = ?", (status,)).fetchall()
+        runs = [QueuedRun(**json.loads(row["data"])) for row in rows]
+        if status == QUEUED:
+            runs.sort(key=lambda run: (-run.priority, run.submitted_at))
+        return runs
+
+    @staticmethod
+    def _write_run(conn, run: QueuedRun) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO runs (experiment_name, run_id, status, cancel_requested, data) "
+            "VALUES (?, ?, ?, 0, ?)",
+            (run.experiment_name, run.run_id, run.status, run.model_dump_json()),
+        )
+
+    def _loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if not self.is_leader and self._leader_lock.try_acquire():
+                    logger.info(f"Worker {os.getpid()} is now executing experiment runs")
+                    self._recover()
+                if self.is_leader:
+                    self._apply_cancellations()
+                    self._dispatch()
+            except Exception as e:
+                logger.error(f"Run scheduler iteration failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        self._leader_lock.release()
+
+    def _recover(self) -> None:
+        """Runs left running by a previous leader can not be reattached, report them as interrupted."""
+        with self.store.transaction() as conn:
+            interrupted = 0
+            for row in conn.execute("SELECT data FROM runs WHERE status = ?", (RUNNING,)).fetchall():
+                run = QueuedRun(**json.loads(row["data"]))
+                if run.experiment_name in self._running:
+                    continue
+                run.status = INTERRUPTED
+                self._write_run(conn, run)
+                interrupted += 1
+            queued = conn.execute("SELECT COUNT(*) FROM runs WHERE status = ?", (QUEUED,)).fetchone()[0]
+        if queued or interrupted:
+            logger.info(f"Restored {queued} queued run(s), {interrupted} interrupted run(s)")
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            running = self._runs(RUNNING)
+            free_cpus = set(range(self.cpu_slots)) - set(cpu_id for run in running for cpu_id in run.cpu_ids)
+            started = len(running)
+            for head in self._runs(QUEUED):
+                if started >= self.max_concurrent_runs or head.cpus > len(free_cpus):
+                    break
+                head.cpu_ids = sorted(free_cpus)[: head.cpus]
+                head.status = RUNNING
+                head.started_at = time.time()
+                with self.store.transaction() as conn:
+                    row = conn.execute(
+                        "SELECT run_id, status FROM runs WHERE experiment_name = ?", (head.experiment_name,)
+                    ).fetchone()
+                    if row is None or row["run_id"] != head.run_id or row["status"] != QUEUED:
+                        # Cancelled or replaced by another worker in the meantime
+                        continue
+                    self._write_run(conn, head)
+                free_cpus.difference_update(head.cpu_ids)
+                started += 1
+                self._running[head.experiment_name] = head
+                threading.Thread(
+                    target=self._execute, args=(head,), name=f"run-{head.run_id}", daemon=True
+                ).start()
+
+    def _apply_cancellations(self) -> None:
+        rows = (
+            self.store.connection()
+            .execute("SELECT experiment_name FROM runs WHERE status = ? AND cancel_requested = 1", (RUNNING,))
+            .fetchall()
+        )
+        for row in rows:
+            with self._lock:
+                run = self._running.get(row["experiment_name"])
+                if run is None or run.status == CANCELLED:
+                    continue
+                run.status = CANCELLED
+            logger.info(f"Cancelling running run {run.run_id} for '{run.experiment_name}'")
+            if self.on_cancel:
+                # Stopping processes can take a while, keep the loop responsive
+                threading.Thread(target=self.on_cancel, args=(run,), daemon=True).start()
+
+    def _execute(self, run: QueuedRun) -> None:
+        try:
+            self.runner(run)
+        except Exception as e:
+            logger.error(f"Run {run.run_id} for '{run.experiment_name}' crashed: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(run.experiment_name, None)
+                if run.status == RUNNING:
+                    run.status = FINISHED
+            with self.store.transaction() as conn:
+                conn.execute(
+                    "DELETE FROM runs WHERE experiment_name = ? AND run_id = ?",
+                    (run.experiment_name, run.run_id),
+                )
+            self._wake.set()
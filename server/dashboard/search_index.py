@@ -0,0 +1,358 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from dashboard.prompt_store import expand_prompts, is_interned, open_store
+from dashboard.trajectory_files import READ_ERRORS
+from dashboard.trajectory_pack import TrajectoryPack, trajectory_chunks, trajectory_versions
+
+INDEX_FILE = ".search_index.sqlite"
+
+# Searchable fields, the first two are indexed once per task and the rest once per step
+TASK_FIELDS = ("intent", "answer")
+STEP_FIELDS = ("plan", "action", "url", "prompts")
+
+MODE_PHRASE = "phrase"
+MODE_ALL = "all"
+MODE_FTS = "fts"
+QUERY_MODES = (MODE_PHRASE, MODE_ALL, MODE_FTS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    task_id TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    first_step INTEGER,
+    steps INTEGER NOT NULL DEFAULT 0,
+    answer TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS task_text USING fts5(intent, answer, tokenize = 'unicode61 remove_diacritics 2');
+CREATE VIRTUAL TABLE IF NOT EXISTS step_text USING fts5(
+    file_id UNINDEXED, step UNINDEXED, plan, action, url, prompts, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def fts_query(query: str, mode: str = MODE_PHRASE) -> str:
+    """
+    Turn user input into an FTS5 query.
+
+    The phrase mode matches the input as written, which suits error messages and URLs, the
+    all mode matches steps containing every word in any order and the fts mode passes the
+    FTS5 query syntax through.
+    """
+    if mode not in QUERY_MODES:
+        raise ValueError(f"mode must be one of {', '.join(QUERY_MODES)}")
+    if mode == MODE_FTS:
+        return query
+    if mode == MODE_ALL:
+        return " ".join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+    return '"{}"'.format(query.replace('"', '""'))
+
+
+class SearchIndex:
+    """
+    Incremental full-text index over the trajectories of one experiment.
+
+    The index is an SQLite FTS5 database inside the experiment folder. Every task has a row
+    with its intent and final answer, every step a row with its plan, formatted action, URL
+    and prompt values. Trajectory files are re-indexed when their mtime or size changes, packed
+    trajectories when their pack record does, and answers when results.json does; `refresh` does that and runs before searches at most
+    every `refresh_interval` seconds. Rows of one trajectory have consecutive rowids, so
+    replacing a task deletes a rowid range instead of scanning the index.
+    """
+
+    def __init__(self, experiment_dir: str, refresh_interval: float = 1.0):
+        self.experiment_dir = experiment_dir
+        self.path = os.path.join(experiment_dir, INDEX_FILE)
+        self.refresh_interval = refresh_interval
+        self._local = threading.local()
+        self._refreshed_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._pack = TrajectoryPack(experiment_dir)
+        self.connection().executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _scan_files(self) -> Dict[str, Tuple[int, int]]:
+        return trajectory_versions(self.experiment_dir, self._pack)
+
+    def _results_version(self) -> str:
+        try:
+            st = os.stat(os.path.join(self.experiment_dir, "results.json"))
+        except OSError:
+            return ""
+        return f"{st.st_mtime_ns}:{st.st_size}"
+
+    def _read_answers(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.experiment_dir, "results.json"), 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+        return {task_id: str(result.get("agent_answer") or "") for task_id, result in results.items()}
+
+    def _read_trajectory(self, task_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            chunks = trajectory_chunks(self.experiment_dir, task_id, self._pack)
+            if chunks is None:
+                return None
+            data = json.loads(b"".join(chunks))
+        except READ_ERRORS:
+            # Partially written or unreadable, retried on the next refresh
+            return None
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def _step_row(file_id: int, index: int, step: Dict[str, Any], prompt_bodies: Dict[str, str]) -> Tuple:
+        prompts = step.get("prompts") or []
+        if is_interned(prompts):
+            prompts = expand_prompts(prompts, prompt_bodies)
+        prompt_text = "\n".join(
+            str(prompt.get("value") or "") for prompt in prompts if isinstance(prompt, dict)
+        )
+        return (
+            file_id,
+            index,
+            str(step.get("plan") or ""),
+            str(step.get("action_formatted") or ""),
+            str(step.get("current_url") or ""),
+            prompt_text,
+        )
+
+    def _delete_task(self, conn: sqlite3.Connection, row: sqlite3.Row) -> None:
+        conn.execute("DELETE FROM task_text WHERE rowid = ?", (row["id"],))
+        if row["steps"]:
+            conn.execute(
+                "DELETE FROM step_text WHERE rowid BETWEEN ? AND ?",
+                (row["first_step"], row["first_step"] + row["steps"] - 1),
+            )
+
+    @staticmethod
+    def _pending(conn: sqlite3.Connection, files: Dict[str, Tuple[int, int]], results_version: str) -> Tuple:
+        """Indexed tasks, the trajectories to (re)index and whether results.json changed."""
+        known = {row["task_id"]: row for row in conn.execute("SELECT * FROM files")}
+        stored_version = conn.execute("SELECT value FROM meta WHERE key = 'results'").fetchone()
+        results_changed = stored_version is None or stored_version["value"] != results_version
+        changed = [
+            task_id
+            for task_id, version in files.items()
+            if task_id not in known or (known[task_id]["mtime_ns"], known[task_id]["size"]) != version
+        ]
+        return known, changed, results_changed
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with the experiment folder.
+
+        Args:
+            force (bool): Refresh even if the last refresh is more recent than refresh_interval
+
+        Returns:
+            Dict with the number of indexed, removed and answer-updated tasks
+        """
+        counts = {"indexed": 0, "removed": 0, "answers": 0}
+        with self._refresh_lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return counts
+            files = self._scan_files()
+            results_version = self._results_version()
+
+            conn = self.connection()
+            known, changed, results_changed = self._pending(conn, files, results_version)
+            if not changed and not results_changed and len(known) == len(files):
+                self._refreshed_at = time.monotonic()
+                return counts
+
+            # One writer at a time across threads and server workers; later ones find nothing to do
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                known, changed, results_changed = self._pending(conn, files, results_version)
+                answers = self._read_answers() if changed or results_changed else {}
+                prompt_bodies = open_store(self.experiment_dir).bodies() if changed else {}
+
+                for task_id in set(known) - set(files):
+                    self._delete_task(conn, known[task_id])
+                    conn.execute("DELETE FROM files WHERE id = ?", (known[task_id]["id"],))
+                    counts["removed"] += 1
+
+                for task_id in changed:
+                    data = self._read_trajectory(task_id)
+                    if data is None:
+                        continue
+                    if task_id in known:
+                        self._delete_task(conn, known[task_id])
+                        conn.execute("DELETE FROM files WHERE id = ?", (known[task_id]["id"],))
+                    answer = answers.get(task_id, "")
+                    file_id = conn.execute(
+                        "INSERT INTO files (task_id, mtime_ns, size, answer) VALUES (?, ?, ?, ?)",
+                        (task_id, *files[task_id], answer),
+                    ).lastrowid
+                    conn.execute(
+                        "INSERT INTO task_text (rowid, intent, answer) VALUES (?, ?, ?)",
+                        (file_id, str(data.get("intent") or ""), answer),
+                    )
+                    steps = [step for step in data.get("steps") or [] if isinstance(step, dict)]
+                    if steps:
+                        first_step = conn.execute(
+                            "SELECT COALESCE(MAX(rowid), 0) + 1 FROM step_text"
+                        ).fetchone()[0]
+                        conn.executemany(
+                            "INSERT INTO step_text (rowid, file_id, step, plan, action, url, prompts) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (
+                                (first_step + index, *self._step_row(file_id, index, step, prompt_bodies))
+                                for index, step in enumerate(steps)
+                            ),
+                        )
+                        conn.execute(
+                            "UPDATE files SET first_step = ?, steps = ? WHERE id = ?",
+                            (first_step, len(steps), file_id),
+                        )
+                    counts["indexed"] += 1
+
+                if results_changed:
+                    changed_set = set(changed)
+                    for task_id, row in known.items():
+                        if task_id in changed_set or task_id not in files:
+                            continue
+                        answer = answers.get(task_id, "")
+                        if answer != row["answer"]:
+                            conn.execute(
+                                "UPDATE task_text SET answer = ? WHERE rowid = ?", (answer, row["id"])
+                            )
+                            conn.execute("UPDATE files SET answer = ? WHERE id = ?", (answer, row["id"]))
+                            counts["answers"] += 1
+                    conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('results', ?)", (results_version,)
+                    )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self._refreshed_at = time.monotonic()
+
+        if any(counts.values()):
+            logger.info(f"Search index of {os.path.basename(self.experiment_dir)} updated: {counts}")
+        return counts
+
+    def search(
+        self,
+        query: str,
+        mode: str = MODE_PHRASE,
+        limit: int = 20,
+        hits_per_task: int = 10,
+        max_hits: int = 2000,
+    ) -> Dict[str, Any]:
+        """
+        Search the experiment's trajectories, refreshing the index first when it is due.
+
+        Hits are ranked with BM25; tasks are ordered by their best hit, then by their number
+        of hits. Step hits carry the step index, the matching fields and a snippet; task hits
+        (intent, answer) have no step index.
+
+        Args:
+            query (str): Text to search for, see fts_query for the modes
+            mode (str): One of QUERY_MODES
+            limit (int): Number of tasks returned
+            hits_per_task (int): Hit locations returned per task
+            max_hits (int): Best hits considered for the task ranking
+
+        Returns:
+            Dict with the matching tasks and their hits
+
+        Raises:
+            ValueError: If the mode is unknown or the query is not valid FTS5 syntax
+        """
+        match = fts_query(query, mode)
+        self.refresh()
+        conn = self.connection()
+        start = time.perf_counter()
+        truncated = False
+        hits = []
+        errors = []
+        for table, step, join in (
+            ("task_text", "NULL", "files.id = task_text.rowid"),
+            ("step_text", "step_text.step", "files.id = step_text.file_id"),
+        ):
+            try:
+                rows = conn.execute(
+                    f"SELECT {table}.rowid AS hit, files.task_id, {step} AS step, bm25({table}) AS score "
+                    f"FROM {table} JOIN files ON {join} WHERE {table} MATCH ? ORDER BY rank LIMIT ?",
+                    (match, max_hits),
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                # A column filter only names the fields of one of the tables
+                errors.append(str(e))
+                continue
+            hits += [(table, row) for row in rows]
+            truncated = truncated or len(rows) >= max_hits
+        if len(errors) == 2:
+            raise ValueError(f"Invalid query: {errors[0]}")
+
+        tasks: Dict[str, Dict[str, Any]] = {}
+        for table, row in hits:
+            task = tasks.setdefault(row["task_id"], {"task_id": row["task_id"], "score": 0.0, "hits": []})
+            # bm25() is lower for better matches, report it as a positive relevance
+            task["score"] = max(task["score"], -row["score"])
+            task["hits"].append(
+                {"table": table, "id": row["hit"], "step": row["step"], "score": -row["score"]}
+            )
+        ranked = sorted(tasks.values(), key=lambda task: (-task["score"], -len(task["hits"])))[:limit]
+        for task in ranked:
+            task["hit_count"] = len(task["hits"])
+            task["hits"] = sorted(task["hits"], key=lambda hit: -hit["score"])[:hits_per_task]
+
+        # Matching fields and snippets only for the hits returned
+        self._describe_hits(conn, match, [hit for task in ranked for hit in task["hits"]])
+        return {
+            "query": query,
+            "mode": mode,
+            "total_tasks": len(tasks),
+            "truncated": truncated,
+            "took_ms": (time.perf_counter() - start) * 1000,
+            "tasks": ranked,
+        }
+
+    @staticmethod
+    def _describe_hits(conn: sqlite3.Connection, match: str, hits: List[Dict[str, Any]]) -> None:
+        for table, fields, first_column in (("task_text", TASK_FIELDS, 0), ("step_text", STEP_FIELDS, 2)):
+            by_id = {hit["id"]: hit for hit in hits if hit["table"] == table}
+            if not by_id:
+                continue
+            columns = ", ".join(
+                f"instr(highlight({table}, {column}, char(2), char(3)), char(2)) > 0"
+                for column in range(first_column, first_column + len(fields))
+            )
+            rows = conn.execute(
+                f"SELECT rowid, snippet({table}, -1, '[', ']', '…', 16), {columns} FROM {table} "
+                f"WHERE {table} MATCH ? AND rowid IN ({', '.join('?' * len(by_id))})",
+                (match, *by_id),
+            )
+            for rowid, snippet, *matched in rows:
+                hit = by_id[rowid]
+                hit["fields"] = [field for field, found in zip(fields, matched) if found]
+                hit["snippet"] = snippet
+        for hit in hits:
+            del hit["table"], hit["id"]
+
+    def stats(self) -> Dict[str, int]:
+        row = self.connection().execute(
+            "SELECT COUNT(*) AS tasks, COALESCE(SUM(steps), 0) AS steps FROM files"
+        )
+        return dict(row.fetchone())
@@ -1,58 +1,145 @@
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import APIRouter, FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 import json
 import os
-import pandas as pd
 import csv
+import io
+import zipfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Iterator, Optional, List
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from fastapi import Body
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.datastructures import Headers
 from starlette.responses import Response
 import argparse
+import asyncio
 import subprocess
 import threading
+import time
+import uuid
 import shutil
-import re
 import tempfile
 import sys
+from urllib.parse import quote
 from loguru import logger
-from dashboard.activity_tracker import ActivityTracker
+from dashboard.activity_tracker import (
+    EXPERIMENT_FOLDER_ENV,
+    RUN_MODE_FULL,
+    RUN_MODE_RERUN_FAILED,
+    RUN_MODES,
+    SHARD_ID_ENV,
+    TASK_IDS_FILE_ENV,
+    ActivityTracker,
+)
+from dashboard.capture import CAPTURE_LEVEL_ENV, validate_capture_level
+from dashboard.compaction import SCREENSHOT_TYPES, screenshot_path
+from dashboard.events import RESET, EventBus, ExperimentWatcher, format_sse
+from dashboard.prompt_store import PROMPTS_FILE, expand_prompts, open_store, parse_prompt_lines
+from dashboard.run_logs import RunLog, read_log_tail
+from dashboard.regex_scan import RegexScan, scan_targets
+from dashboard.search_index import MODE_PHRASE, SearchIndex
+from dashboard.trajectory_files import (
+    accepts_encoding,
+    decompress_chunks,
+    encoding_of,
+    file_chunks,
+    find_trajectory,
+    read_trajectory,
+    READ_ERRORS,
+    SCREENSHOT_DIR,
+)
+from dashboard.trajectory_pack import TrajectoryPack, has_pack
+from dashboard.zip_store import ARCHIVE_SUFFIX, ZipExperiment, forget_archive, list_archives, open_archive
+from dashboard.scheduler import CANCELLED, QueuedRun, RunScheduler
+from dashboard.sharding import (
+    ShardPlanner,
+    read_completed_task_ids,
+    read_experiment_task_ids,
+    shard_progress,
+    split_cpus,
+)
+from dashboard.state_store import StateStore
+from dashboard.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HttpMetrics,
+    MetricsMiddleware,
+    MetricsRegistry,
+    monitor_event_loop_lag,
+)
+from dashboard.merge_policies import BEST_SCORE, MERGE_POLICIES, validate_merge_policy
+from dashboard.profiling import MemoryProfiler, ProfileSession, ProfilingMiddleware, RequestProfiler
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from dashboard.step_table import StepTable
 
 # Load environment variables
 load_dotenv()
 
-# Parse command-line arguments
+SERVER_ARGS_ENV = "CUGA_VIZ_SERVER_ARGS"
+
+# Command-line arguments, parsed by main() or when the app is created
 parser = argparse.ArgumentParser(description="FastAPI Server")
 parser.add_argument("--data_dir", type=str, default="./data", help="Directory to store/load data")
 parser.add_argument("--experiments_dir", type=str, default=None, help="Directory containing experiment logs")
 parser.add_argument("--port", type=int, default=8989, help="Port to run the server on")
 parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to run the server on")
-args = parser.parse_args()
-
-app = FastAPI()
-
-# Initialize ActivityTracker
+parser.add_argument(
+    "--max_concurrent_runs",
+    type=int,
+    default=int(os.environ.get("CUGA_VIZ_MAX_CONCURRENT_RUNS", "1")),
+    help="Maximum number of experiment runs executing at the same time",
+)
+parser.add_argument(
+    "--cpu_slots",
+    type=int,
+    default=int(os.environ.get("CUGA_VIZ_CPU_SLOTS", "0")) or None,
+    help="CPU slots shared by experiment runs (defaults to the number of CPUs)",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=int(os.environ.get("CUGA_VIZ_WORKERS", "1")),
+    help="Number of server worker processes",
+)
+parser.add_argument(
+    "--state_db",
+    type=str,
+    default=os.environ.get("CUGA_VIZ_STATE_DB"),
+    help="SQLite file holding run state shared by the workers (defaults to the experiment outputs directory)",
+)
+parser.add_argument(
+    "--access_log_sample_rate",
+    type=float,
+    default=float(os.environ.get("CUGA_VIZ_ACCESS_LOG_SAMPLE_RATE", "0.01")),
+    help="Fraction of requests written to the access log, errors and slow requests are always logged",
+)
+parser.add_argument(
+    "--enable_profiling",
+    action="store_true",
+    default=os.environ.get("CUGA_VIZ_ENABLE_PROFILING", "").lower() in ("1", "true", "yes"),
+    help="Expose the /api/admin profiling endpoints (CPU profiles and memory snapshots)",
+)
 
-# Directory containing the React build
-BUILD_DIR = args.data_dir
-EXPERIMENTS_DIR = args.experiments_dir
+# Endpoints are registered on a router, create_app() builds the application around it
+router = APIRouter()
+# Profiling endpoints, only added with --enable_profiling
+admin_router = APIRouter(prefix="/api/admin")
 
 # Directory structure like eval_gui.py
 APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
 OUTPUT_DIR = os.path.join(APP_DIR, "scripts", "experiment_outputs")  # For new runs
-LOGGING_DIR = (
-    EXPERIMENTS_DIR if EXPERIMENTS_DIR else os.path.join(APP_DIR, "logging", "trajectory_data")
-)  # For logged experiments
 
-# If only experiments_dir is provided, use it as BUILD_DIR for serving static files
-if EXPERIMENTS_DIR and not args.data_dir != "./data":  # data_dir is default
-    BUILD_DIR = EXPERIMENTS_DIR
-    tracker = ActivityTracker()
-    tracker.set_base_dir(EXPERIMENTS_DIR)
+# Directory containing the React build and directory of logged experiments, set by create_app()
+BUILD_DIR = "./data"
+EXPERIMENTS_DIR = None
+LOGGING_DIR = os.path.join(APP_DIR, "logging", "trajectory_data")
 
 
 # Use absolute paths based on the package's location
@@ -77,11 +164,95 @@ logger.info(f"Using assets directory: {assets_dir}")
 # Directory containing static files
 STATIC_DIR = f"{BUILD_DIR}"
 
-# Global storage for active runs and processes (in production, this should be a proper database)
-active_runs = {}
+# Run state shared by all server workers, any of them can answer for any run (set by create_app())
+state_store: Optional[StateStore] = None
+active_runs: Dict[str, Any] = {}
+shard_runs: Dict[str, Any] = {}
+merge_jobs: Dict[str, Any] = {}
+# The tracker is a singleton holding the experiment being written, so merges run one at a time
+merge_lock = threading.Lock()
+
+# Local to the worker executing runs
 processes = {}
-dashboard_process = None
-dashboard_exp_name = None
+shard_planners: Dict[str, ShardPlanner] = {}
+# Full-text indexes by experiment folder, opened on their first search
+search_indexes: Dict[str, SearchIndex] = {}
+search_indexes_lock = threading.Lock()
+# Step tables by experiment folder, opened on their first query
+step_tables: Dict[str, "StepTable"] = {}
+step_tables_lock = threading.Lock()
+# Pack file readers by experiment folder, opened on the first packed trajectory served
+trajectory_packs: Dict[str, TrajectoryPack] = {}
+trajectory_packs_lock = threading.Lock()
+# Regex scans streaming from this worker, by scan ID
+regex_scans: Dict[str, RegexScan] = {}
+
+# Live update channel fed by tracker writes and file changes in the logging directory
+event_bus = EventBus()
+experiment_watcher: Optional[ExperimentWatcher] = None
+
+# Metrics of this worker, served on /metrics
+metrics_registry = MetricsRegistry()
+http_metrics = HttpMetrics(metrics_registry)
+
+# On-demand profiling of this worker, see admin_router
+request_profiler = RequestProfiler()
+memory_profiler = MemoryProfiler()
+
+
+def _results_cache_stats() -> Dict[str, int]:
+    hits = misses = entries = 0
+    for cached in (_load_results_csv, _load_results_records):
+        info = cached.cache_info()
+        hits, misses, entries = hits + info.hits, misses + info.misses, entries + info.currsize
+    return {"hits": hits, "misses": misses, "entries": entries}
+
+
+def _results_cache_hit_ratio() -> float:
+    stats = _results_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    return stats["hits"] / lookups if lookups else 0.0
+
+
+def _experiments_indexed() -> int:
+    if experiment_watcher and experiment_watcher.running:
+        return experiment_watcher.experiment_count
+    if not os.path.isdir(LOGGING_DIR):
+        return 0
+    with os.scandir(LOGGING_DIR) as entries:
+        return sum(1 for entry in entries if entry.is_dir())
+
+
+def _run_count(status: str) -> int:
+    return len(run_scheduler.snapshot()[status]) if run_scheduler else 0
+
+
+metrics_registry.gauge(
+    "cuga_viz_experiments_indexed",
+    "Experiment folders in the logging directory",
+    function=_experiments_indexed,
+)
+metrics_registry.gauge(
+    "cuga_viz_results_cache_hits",
+    "Parsed results.csv cache hits",
+    function=lambda: _results_cache_stats()["hits"],
+)
+metrics_registry.gauge(
+    "cuga_viz_results_cache_misses",
+    "Parsed results.csv cache misses",
+    function=lambda: _results_cache_stats()["misses"],
+)
+metrics_registry.gauge(
+    "cuga_viz_results_cache_hit_ratio",
+    "Hit ratio of the parsed results.csv cache",
+    function=_results_cache_hit_ratio,
+)
+metrics_registry.gauge(
+    "cuga_viz_active_runs", "Experiment runs executing", function=lambda: _run_count("running")
+)
+metrics_registry.gauge(
+    "cuga_viz_queued_runs", "Experiment runs waiting in the queue", function=lambda: _run_count("queued")
+)
 
 
 # Custom StaticFiles class to disable caching for specific extensions
@@ -107,28 +278,50 @@ class SecureStaticFiles(StaticFiles):
     async def get_response(self, path: str, scope):
         try:
             requested_path = (self.directory_path / path).resolve()
-            print(requested_path)
             if not str(requested_path).startswith(str(self.directory)):
                 raise HTTPException(status_code=404, detail="File not found")
         except (OSError, ValueError):
             raise HTTPException(status_code=404, detail="File not found")
-        return await super().get_response(path, scope)
-
-
-# Mount the React build files
-app.mount("/data", SecureStaticFiles(directory=STATIC_DIR), name="static")
-app.mount("/static", SecureStaticFiles(directory=STATIC_DIR_HTML), name="static_dir_html")
-app.mount("/assets", SecureStaticFiles(directory=assets_dir), name="static_dir_assets_html")
+        try:
+            return await super().get_response(path, scope)
+        except StarletteHTTPException as e:
+            # Keeps /data/{experiment}/{task_id}.json working for packed and zipped experiments
+            if e.status_code != 404 or not path.endswith(".json"):
+                raise
+            experiment_path, task_id = requested_path.parent, requested_path.name[: -len(".json")]
+            accept_encoding = Headers(scope=scope).get("accept-encoding")
+            archive_path = experiment_path.parent / f"{experiment_path.name}{ARCHIVE_SUFFIX}"
+            response = None
+            if experiment_path.is_dir():
+                response = await _stored_trajectory(experiment_path, task_id, accept_encoding)
+            elif archive_path.is_file():
+                try:
+                    archive = await asyncio.to_thread(open_archive, str(archive_path))
+                except zipfile.BadZipFile:
+                    raise e
+                response = _archived_trajectory(archive, task_id, accept_encoding)
+            if response is None:
+                raise
+            return response
 
 
 # Pydantic models for requests
 class ExperimentRun(BaseModel):
     experiment_name: str
+    priority: int = 0
+    cpus: Optional[int] = None
+    shards: int = 1
+    experiment_folder: Optional[str] = None
+    mode: str = RUN_MODE_FULL
+    # How much of each step the evaluators' trackers write, see dashboard.capture
+    capture_level: Optional[str] = None
 
 
 class JoinExperiments(BaseModel):
     experiment_names: List[str]
     new_name: str
+    policy: str = BEST_SCORE
+    agent_v: Optional[str] = None
 
 
 class ProgressUpdate(BaseModel):
@@ -141,11 +334,85 @@ class DeleteExperiments(BaseModel):
     experiment_names: List[str]
 
 
+class ScanRequest(BaseModel):
+    experiment_names: List[str]
+    pattern: str
+    fields: Optional[List[str]] = None
+    ignore_case: bool = False
+    limit: int = 100
+
+
+class StepGroupByRequest(BaseModel):
+    experiment_names: List[str]
+    by: List[str] = ["name"]
+    outcome: Optional[str] = None
+    sort: str = "steps"
+    limit: int = 100
+
+
+class ConsistencyRequest(BaseModel):
+    experiment_names: List[str]
+    k: List[int] = [1, 3, 5]
+
+
 class DashboardRequest(BaseModel):
     experiment_name: str
 
 
+class ProfileRequest(BaseModel):
+    route: str
+    requests: int = 10
+    mode: str = "sample"
+    interval_ms: float = 5
+
+
 # Utility functions from eval_gui.py
+def _experiment_path(experiment_name: str) -> Path:
+    """Resolve a logged experiment folder, rejecting names that point outside the logging directory"""
+    logging_root = Path(LOGGING_DIR).resolve()
+    experiment_path = (logging_root / experiment_name).resolve()
+    if experiment_path.parent != logging_root or not experiment_path.is_dir():
+        raise HTTPException(status_code=404, detail=f"Experiment {experiment_name} not found")
+    return experiment_path
+
+
+def _experiment_archive(experiment_name: str) -> Optional[ZipExperiment]:
+    """The zip archive of an experiment kept zipped in the logging directory, None for folders"""
+    logging_root = Path(LOGGING_DIR).resolve()
+    archive_path = (logging_root / f"{experiment_name}{ARCHIVE_SUFFIX}").resolve()
+    if archive_path.parent != logging_root or (logging_root / experiment_name).is_dir():
+        return None
+    if not archive_path.is_file():
+        return None
+    try:
+        return open_archive(str(archive_path))
+    except zipfile.BadZipFile:
+        raise HTTPException(
+            status_code=400, detail=f"Experiment archive {experiment_name} is not a valid zip"
+        )
+
+
+@lru_cache(maxsize=32)
+def _load_results_csv(path: str, mtime_ns: int) -> "pd.DataFrame":
+    """Typed results of a results.csv from its memory-mapped columnar copy, cached until the file changes"""
+    # pandas takes a good part of a second to import, only pay for it once a table is requested
+    from dashboard.results_store import load_results, read_results_csv
+
+    if path.endswith(ARCHIVE_SUFFIX):
+        # A zipped experiment, parsed from the archived CSV
+        return read_results_csv(io.BytesIO(open_archive(path).read("results.csv")))
+    return load_results(path)
+
+
+@lru_cache(maxsize=32)
+def _load_results_records(path: str, mtime_ns: int) -> List[Dict[str, Any]]:
+    """Convert a results.csv into table rows without empty cells, cached until the file changes"""
+    import pandas as pd
+
+    df = _load_results_csv(path, mtime_ns)
+    return [{key: value for key, value in row.items() if not pd.isna(value)} for _, row in df.iterrows()]
+
+
 def get_last_completed_id(experiment_name):
     """Reads the .progress file to find the last successfully completed item for a GUI-run."""
     progress_file = os.path.join(OUTPUT_DIR, experiment_name, ".progress")
@@ -165,16 +432,28 @@ def load_logged_experiments():
     if not os.path.isdir(LOGGING_DIR):
         return logged_experiments
 
-    for exp_folder in os.listdir(LOGGING_DIR):
-        exp_path = os.path.join(LOGGING_DIR, exp_folder)
+    # Zipped experiments are listed by their archive name, a folder of the same name wins
+    sources = [(name, os.path.join(LOGGING_DIR, name), None) for name in os.listdir(LOGGING_DIR)]
+    folders = {name for name, exp_path, _ in sources if os.path.isdir(exp_path)}
+    sources.extend((name, path, path) for name, path in list_archives(LOGGING_DIR) if name not in folders)
+
+    for exp_folder, exp_path, archive_path in sources:
         results_file = os.path.join(exp_path, "results.json")
 
-        if os.path.isdir(exp_path) and os.path.exists(results_file):
+        if archive_path or (os.path.isdir(exp_path) and os.path.exists(results_file)):
             try:
-                with open(results_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                progress_info = tracker.get_experiment_progress(exp_folder)
+                if archive_path:
+                    # Only the central directory and the small result members are read
+                    archive = open_archive(archive_path)
+                    results_file = f"{archive_path}:results.json"
+                    data = archive.read_json("results.json")
+                    if data is None:
+                        continue
+                    progress_info = archive.progress()
+                else:
+                    with open(results_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    progress_info = tracker.get_experiment_progress(exp_folder)
                 total_tasks = progress_info['total_tasks']
                 completed_tasks = progress_info['completed_tasks']
                 uncompleted_task_ids = progress_info['uncompleted_task_ids']
@@ -199,9 +478,10 @@ def load_logged_experiments():
                     "tasks_failed_score_0": tasks_failed_score_0,
                     "uncompleted_task_ids": uncompleted_task_ids,
                     "path": exp_path,
+                    "archived": archive_path is not None,
                     "created_at": os.path.getctime(exp_path),
                 }
-            except (json.JSONDecodeError, IOError, TypeError) as e:
+            except (json.JSONDecodeError, IOError, TypeError, zipfile.BadZipFile) as e:
                 logger.error(f"Error processing {results_file}: {e}")
                 logged_experiments[exp_folder] = {
                     "error": str(e),
@@ -212,84 +492,79 @@ def load_logged_experiments():
     return logged_experiments
 
 
-def _kill_process_on_port(port=8989):
-    """Finds and forcefully kills the process running on a specific port."""
-    try:
-        if os.name == 'nt':
-            command = f"netstat -aon | findstr :{port}"
-            result = subprocess.run(command, capture_output=True, text=True, shell=True)
-            output = result.stdout.strip()
-            if not output:
-                logger.info(f"No process found on port {port}.")
-                return
-            match = re.search(r'LISTENING\s+(\d+)', output)
-            if not match:
-                logger.warning(f"Could not find PID for process on port {port} from netstat output.")
-                return
-            pid = match.group(1)
-            kill_command = f"taskkill /PID {pid} /F"
-            logger.info(f"Executing: {kill_command}")
-            subprocess.run(kill_command, capture_output=True, text=True, shell=True, check=True)
-            logger.info(f"Successfully killed process with PID {pid} on port {port}.")
-        else:
-            command = f"lsof -t -i:{port}"
-            result = subprocess.run(command, capture_output=True, text=True, shell=True)
-            pids = result.stdout.strip().split()
-            if not pids:
-                logger.info(f"No process found on port {port}.")
-                return
-            for pid in pids:
-                kill_command = f"kill -9 {pid}"
-                logger.info(f"Executing: {kill_command}")
-                subprocess.run(kill_command, shell=True)
-                logger.info(f"Successfully killed process with PID {pid} on port {port}.")
-    except Exception as e:
-        logger.error(f"An error occurred while trying to kill process on port {port}: {e}")
+def _start_evaluator(
+    exp_name, cpu_ids: Optional[List[int]] = None, extra_env: Optional[Dict[str, str]] = None
+):
+    """Launch the evaluation script for an experiment, pinned to the given CPUs"""
+    command = [sys.executable, "./evaluation/appworld_eval.py", "--eval_key", exp_name]
+
+    env = os.environ.copy()
+    env.update(extra_env or {})
+    if cpu_ids:
+        # Keep numeric libraries inside the CPU slots reserved by the scheduler
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            env[var] = str(len(cpu_ids))
+
+    flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        creationflags=flags,
+        env=env,
+    )
+
+    if cpu_ids and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(process.pid, cpu_ids)
+        except OSError as e:
+            logger.warning(f"Could not pin experiment '{exp_name}' to CPUs {cpu_ids}: {e}")
+    return process
+
+
+def _wait_evaluator(process: subprocess.Popen, run_log: RunLog, prefix: str = "") -> int:
+    """Stream an evaluator's output into the run log and wait for it to exit"""
+    # Drain both pipes line by line so neither can fill up and block the child
+    stderr_thread = threading.Thread(
+        target=run_log.pump, args=(process.stderr, "stderr", prefix), daemon=True
+    )
+    stderr_thread.start()
+    run_log.pump(process.stdout, "stdout", prefix)
+    stderr_thread.join()
+    return process.wait()
 
 
-def _execute_experiment_subprocess(exp_name):
-    """Execute experiment subprocess matching eval_gui.py implementation"""
+def _execute_experiment_subprocess(
+    exp_name, cpu_ids: Optional[List[int]] = None, extra_env: Optional[Dict[str, str]] = None
+):
+    """Execute experiment subprocess, streaming its output into experiment.log"""
     global active_runs, processes
 
     experiment_log_path = os.path.join(OUTPUT_DIR, exp_name, "experiment.log")
-    os.makedirs(os.path.dirname(experiment_log_path), exist_ok=True)
-
-    command = [sys.executable, "./evaluation/appworld_eval.py", "--eval_key", exp_name]
+    run_log = RunLog(experiment_log_path)
 
     try:
-        flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            creationflags=flags,
-        )
+        process = _start_evaluator(exp_name, cpu_ids, extra_env)
 
         processes[exp_name] = process
         logger.info(f"Experiment '{exp_name}' process started with PID: {process.pid}")
 
         active_runs[exp_name] = {'status': 'running', 'details': f"PID: {process.pid}. Running..."}
 
-        stdout_output, stderr_output = process.communicate()
+        return_code = _wait_evaluator(process, run_log)
 
-        if stdout_output:
-            logger.info(f"Experiment Stdout:\n{stdout_output.strip()}")
-        if stderr_output:
-            logger.error(f"Experiment Stderr:\n{stderr_output.strip()}")
-
-        return_code = process.returncode
-
-        if return_code == 0 and not stderr_output:
+        if return_code == 0 and not run_log.stderr_seen:
             active_runs[exp_name] = {'status': 'completed', 'details': "Successfully completed."}
             logger.info(f"Experiment '{exp_name}' completed successfully with exit code 0.")
         else:
             error_details = f"Exited with error code {return_code}."
-            if stderr_output:
-                error_details += f"\nError Output:\n{stderr_output.strip()[:500]}..."
+            stderr_tail = "\n".join(run_log.stderr_tail)
+            if stderr_tail:
+                error_details += f"\nError Output:\n{stderr_tail[-500:]}..."
             active_runs[exp_name] = {'status': 'failed', 'details': error_details}
-            logger.error(f"Experiment '{exp_name}' failed with code {return_code}. Stderr:\n{stderr_output}")
+            logger.error(f"Experiment '{exp_name}' failed with code {return_code}. See {experiment_log_path}")
 
     except FileNotFoundError:
         active_runs[exp_name] = {'status': 'failed', 'details': "Error: evaluation script not found."}
@@ -299,14 +574,228 @@ def _execute_experiment_subprocess(exp_name):
         active_runs[exp_name] = {'status': 'failed', 'details': error_message}
         logger.error(f"Error starting experiment '{exp_name}' process: {e}")
     finally:
+        run_log.close()
         if exp_name in processes:
             del processes[exp_name]
 
 
+def _execute_sharded_experiment(
+    exp_name,
+    experiment_dir: str,
+    task_ids: List[str],
+    shards: int,
+    cpu_ids: Optional[List[int]] = None,
+    is_cancelled=lambda: False,
+    extra_env: Optional[Dict[str, str]] = None,
+):
+    """
+    Run an experiment's tasks across several evaluator processes writing into one experiment folder.
+
+    Each shard worker repeatedly takes a batch from a ShardPlanner, hands it to a fresh evaluator
+    process through a task list file, and folds the shard's results into results.json when the
+    batch is done. The shared .progress file gives one aggregated progress view.
+    """
+    experiment_log_path = os.path.join(OUTPUT_DIR, exp_name, "experiment.log")
+    run_log = RunLog(experiment_log_path)
+    shard_dir = os.path.join(OUTPUT_DIR, exp_name, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+
+    planner = ShardPlanner(task_ids, shards)
+    shard_planners[exp_name] = planner
+    shard_runs[exp_name] = {"experiment_dir": experiment_dir, **planner.state()}
+    cpu_groups = split_cpus(cpu_ids or [], shards)
+    results_lock = threading.Lock()
+    failures: List[str] = []
+
+    def run_shard(shard_id: int):
+        while not is_cancelled():
+            batch = planner.next_batch(shard_id)
+            if not batch:
+                return
+            shard_runs[exp_name] = {"experiment_dir": experiment_dir, **planner.state()}
+            tasks_file = os.path.join(shard_dir, f"shard-{shard_id}.tasks.json")
+            with open(tasks_file, 'w', encoding='utf-8') as f:
+                json.dump(batch, f)
+
+            process_key = f"{exp_name}#shard-{shard_id}"
+            try:
+                process = _start_evaluator(
+                    exp_name,
+                    cpu_groups[shard_id],
+                    {
+                        EXPERIMENT_FOLDER_ENV: os.path.abspath(experiment_dir),
+                        TASK_IDS_FILE_ENV: tasks_file,
+                        SHARD_ID_ENV: str(shard_id),
+                        **(extra_env or {}),
+                    },
+                )
+            except (FileNotFoundError, OSError) as e:
+                failures.append(f"shard {shard_id}: {e}")
+                planner.drain()
+                return
+            processes[process_key] = process
+            logger.info(f"Shard {shard_id} of '{exp_name}' started {len(batch)} task(s), PID: {process.pid}")
+            try:
+                return_code = _wait_evaluator(process, run_log, prefix=f"[shard {shard_id}] ")
+            finally:
+                processes.pop(process_key, None)
+
+            if return_code != 0 and not is_cancelled():
+                failures.append(f"shard {shard_id} exited with code {return_code}")
+            with results_lock:
+                ActivityTracker.consolidate_shard_results(experiment_dir)
+
+    def shard_worker(shard_id: int):
+        # An exception would otherwise end the thread unnoticed and the run would report success
+        try:
+            run_shard(shard_id)
+        except Exception as e:
+            logger.error(f"Shard {shard_id} of '{exp_name}' crashed: {e}")
+            failures.append(f"shard {shard_id}: {e}")
+            planner.drain()
+
+    active_runs[exp_name] = {
+        'status': 'running',
+        'details': f"Running {len(task_ids)} task(s) across {shards} shard(s)...",
+    }
+    workers = [
+        threading.Thread(
+            target=shard_worker, args=(shard_id,), name=f"{exp_name}-shard-{shard_id}", daemon=True
+        )
+        for shard_id in range(shards)
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        with results_lock:
+            ActivityTracker.consolidate_shard_results(experiment_dir)
+            for file_name in os.listdir(experiment_dir):
+                if file_name.startswith("results.shard-") and file_name.endswith(".json"):
+                    os.remove(os.path.join(experiment_dir, file_name))
+
+        if failures:
+            active_runs[exp_name] = {'status': 'failed', 'details': "; ".join(failures)[:500]}
+            logger.error(f"Sharded experiment '{exp_name}' had failures: {failures}")
+        else:
+            active_runs[exp_name] = {'status': 'completed', 'details': "Successfully completed."}
+            logger.info(f"Sharded experiment '{exp_name}' completed across {shards} shard(s).")
+    finally:
+        run_log.close()
+
+
+def _resolve_experiment_dir(exp_name: str, experiment_folder: Optional[str] = None) -> Optional[str]:
+    """Find the logged experiment folder a run should write into"""
+    logging_root = Path(LOGGING_DIR).resolve()
+    for name in (experiment_folder, exp_name):
+        if not name:
+            continue
+        candidate = (logging_root / name).resolve()
+        if candidate.parent == logging_root and (candidate / "metadata.json").exists():
+            return str(candidate)
+    return None
+
+
+def _run_scheduled(run: QueuedRun):
+    """Scheduler runner executing a dequeued run on its reserved CPU slots"""
+    exp_name = run.experiment_name
+    active_runs[exp_name] = {'status': 'starting', 'details': 'Experiment process initiated.'}
+    shards = run.options.get("shards", 1)
+    mode = run.options.get("mode", RUN_MODE_FULL)
+    capture_env = (
+        {CAPTURE_LEVEL_ENV: run.options["capture_level"]} if run.options.get("capture_level") else {}
+    )
+
+    if shards > 1 or mode != RUN_MODE_FULL:
+        experiment_dir = _resolve_experiment_dir(exp_name, run.options.get("experiment_folder"))
+        if not experiment_dir:
+            active_runs[exp_name] = {
+                'status': 'failed',
+                'details': "This run needs an experiment folder with a metadata.json.",
+            }
+            return
+        # Tasks are selected when the run starts, not when it was queued
+        task_ids = ActivityTracker.select_tasks_to_run(experiment_dir, mode)
+        if not task_ids:
+            active_runs[exp_name] = {'status': 'completed', 'details': "No tasks left to run."}
+            return
+        if mode == RUN_MODE_RERUN_FAILED:
+            ActivityTracker.reset_task_progress(experiment_dir, task_ids)
+        logger.info(f"Running {len(task_ids)} task(s) of '{exp_name}' in {mode} mode")
+
+        if shards > 1:
+            _execute_sharded_experiment(
+                exp_name,
+                experiment_dir,
+                task_ids,
+                shards,
+                cpu_ids=run.cpu_ids,
+                is_cancelled=lambda: run.status == CANCELLED,
+                extra_env=capture_env,
+            )
+        else:
+            tasks_file = os.path.join(OUTPUT_DIR, exp_name, "run.tasks.json")
+            os.makedirs(os.path.dirname(tasks_file), exist_ok=True)
+            with open(tasks_file, 'w', encoding='utf-8') as f:
+                json.dump(task_ids, f)
+            _execute_experiment_subprocess(
+                exp_name,
+                cpu_ids=run.cpu_ids,
+                extra_env={
+                    EXPERIMENT_FOLDER_ENV: experiment_dir,
+                    TASK_IDS_FILE_ENV: tasks_file,
+                    **capture_env,
+                },
+            )
+    else:
+        _execute_experiment_subprocess(exp_name, cpu_ids=run.cpu_ids, extra_env=capture_env)
+    if run.status == CANCELLED:
+        active_runs[exp_name] = {'status': 'cancelled', 'details': "Cancelled by user."}
+
+
+def _cancel_running(run: QueuedRun):
+    """Terminate the processes of a running experiment that was cancelled"""
+    if run.experiment_name in shard_planners:
+        shard_planners[run.experiment_name].drain()
+    for key, process in list(processes.items()):
+        if key != run.experiment_name and not key.startswith(f"{run.experiment_name}#"):
+            continue
+        if process.poll() is None:
+            logger.info(f"Terminating experiment '{run.experiment_name}' PID: {process.pid}")
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def _active_runs_view() -> Dict[str, Any]:
+    """Run statuses merged with queue positions and interrupted runs from the scheduler"""
+    runs = active_runs.to_dict()
+    snapshot = run_scheduler.snapshot()
+    for position, run in enumerate(snapshot["queued"], start=1):
+        runs[run["experiment_name"]] = {
+            'status': 'queued',
+            'details': f"Waiting in queue at position {position}.",
+        }
+    for run in snapshot["interrupted"]:
+        if runs.get(run["experiment_name"], {}).get('status') in (None, 'starting', 'running'):
+            runs[run["experiment_name"]] = {
+                'status': 'interrupted',
+                'details': "Server restarted while the experiment was running.",
+            }
+    return runs
+
+
+run_scheduler: Optional[RunScheduler] = None
+
+
 # ===== EXPERIMENT MANAGEMENT ENDPOINTS =====
 
 
-@app.get("/api/experiments/config")
+@router.get("/api/experiments/config")
 async def get_experiment_config():
     """Get available experiment configurations from settings"""
     try:
@@ -342,7 +831,7 @@ async def get_experiment_config():
         raise HTTPException(status_code=500, detail=f"Error getting experiment config: {str(e)}")
 
 
-@app.get("/api/experiments/logged")
+@router.get("/api/experiments/logged")
 async def get_logged_experiments(page: int = 1, per_page: int = 15, search: str = ""):
     """Get list of logged experiments with pagination and search"""
     try:
@@ -390,7 +879,7 @@ async def get_logged_experiments(page: int = 1, per_page: int = 15, search: str
         raise HTTPException(status_code=500, detail=f"Error reading experiments: {str(e)}")
 
 
-@app.get("/api/experiments/active")
+@router.get("/api/experiments/active")
 async def get_active_experiments():
     """Get list of currently active/running experiments"""
     try:
@@ -400,17 +889,17 @@ async def get_active_experiments():
             if process.poll() is not None:  # Process has finished
                 finished_processes.append(exp_name)
                 if exp_name in active_runs:
-                    active_runs[exp_name]['status'] = 'completed' if process.returncode == 0 else 'failed'
-                    active_runs[exp_name]['details'] = (
-                        f"Process finished with return code {process.returncode}"
-                    )
+                    active_runs[exp_name] = {
+                        'status': 'completed' if process.returncode == 0 else 'failed',
+                        'details': f"Process finished with return code {process.returncode}",
+                    }
 
         # Remove finished processes from tracking
         for exp_name in finished_processes:
             processes.pop(exp_name, None)
 
         return JSONResponse(
-            content={"active_runs": active_runs},
+            content={"active_runs": await asyncio.to_thread(_active_runs_view)},
             headers={
                 "Cache-Control": "no-cache, no-store, must-revalidate",
                 "Pragma": "no-cache",
@@ -421,30 +910,155 @@ async def get_active_experiments():
         raise HTTPException(status_code=500, detail=f"Error getting active experiments: {str(e)}")
 
 
-@app.post("/api/experiments/run")
-async def run_experiment(experiment: ExperimentRun, background_tasks: BackgroundTasks):
-    """Start running an experiment"""
-    exp_name = experiment.experiment_name
+@router.get("/api/events")
+async def stream_events(
+    request: Request,
+    cursor: Optional[str] = None,
+    experiment: Optional[str] = None,
+    task_id: Optional[str] = None,
+):
+    """
+    Server-Sent Events stream of step-appended, task-finished and experiment-progress deltas.
+
+    Reconnecting clients resume from `cursor` or the `Last-Event-ID` header. When the cursor
+    is too old to be replayed, or was issued by another server worker, a `reset` event tells
+    the client to re-fetch the full state.
+    """
+    resume_id = cursor if cursor is not None else request.headers.get("last-event-id")
+    start = event_bus.parse_event_id(resume_id) if resume_id else None
+    # Ids of another worker's or an earlier process's bus cannot be resumed from
+    foreign = bool(resume_id) and start is None
+    if start is None:
+        start = event_bus.last_seq
+
+    experiment_watcher.start()
+
+    def reset_event(seq: int) -> str:
+        return format_sse(
+            {"id": seq, "type": RESET, "experiment": experiment or "", "ts": 0, "data": {}}, event_bus
+        )
+
+    async def event_stream():
+        position = start
+        if experiment:
+            experiment_watcher.watch(experiment)
+        try:
+            yield "retry: 3000\n\n"
+            if foreign:
+                yield reset_event(position)
+            while not await request.is_disconnected():
+                events, next_cursor, expired = event_bus.events_since(position, experiment, task_id)
+                if expired:
+                    yield reset_event(next_cursor)
+                    position = next_cursor
+                    continue
+                for event in events:
+                    yield format_sse(event, event_bus)
+                position = next_cursor
+                if not await event_bus.wait_for_events(position, timeout=15):
+                    yield ": keep-alive\n\n"
+        finally:
+            if experiment:
+                experiment_watcher.unwatch(experiment)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "X-Accel-Buffering": "no",
+        },
+    )
 
-    # Check if experiment is already running
-    if exp_name in processes and processes[exp_name].poll() is None:
-        raise HTTPException(status_code=400, detail=f"Experiment '{exp_name}' is already running")
+
+@router.post("/api/experiments/run")
+async def run_experiment(experiment: ExperimentRun):
+    """Queue an experiment run, it starts as soon as a run slot and enough CPU slots are free"""
+    exp_name = experiment.experiment_name
 
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # Update active runs
-    active_runs[exp_name] = {'status': 'starting', 'details': 'Experiment process initiated.'}
+    if experiment.mode not in RUN_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(RUN_MODES)}")
+    if experiment.capture_level is not None:
+        try:
+            validate_capture_level(experiment.capture_level)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    options = {}
+    task_count = None
+    if experiment.shards > 1 or experiment.mode != RUN_MODE_FULL:
+        # Sharded, resumed and rerun experiments write into an existing experiment folder
+        experiment_dir = _resolve_experiment_dir(exp_name, experiment.experiment_folder)
+        if not experiment_dir or not read_experiment_task_ids(experiment_dir):
+            raise HTTPException(
+                status_code=404,
+                detail="This run needs a logged experiment folder whose metadata.json lists task_ids",
+            )
+        task_count = len(ActivityTracker.select_tasks_to_run(experiment_dir, experiment.mode))
+        options = {
+            "shards": experiment.shards,
+            "mode": experiment.mode,
+            "experiment_folder": os.path.basename(experiment_dir),
+        }
+    if experiment.capture_level is not None:
+        options["capture_level"] = experiment.capture_level
+
+    # A sharded run reserves one CPU slot per shard unless told otherwise, shards share CPUs beyond that
+    cpus = experiment.cpus or min(experiment.shards, run_scheduler.cpu_slots)
+    try:
+        run = run_scheduler.submit(exp_name, priority=experiment.priority, cpus=cpus, options=options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    position = run_scheduler.position(exp_name)
+    status = 'queued' if position is not None else 'starting'
+
+    return JSONResponse(
+        content={
+            "message": f"Experiment {exp_name} {'queued' if position else 'started'}",
+            "status": status,
+            "run_id": run.run_id,
+            "queue_position": position,
+            "task_count": task_count,
+        },
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+@router.get("/api/experiments/queue")
+async def get_run_queue():
+    """Get queued and running experiment runs together with the scheduler limits"""
+    return JSONResponse(
+        content=run_scheduler.snapshot(),
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
 
-    # Start experiment in background thread
-    def run_in_background():
-        _execute_experiment_subprocess(exp_name)
 
-    thread = threading.Thread(target=run_in_background, daemon=True)
-    thread.start()
+@router.get("/api/experiments/{experiment_name}/shards")
+async def get_shard_progress(experiment_name: str):
+    """Get per-shard and aggregated progress of a sharded run"""
+    if experiment_name not in shard_runs:
+        raise HTTPException(status_code=404, detail=f"No sharded run found for {experiment_name}")
 
+    shard_run = shard_runs[experiment_name]
+    experiment_dir = shard_run["experiment_dir"]
+    completed_task_ids = await asyncio.to_thread(read_completed_task_ids, experiment_dir)
     return JSONResponse(
-        content={"message": f"Experiment {exp_name} started", "status": "starting"},
+        content={
+            "experiment_folder": os.path.basename(experiment_dir),
+            **shard_progress(shard_run["assigned"], shard_run["pending"], completed_task_ids),
+        },
         headers={
             "Cache-Control": "no-cache, no-store, must-revalidate",
             "Pragma": "no-cache",
@@ -453,39 +1067,151 @@ async def run_experiment(experiment: ExperimentRun, background_tasks: Background
     )
 
 
-@app.post("/api/experiments/join")
+@router.post("/api/experiments/{experiment_name}/cancel")
+async def cancel_experiment(experiment_name: str):
+    """Cancel a queued or running experiment"""
+    run = await asyncio.to_thread(run_scheduler.cancel, experiment_name)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Experiment {experiment_name} is not queued or running")
+
+    active_runs[experiment_name] = {'status': 'cancelled', 'details': "Cancelled by user."}
+    return JSONResponse(
+        content={"message": f"Experiment {experiment_name} cancelled", "run_id": run.run_id},
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+def _run_merge_job(
+    job_id: str,
+    experiment_names: List[str],
+    new_name: str,
+    policy: str = BEST_SCORE,
+    agent_v: Optional[str] = None,
+):
+    """Merge experiments in the background, publishing progress to the shared job record"""
+    job = merge_jobs[job_id]
+    last_update = 0.0
+
+    def report(phase: str, done: int, total: int):
+        nonlocal last_update
+        # Throttle writes to the shared state, phase changes and completion always get through
+        now = time.time()
+        if phase == job.get("phase") and done < total and now - last_update < 0.25:
+            return
+        last_update = now
+        job.update({"phase": phase, "done": done, "total": total})
+        merge_jobs[job_id] = job
+
+    with merge_lock:
+        job.update({"status": "running", "started_at": time.time()})
+        merge_jobs[job_id] = job
+        try:
+            job["merged_folder"] = tracker.merge_experiments(
+                experiment_folders=experiment_names,
+                output_experiment_name=new_name,
+                progress=report,
+                policy=policy,
+                agent_v=agent_v,
+            )
+            job["status"] = "finished"
+        except Exception as e:
+            logger.error(f"Merge job {job_id} failed: {e}")
+            job.update({"status": "failed", "error": str(e)})
+        job["finished_at"] = time.time()
+        merge_jobs[job_id] = job
+
+
+@router.post("/api/experiments/join", status_code=202)
 async def join_experiments(join_request: JoinExperiments):
-    """Join multiple experiments into a new one using ActivityTracker.merge_experiments"""
+    """Start joining multiple experiments into a new one with ActivityTracker.merge_experiments"""
     try:
-        # Validate that all source experiments exist
-        for exp_name in join_request.experiment_names:
-            exp_path = os.path.join(LOGGING_DIR, exp_name)
-            if not os.path.exists(exp_path):
-                raise HTTPException(status_code=404, detail=f"Experiment {exp_name} not found")
-
-        # Use ActivityTracker's merge functionality like eval_gui.py
-        merged_folder = tracker.merge_experiments(
-            experiment_folders=join_request.experiment_names, output_experiment_name=join_request.new_name
-        )
+        validate_merge_policy(join_request.policy, join_request.agent_v)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Validate that all source experiments exist
+    for exp_name in join_request.experiment_names:
+        _experiment_path(exp_name)
+
+    # Forget jobs finished more than a day ago
+    for old_id, old_job in merge_jobs.to_dict().items():
+        if old_job.get("finished_at") and time.time() - old_job["finished_at"] > 86400:
+            merge_jobs.pop(old_id, None)
+
+    job_id = uuid.uuid4().hex[:12]
+    merge_jobs[job_id] = {
+        "job_id": job_id,
+        "status": "queued",
+        "experiment_names": join_request.experiment_names,
+        "new_experiment": join_request.new_name,
+        "policy": join_request.policy,
+        "agent_v": join_request.agent_v,
+        "phase": "queued",
+        "done": 0,
+        "total": 0,
+        "created_at": time.time(),
+    }
+    threading.Thread(
+        target=_run_merge_job,
+        args=(
+            job_id,
+            join_request.experiment_names,
+            join_request.new_name,
+            join_request.policy,
+            join_request.agent_v,
+        ),
+        name=f"merge-{job_id}",
+        daemon=True,
+    ).start()
 
-        return JSONResponse(
-            content={
-                "message": f"Successfully joined '{', '.join(join_request.experiment_names)}' into '{join_request.new_name}'",
-                "new_experiment": join_request.new_name,
-                "merged_folder": merged_folder,
-            },
-            headers={
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0",
-            },
-        )
+    return JSONResponse(
+        status_code=202,
+        content={
+            "message": f"Joining '{', '.join(join_request.experiment_names)}' into '{join_request.new_name}'",
+            "new_experiment": join_request.new_name,
+            "job_id": job_id,
+        },
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error joining experiments: {str(e)}")
+
+@router.get("/api/experiments/join/policies")
+async def get_merge_policies():
+    """Merge policies accepted by /api/experiments/join"""
+    return JSONResponse(
+        content={"policies": MERGE_POLICIES, "default": BEST_SCORE},
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
 
 
-@app.post("/api/experiments/delete")
+@router.get("/api/experiments/join/{job_id}")
+async def get_join_job(job_id: str):
+    """Status and progress of a join started with /api/experiments/join"""
+    job = await asyncio.to_thread(merge_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Join job {job_id} not found")
+    return JSONResponse(
+        content=job,
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+@router.post("/api/experiments/delete")
 async def delete_experiments(delete_request: DeleteExperiments):
     """Delete multiple experiment directories and all their contents"""
     try:
@@ -503,8 +1229,15 @@ async def delete_experiments(delete_request: DeleteExperiments):
             exp_path = exp_info.get("path")
             if exp_path and os.path.exists(exp_path):
                 try:
-                    logger.info(f"Attempting to delete directory: {exp_path}")
-                    shutil.rmtree(exp_path)
+                    if exp_info.get("archived"):
+                        logger.info(f"Attempting to delete archive: {exp_path}")
+                        forget_archive(exp_path)
+                        os.remove(exp_path)
+                    else:
+                        logger.info(f"Attempting to delete directory: {exp_path}")
+                        shutil.rmtree(exp_path)
+                    search_indexes.pop(str(Path(exp_path).resolve()), None)
+                    trajectory_packs.pop(str(Path(exp_path).resolve()), None)
                     logger.info(f"Successfully deleted: {exp_path}")
                     deleted_count += 1
                 except OSError as e:
@@ -535,7 +1268,139 @@ async def delete_experiments(delete_request: DeleteExperiments):
         raise HTTPException(status_code=500, detail=f"Error deleting experiments: {str(e)}")
 
 
-@app.get("/api/experiments/{experiment_name}/download")
+@router.post("/api/experiments/consistency")
+async def get_consistency(consistency_request: ConsistencyRequest):
+    """pass@k, pass^k, flip rate and per-site variance over repeated runs of the same tasks"""
+    # NumPy is only needed here, keep it out of server startup
+    from dashboard.analytics import analyze_experiments
+
+    if not consistency_request.experiment_names:
+        raise HTTPException(status_code=400, detail="experiment_names must not be empty")
+    if any(k < 1 for k in consistency_request.k):
+        raise HTTPException(status_code=400, detail="k must be at least 1")
+    experiment_dirs = [str(_experiment_path(name)) for name in consistency_request.experiment_names]
+    try:
+        report = await asyncio.to_thread(analyze_experiments, experiment_dirs, consistency_request.k)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Results not found: {e.filename}")
+
+    return JSONResponse(
+        content=report,
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+def _step_table_frame(experiment_dirs: Dict[str, str]) -> "pd.DataFrame":
+    from dashboard.step_table import StepTable, step_frame
+
+    tables = {}
+    for name, experiment_dir in experiment_dirs.items():
+        with step_tables_lock:
+            table = step_tables.get(experiment_dir)
+            if table is None:
+                table = step_tables[experiment_dir] = StepTable(experiment_dir)
+        table.refresh()
+        tables[name] = table
+    return step_frame(tables)
+
+
+@router.post("/api/experiments/steps/groupby")
+async def group_experiment_steps(group_request: StepGroupByRequest):
+    """Aggregate the step-level table of experiments by agent, action type, URL host, outcome and more"""
+    # NumPy and pandas are only needed here, keep them out of server startup
+    from dashboard.step_table import group_steps
+
+    if not group_request.experiment_names:
+        raise HTTPException(status_code=400, detail="experiment_names must not be empty")
+    experiment_dirs = {name: str(_experiment_path(name)) for name in group_request.experiment_names}
+    frame = await asyncio.to_thread(_step_table_frame, experiment_dirs)
+    try:
+        groups = await asyncio.to_thread(
+            group_steps,
+            frame,
+            group_request.by,
+            group_request.outcome,
+            group_request.sort,
+            group_request.limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(
+        content={
+            "by": group_request.by,
+            "outcome": group_request.outcome,
+            "total_steps": len(frame),
+            "groups": groups,
+        },
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+@router.post("/api/experiments/scan")
+async def scan_experiments(scan_request: ScanRequest):
+    """Stream regex matches over the trajectory steps of experiments as NDJSON"""
+    if not scan_request.experiment_names:
+        raise HTTPException(status_code=400, detail="experiment_names must not be empty")
+    experiment_dirs = {name: str(_experiment_path(name)) for name in scan_request.experiment_names}
+    targets = await asyncio.to_thread(scan_targets, experiment_dirs)
+    try:
+        scan = RegexScan(
+            targets,
+            scan_request.pattern,
+            fields=scan_request.fields,
+            ignore_case=scan_request.ignore_case,
+            limit=scan_request.limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    regex_scans[scan.scan_id] = scan
+
+    async def stream():
+        try:
+            async for line in scan.ndjson():
+                yield line
+        finally:
+            regex_scans.pop(scan.scan_id, None)
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "X-Accel-Buffering": "no",
+            "X-Scan-Id": scan.scan_id,
+        },
+    )
+
+
+@router.delete("/api/experiments/scan/{scan_id}")
+async def cancel_scan(scan_id: str):
+    """Cancel a regex scan started on this worker"""
+    scan = regex_scans.get(scan_id)
+    if scan is None:
+        raise HTTPException(status_code=404, detail=f"Scan {scan_id} not found")
+    scan.cancel()
+    return JSONResponse(
+        content={"scan_id": scan_id, "cancelled": True},
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+@router.get("/api/experiments/{experiment_name}/download")
 async def download_experiment(experiment_name: str):
     """Create and return a zip file of the experiment"""
     experiments = load_logged_experiments()
@@ -547,6 +1412,9 @@ async def download_experiment(experiment_name: str):
     exp_path = exp_info.get("path")
     if not exp_path or not os.path.exists(exp_path):
         raise HTTPException(status_code=404, detail=f"Experiment folder not found for {experiment_name}")
+    if exp_info.get("archived"):
+        # Already a zip, hand it out as is
+        return FileResponse(exp_path, media_type='application/zip', filename=f"{experiment_name}.zip")
 
     try:
         # Create a temporary zip file
@@ -563,7 +1431,36 @@ async def download_experiment(experiment_name: str):
         raise HTTPException(status_code=500, detail=f"Error creating zip: {str(e)}")
 
 
-@app.get("/api/experiments/{experiment_name}/tasks/uncompleted")
+@router.get("/api/experiments/{experiment_name}/log")
+async def tail_experiment_log(
+    experiment_name: str, since: int = -1, generation: Optional[int] = None, limit: int = 1000
+):
+    """
+    Tail the output of an experiment run from the byte offset and log generation of the previous response.
+
+    Served from the log file and the shared run state, so every server worker answers the same
+    whichever of them is running the experiment.
+    """
+    log_path = Path(OUTPUT_DIR) / experiment_name / "experiment.log"
+    if log_path.resolve().parent.parent != Path(OUTPUT_DIR).resolve():
+        raise HTTPException(status_code=404, detail="Log not found")
+    status = (active_runs.get(experiment_name) or {}).get('status')
+    running = status in ('starting', 'running')
+    if not running and not log_path.exists():
+        raise HTTPException(status_code=404, detail=f"No log found for experiment {experiment_name}")
+    content = await asyncio.to_thread(read_log_tail, str(log_path), since, generation, limit)
+    content["running"] = running
+    return JSONResponse(
+        content=content,
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+@router.get("/api/experiments/{experiment_name}/tasks/uncompleted")
 async def get_uncompleted_tasks(experiment_name: str):
     """Get uncompleted tasks for an experiment"""
     experiments = load_logged_experiments()
@@ -589,7 +1486,7 @@ async def get_uncompleted_tasks(experiment_name: str):
     )
 
 
-@app.get("/api/experiments/{experiment_name}/tasks/failed")
+@router.get("/api/experiments/{experiment_name}/tasks/failed")
 async def get_failed_tasks(experiment_name: str):
     """Get failed tasks (score 0) for an experiment"""
     experiments = load_logged_experiments()
@@ -615,88 +1512,97 @@ async def get_failed_tasks(experiment_name: str):
     )
 
 
-@app.post("/api/dashboard/start")
+@router.post("/api/dashboard/start")
 async def start_dashboard(request: DashboardRequest):
-    """Start the dashboard subprocess for a given experiment"""
-    global dashboard_process, dashboard_exp_name
-
+    """Open the dashboard for an experiment, served in-process by the experiment-scoped routes"""
     exp_name = request.experiment_name
+    archive = _experiment_archive(exp_name)
+    if archive is not None:
+        if not archive.has("results.json"):
+            raise HTTPException(status_code=404, detail=f"Experiment {exp_name} not found")
+    elif not (_experiment_path(exp_name) / "results.json").exists():
+        raise HTTPException(status_code=404, detail=f"Experiment {exp_name} not found")
 
-    if dashboard_process and dashboard_process.poll() is None:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Another dashboard is already running for {dashboard_exp_name}. Please close it first.",
-        )
+    return JSONResponse(
+        content={
+            "message": f"Dashboard available for {exp_name}",
+            "pid": os.getpid(),
+            "url": f"/dashboard?experiment={quote(exp_name)}",
+        },
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
 
-    experiments = load_logged_experiments()
-    if exp_name not in experiments:
-        raise HTTPException(status_code=404, detail=f"Experiment {exp_name} not found")
 
-    folder_path = os.path.join(LOGGING_DIR, exp_name)
-    logger.info(f"Open dashboard for {folder_path}")
-    command = [sys.executable, "-m", "dashboard.cli", "start", folder_path, "--port", "8989"]
+@router.post("/api/dashboard/stop")
+async def stop_dashboard():
+    """Kept for older clients, in-process dashboards have nothing to stop"""
+    return JSONResponse(
+        content={"message": "Dashboard stopped successfully"},
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
 
-    try:
-        flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        process = subprocess.Popen(command, creationflags=flags)
 
-        dashboard_process = process
-        dashboard_exp_name = exp_name
-        logger.info(f"Dashboard started for '{exp_name}' with PID: {process.pid}")
+@router.get("/api/dashboard/status")
+async def get_dashboard_status():
+    """Get the dashboard status, every experiment can be viewed at any time"""
+    return JSONResponse(
+        content={
+            "is_running": True,
+            "experiment_name": None,
+            "pid": os.getpid(),
+        },
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
 
-        return JSONResponse(
-            content={
-                "message": f"Dashboard started for {exp_name}",
-                "pid": process.pid,
-                "url": "http://localhost:8989/dashboard",
-            },
-            headers={
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0",
-            },
-        )
 
-    except FileNotFoundError:
-        dashboard_process = None
-        dashboard_exp_name = None
-        logger.error(
-            "Dashboard command not found. Please ensure the 'dashboard' tool is installed and in your system's PATH."
-        )
-        raise HTTPException(
-            status_code=500,
-            detail="The 'dashboard' command was not found. Is the dashboard tool installed and in your system's PATH?",
-        )
-    except Exception as e:
-        dashboard_process = None
-        dashboard_exp_name = None
-        raise HTTPException(
-            status_code=500, detail=f"An unexpected error occurred while starting dashboard: {e}"
-        )
+@router.get("/api/experiments/{experiment_name}/data_table")
+async def get_experiment_data_table(experiment_name: str) -> JSONResponse:
+    """Get the results table of an experiment"""
+    return await get_csv_as_json(experiment_name=experiment_name)
 
 
-@app.post("/api/dashboard/stop")
-async def stop_dashboard():
-    """Stop the currently running dashboard subprocess"""
-    global dashboard_process, dashboard_exp_name
+@router.get("/api/experiments/{experiment_name}/stats")
+async def get_experiment_statistics(experiment_name: str):
+    """Get the statistics tables of an experiment"""
+    return await generate_statistics(experiment_name=experiment_name)
 
-    if dashboard_process and dashboard_process.poll() is None:
-        logger.info(f"Attempting to terminate dashboard process PID: {dashboard_process.pid}")
-        dashboard_process.terminate()
-        try:
-            dashboard_process.wait(timeout=2)
-            logger.info("Dashboard process terminated.")
-        except subprocess.TimeoutExpired:
-            logger.warning("Dashboard process did not terminate gracefully, will force kill by port.")
 
-    logger.info("Forcefully clearing port 8989 to ensure server is down...")
-    _kill_process_on_port(8989)
+def _search_index(experiment_path: Path) -> SearchIndex:
+    with search_indexes_lock:
+        index = search_indexes.get(str(experiment_path))
+        if index is None:
+            index = search_indexes[str(experiment_path)] = SearchIndex(str(experiment_path))
+        return index
 
-    dashboard_process = None
-    dashboard_exp_name = None
+
+@router.get("/api/experiments/{experiment_name}/search")
+async def search_experiment(
+    experiment_name: str, q: str, mode: str = MODE_PHRASE, limit: int = 20, hits_per_task: int = 10
+):
+    """Full-text search over the intents, answers, plans, actions, URLs and prompts of an experiment"""
+    experiment_path = _experiment_path(experiment_name)
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q must not be empty")
+    index = await asyncio.to_thread(_search_index, experiment_path)
+    try:
+        results = await asyncio.to_thread(index.search, q, mode, limit, hits_per_task)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return JSONResponse(
-        content={"message": "Dashboard stopped successfully"},
+        content={"experiment": experiment_name, **results},
         headers={
             "Cache-Control": "no-cache, no-store, must-revalidate",
             "Pragma": "no-cache",
@@ -705,19 +1611,146 @@ async def stop_dashboard():
     )
 
 
-@app.get("/api/dashboard/status")
-async def get_dashboard_status():
-    """Get the current dashboard status"""
-    global dashboard_process, dashboard_exp_name
+def _trajectory_pack(experiment_path: Path) -> Optional[TrajectoryPack]:
+    if not has_pack(str(experiment_path)):
+        return None
+    with trajectory_packs_lock:
+        pack = trajectory_packs.get(str(experiment_path))
+        if pack is None:
+            pack = trajectory_packs[str(experiment_path)] = TrajectoryPack(str(experiment_path))
+        return pack
+
+
+def _trajectory_response(
+    chunks: Iterator[bytes], encoding: Optional[str], accept_encoding: Optional[str], length: int
+) -> Response:
+    """
+    Stream stored trajectory bytes. Compressed ones go out as they are, with Content-Encoding,
+    to clients accepting their encoding, and are decompressed on the fly for the others
+    """
+    headers = {
+        "Cache-Control": "no-cache, no-store, must-revalidate",
+        "Pragma": "no-cache",
+        "Expires": "0",
+    }
+    if encoding is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding is None or accepts_encoding(accept_encoding, encoding):
+        headers["Content-Length"] = str(length)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+    else:
+        chunks = decompress_chunks(chunks, encoding)
+    return StreamingResponse(chunks, media_type="application/json", headers=headers)
+
+
+async def _stored_trajectory(
+    experiment_path: Path, task_id: str, accept_encoding: Optional[str]
+) -> Optional[Response]:
+    """A trajectory of an experiment folder, loose in any form or from its pack; None if there is none"""
+    trajectory_path = await asyncio.to_thread(find_trajectory, str(experiment_path), task_id)
+    if trajectory_path is not None:
+        encoding = encoding_of(trajectory_path)
+        if encoding is None:
+            return FileResponse(
+                trajectory_path,
+                media_type="application/json",
+                headers={
+                    "Cache-Control": "no-cache, no-store, must-revalidate",
+                    "Pragma": "no-cache",
+                    "Expires": "0",
+                },
+            )
+        size = os.path.getsize(trajectory_path)
+        return _trajectory_response(file_chunks(trajectory_path), encoding, accept_encoding, size)
+
+    pack = await asyncio.to_thread(_trajectory_pack, experiment_path)
+    entry = await asyncio.to_thread(pack.get, task_id) if pack else None
+    if entry is None:
+        return None
+    return _trajectory_response(pack.iter_chunks(entry), None, accept_encoding, entry.length)
+
+
+def _archived_trajectory(
+    archive: ZipExperiment, task_id: str, accept_encoding: Optional[str]
+) -> Optional[Response]:
+    """Stream a trajectory out of a zipped experiment, None if the archive does not hold it"""
+    name = archive.find_trajectory(task_id) if "/" not in task_id else None
+    if name is None:
+        return None
+    return _trajectory_response(
+        archive.iter_chunks(name), encoding_of(name), accept_encoding, archive.size(name)
+    )
+
+
+@router.get("/api/experiments/{experiment_name}/trajectories/{task_id}")
+async def get_experiment_trajectory(experiment_name: str, task_id: str, request: Request):
+    """Get the trajectory of one task of an experiment"""
+    accept_encoding = request.headers.get("accept-encoding")
+    archive = await asyncio.to_thread(_experiment_archive, experiment_name)
+    response = None
+    if archive is not None:
+        response = _archived_trajectory(archive, task_id, accept_encoding)
+    else:
+        experiment_path = _experiment_path(experiment_name)
+        if (experiment_path / f"{task_id}.json").resolve().parent == experiment_path:
+            response = await _stored_trajectory(experiment_path, task_id, accept_encoding)
+    if response is None:
+        raise HTTPException(status_code=404, detail=f"Trajectory {task_id} not found in {experiment_name}")
+    return response
+
+
+def _folder_trajectory(folder: Path, task_id: str) -> Optional[Any]:
+    """A trajectory kept in a folder as a file or in the folder's pack, None if there is none"""
+    if (folder / f"{task_id}.json").resolve().parent != folder:
+        return None
+    trajectory_path = find_trajectory(str(folder), task_id)
+    if trajectory_path is not None:
+        return read_trajectory(trajectory_path)
+    pack = _trajectory_pack(folder)
+    payload = pack.read(task_id) if pack else None
+    return json.loads(payload) if payload is not None else None
+
+
+def _prompts_of_step(trajectory: Any, step: int, expand) -> Optional[List[Any]]:
+    steps = trajectory.get("steps") if isinstance(trajectory, dict) else None
+    if not isinstance(steps, list) or not 0 <= step < len(steps) or not isinstance(steps[step], dict):
+        return None
+    return expand(steps[step].get("prompts") or [])
+
+
+def _step_prompts(experiment_name: str, task_id: str, step: int) -> Optional[List[Any]]:
+    """The prompts of one step with interned ones expanded, None if there is no such step"""
+    archive = _experiment_archive(experiment_name)
+    if archive is not None:
+        name = archive.find_trajectory(task_id) if "/" not in task_id else None
+        if name is None:
+            return None
+        trajectory = json.loads(b"".join(decompress_chunks(archive.iter_chunks(name), encoding_of(name))))
+        bodies = parse_prompt_lines(archive.read(PROMPTS_FILE)) if archive.has(PROMPTS_FILE) else {}
+        return _prompts_of_step(trajectory, step, lambda prompts: expand_prompts(prompts, bodies))
+
+    experiment_path = _experiment_path(experiment_name)
+    trajectory = _folder_trajectory(experiment_path, task_id)
+    if trajectory is None:
+        return None
+    return _prompts_of_step(trajectory, step, open_store(str(experiment_path)).expand)
+
+
+def _data_step_prompts(task_id: str, step: int) -> Optional[List[Any]]:
+    """The prompts of one step of a trajectory served from the data directory under /data"""
+    data_path = Path(STATIC_DIR).resolve()
+    trajectory = _folder_trajectory(data_path, task_id)
+    if trajectory is None:
+        return None
+    return _prompts_of_step(trajectory, step, open_store(str(data_path)).expand)
 
-    is_running = dashboard_process is not None and dashboard_process.poll() is None
 
+def _step_prompts_response(prompts: Optional[List[Any]], not_found: str) -> JSONResponse:
+    if prompts is None:
+        raise HTTPException(status_code=404, detail=not_found)
     return JSONResponse(
-        content={
-            "is_running": is_running,
-            "experiment_name": dashboard_exp_name if is_running else None,
-            "pid": dashboard_process.pid if is_running else None,
-        },
+        content=prompts,
         headers={
             "Cache-Control": "no-cache, no-store, must-revalidate",
             "Pragma": "no-cache",
@@ -726,10 +1759,49 @@ async def get_dashboard_status():
     )
 
 
+@router.get("/api/experiments/{experiment_name}/trajectories/{task_id}/steps/{step}/prompts")
+async def get_step_prompts(experiment_name: str, task_id: str, step: int):
+    """Get the prompts of one step, expanding prompts the tracker interned into the experiment's prompt store"""
+    try:
+        prompts = await asyncio.to_thread(_step_prompts, experiment_name, task_id, step)
+    except READ_ERRORS as e:
+        raise HTTPException(status_code=500, detail=f"Error reading trajectory {task_id}: {e}")
+    return _step_prompts_response(prompts, f"Step {step} of {task_id} not found in {experiment_name}")
+
+
+@router.get("/api/data/trajectories/{task_id}/steps/{step}/prompts")
+async def get_data_step_prompts(task_id: str, step: int):
+    """Get the prompts of one step of a trajectory served under /data, expanding interned prompts"""
+    try:
+        prompts = await asyncio.to_thread(_data_step_prompts, task_id, step)
+    except READ_ERRORS as e:
+        raise HTTPException(status_code=500, detail=f"Error reading trajectory {task_id}: {e}")
+    return _step_prompts_response(prompts, f"Step {step} of {task_id} not found")
+
+
+@router.get("/api/experiments/{experiment_name}/screenshots/{file_name}")
+async def get_experiment_screenshot(experiment_name: str, file_name: str):
+    """Get a screenshot extracted from an experiment's trajectories by cuga-viz compact"""
+    # Named after their content, so they never change
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    media_type = SCREENSHOT_TYPES.get(file_name.partition(".")[2])
+    archive = await asyncio.to_thread(_experiment_archive, experiment_name)
+    if archive is not None:
+        member = f"{SCREENSHOT_DIR}/{file_name}"
+        if screenshot_path("", file_name) is not None and archive.has(member):
+            headers["Content-Length"] = str(archive.size(member))
+            return StreamingResponse(archive.iter_chunks(member), media_type=media_type, headers=headers)
+    else:
+        path = screenshot_path(str(_experiment_path(experiment_name)), file_name)
+        if path is not None and os.path.isfile(path):
+            return FileResponse(path, media_type=media_type, headers=headers)
+    raise HTTPException(status_code=404, detail=f"Screenshot {file_name} not found in {experiment_name}")
+
+
 # ===== EXISTING ENDPOINTS (preserved) =====
 
 
-@app.post("/api/save_log/{file_id}")
+@router.post("/api/save_log/{file_id}")
 async def add_json_file(file_id: str, data: Dict[str, Any] = Body(...)) -> JSONResponse:
     """Save a JSON dictionary as a file with the specified ID in the build/data directory."""
     try:
@@ -767,7 +1839,7 @@ async def add_json_file(file_id: str, data: Dict[str, Any] = Body(...)) -> JSONR
         raise HTTPException(status_code=500, detail=f"Error saving JSON file: {str(e)}")
 
 
-@app.get("/api/get_data_table")
+@router.get("/api/get_data_table")
 async def get_csv_as_json(experiment_name: Optional[str] = None) -> JSONResponse:
     """Read a CSV file from the static directory and return it as JSON."""
     col_config = {
@@ -880,19 +1952,17 @@ async def get_csv_as_json(experiment_name: Optional[str] = None) -> JSONResponse
     try:
         # Construct the full path to the CSV file
         if experiment_name:
-            full_path = Path(LOGGING_DIR) / experiment_name / "results.csv"
+            archive = _experiment_archive(experiment_name)
+            full_path = Path(archive.path) if archive else _experiment_path(experiment_name) / "results.csv"
         else:
             full_path = Path(BUILD_DIR) / "results.csv"
         if not full_path.exists():
             raise HTTPException(status_code=404, detail=f"CSV file not found: {full_path}")
 
-        # Read the CSV file and convert to JSON
-        df = pd.read_csv(full_path)
-        processed_records = []
-        for index, row in df.iterrows():
-            # Create a new dictionary for each row, filtering out None values
-            filtered_row_dict = {key: value for key, value in row.items() if not pd.isna(value)}
-            processed_records.append(filtered_row_dict)
+        # Parse off the event loop so a large experiment does not stall other viewers
+        processed_records = await asyncio.to_thread(
+            _load_results_records, str(full_path), full_path.stat().st_mtime_ns
+        )
 
         response_content = {"data": processed_records, "columnConfig": col_config}
         return JSONResponse(
@@ -905,29 +1975,34 @@ async def get_csv_as_json(experiment_name: Optional[str] = None) -> JSONResponse
         )
     except csv.Error:
         raise HTTPException(status_code=500, detail=f"Invalid CSV format in file: {full_path}")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(status_code=500, detail=f"Error reading CSV file: {str(e)}")
 
 
-@app.get("/api/stats", response_model=Dict)
+@router.get("/api/stats", response_model=Dict)
 async def generate_statistics(experiment_name: Optional[str] = None):
     """Generate statistics from the CSV data"""
+    import pandas as pd
+
     score_column = "score"
     exceptions_column = "exception"
     site_column = "site"
     try:
         # Construct the full path to the CSV file
         if experiment_name:
-            file_path = Path(LOGGING_DIR) / experiment_name / "results.csv"
+            archive = _experiment_archive(experiment_name)
+            file_path = Path(archive.path) if archive else _experiment_path(experiment_name) / "results.csv"
         else:
             file_path = Path(STATIC_DIR) / "results.csv"
 
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="CSV file not found:")
 
-        # Read the CSV file
-        df = pd.read_csv(file_path)
+        # Read the CSV file, the cached frame is shared so work on a copy
+        df = (await asyncio.to_thread(_load_results_csv, str(file_path), file_path.stat().st_mtime_ns)).copy()
 
         # Validate that required columns exist
         if site_column not in df.columns:
@@ -991,11 +2066,13 @@ async def generate_statistics(experiment_name: Optional[str] = None):
         raise HTTPException(status_code=400, detail="The CSV file is empty.")
     except pd.errors.ParserError:
         raise HTTPException(status_code=400, detail="Could not parse CSV file. Please check the format.")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 
-@app.get("/api/config")
+@router.get("/api/config")
 async def get_config() -> Dict[str, Any]:
     """Get application configuration"""
     return JSONResponse(
@@ -1078,16 +2155,16 @@ def filter_step_keys(data: Dict) -> Dict:
     return filtered_data
 
 
-@app.post("/api/assist", response_model=AssistResponse)
+@router.post("/api/assist", response_model=AssistResponse)
 async def assist(query: AssistQuery):
     """Process a question for the AI assistant and return a response."""
     try:
         # If an ID is provided, read the corresponding JSON file
         if query.id:
             # Construct the full path to the JSON file
-            json_path = Path(STATIC_DIR) / f"{query.id}.json"
+            json_path = find_trajectory(STATIC_DIR, query.id)
 
-            if not json_path.exists():
+            if json_path is None:
                 raise HTTPException(status_code=404, detail=f"JSON file not found for ID: {query.id}")
 
             # LLM functionality has been disabled
@@ -1113,7 +2190,7 @@ async def assist(query: AssistQuery):
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
 
-@app.post("/api/config")
+@router.post("/api/config")
 async def update_config(config: Dict[str, Any]) -> JSONResponse:
     """Update global configuration for step rendering."""
     config_path = Path(BUILD_DIR) / "config.json"
@@ -1143,15 +2220,128 @@ async def lifespan(app: FastAPI):
         logger.warning(
             f"Warning: Build directory {BUILD_DIR} does not exist. Please run 'npm run build' first."
         )
+
+    # Background threads start with the worker, not on import, so a supervisor never executes runs
+    run_scheduler.start()
+    # Registered for the app's lifetime only, the tracker's listeners are shared by the whole process
+    ActivityTracker().add_write_listener(experiment_watcher.poke)
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag(http_metrics))
     yield
+    lag_monitor.cancel()
+    ActivityTracker().remove_write_listener(experiment_watcher.poke)
+    run_scheduler.stop()
+    experiment_watcher.stop()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Metrics of the worker answering the request, in the Prometheus text format"""
+    # Gauges read the run state from SQLite, keep that off the event loop
+    body = await asyncio.to_thread(metrics_registry.render)
+    return Response(
+        content=body,
+        media_type=METRICS_CONTENT_TYPE,
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
 
 
-@app.get("/{full_path:path}")
+@admin_router.post("/profile")
+async def start_profile(profile: ProfileRequest):
+    """Profile the next requests to a route, given as template or literal path"""
+    try:
+        session = request_profiler.start(
+            ProfileSession(
+                profile.route,
+                requests=profile.requests,
+                mode=profile.mode,
+                interval=profile.interval_ms / 1000,
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return JSONResponse(
+        content=session.report(),
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+@admin_router.get("/profile")
+async def get_profile(format: str = "json"):
+    """
+    Status of the current profile session. With format=text the raw output is returned: collapsed
+    stacks (for flamegraph.pl, speedscope, ...) in sample mode, the cProfile table in cprofile mode
+    """
+    session = request_profiler.session
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profile session")
+    if format == "text":
+        return Response(content=session.output(), media_type="text/plain; charset=utf-8")
+    return JSONResponse(
+        content={**session.report(), "output": session.output()},
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+        },
+    )
+
+
+@admin_router.delete("/profile")
+async def cancel_profile():
+    """Stop the current profile session, keeping what was recorded"""
+    session = request_profiler.cancel()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profile session")
+    return JSONResponse(content=session.report())
+
+
+@admin_router.post("/memory/snapshot")
+async def take_memory_snapshot(limit: int = 25):
+    """Take a tracemalloc snapshot, tracing starts with the first one"""
+    snapshot = await asyncio.to_thread(memory_profiler.snapshot, limit)
+    return JSONResponse(content=snapshot)
+
+
+@admin_router.get("/memory/snapshots")
+async def list_memory_snapshots():
+    """List the kept tracemalloc snapshots"""
+    return JSONResponse(
+        content={"tracing": memory_profiler.tracing, "snapshots": memory_profiler.snapshots()}
+    )
+
+
+@admin_router.get("/memory/diff")
+async def diff_memory_snapshots(base: str, target: Optional[str] = None, limit: int = 25):
+    """Allocation growth between two snapshots, or between a snapshot and now"""
+    try:
+        diff = await asyncio.to_thread(memory_profiler.diff, base, target, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot {e} not found")
+    return JSONResponse(content=diff)
+
+
+@admin_router.delete("/memory")
+async def stop_memory_tracing():
+    """Stop tracemalloc and drop the snapshots"""
+    memory_profiler.stop()
+    return JSONResponse(content={"tracing": False})
+
+
+@router.get("/{full_path:path}")
 async def serve_react(full_path: str, request: Request):
     # Try to serve the requested file
     file_path = Path(os.path.join(STATIC_DIR_HTML, full_path))
     requested_path = file_path.resolve()
-    print(requested_path)
     if not str(requested_path).startswith(str(STATIC_DIR_HTML)):
         raise HTTPException(status_code=404, detail="File not found")
     if file_path.exists() and file_path.is_file():
@@ -1167,15 +2357,150 @@ async def serve_react(full_path: str, request: Request):
         )
 
 
-def main():
-    """Entry point for the package when run directly"""
+def _server_options() -> Dict[str, Any]:
+    """Use the uvloop event loop and the httptools parser when they are installed"""
+    options = {}
+    try:
+        import uvloop  # noqa: F401
+
+        options["loop"] = "uvloop"
+    except ImportError:
+        pass
+    try:
+        import httptools  # noqa: F401
+
+        options["http"] = "httptools"
+    except ImportError:
+        pass
+    return options
+
+
+def parse_server_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse server arguments, worker processes started by uvicorn get them through the environment"""
+    if argv is None:
+        argv = json.loads(os.environ.get(SERVER_ARGS_ENV, "[]"))
+    return parser.parse_args(argv)
+
+
+def create_app(args: Optional[argparse.Namespace] = None) -> FastAPI:
+    """
+    Build the server application.
+
+    Configures the module state the endpoints use (directories, shared run state, live updates
+    and the run scheduler), mounts the static directories and adds the endpoints. Background
+    threads only start in the app lifespan.
+
+    Args:
+        args (argparse.Namespace, optional): Parsed server arguments, read from the environment if omitted
+
+    Returns:
+        FastAPI: The application
+    """
+    global BUILD_DIR, EXPERIMENTS_DIR, LOGGING_DIR, STATIC_DIR, tracker
+    global state_store, active_runs, shard_runs, merge_jobs, experiment_watcher, run_scheduler
+
+    if args is None:
+        args = parse_server_args()
+
+    BUILD_DIR = args.data_dir
+    EXPERIMENTS_DIR = args.experiments_dir
+    LOGGING_DIR = (
+        EXPERIMENTS_DIR if EXPERIMENTS_DIR else os.path.join(APP_DIR, "logging", "trajectory_data")
+    )  # For logged experiments
+
+    # If only experiments_dir is provided, use it as BUILD_DIR for serving static files
+    if EXPERIMENTS_DIR and not args.data_dir != "./data":  # data_dir is default
+        BUILD_DIR = EXPERIMENTS_DIR
+        tracker = ActivityTracker()
+        tracker.set_base_dir(EXPERIMENTS_DIR)
+    STATIC_DIR = f"{BUILD_DIR}"
+
+    state_store = StateStore(args.state_db or os.path.join(OUTPUT_DIR, ".server_state.sqlite3"))
+    active_runs = state_store.mapping("active_runs")
+    shard_runs = state_store.mapping("shard_runs")
+    merge_jobs = state_store.mapping("merge_jobs")
+
+    experiment_watcher = ExperimentWatcher(event_bus, LOGGING_DIR)
+
+    run_scheduler = RunScheduler(
+        runner=_run_scheduled,
+        store=state_store,
+        leader_lock_path=f"{state_store.path}.leader",
+        max_concurrent_runs=args.max_concurrent_runs,
+        cpu_slots=args.cpu_slots,
+        on_cancel=_cancel_running,
+    )
+
+    app = FastAPI(lifespan=lifespan)
+    if args.enable_profiling:
+        logger.warning("Profiling endpoints are enabled under /api/admin")
+        app.add_middleware(ProfilingMiddleware, profiler=request_profiler, routes=router.routes)
+        app.include_router(admin_router)
+    app.add_middleware(
+        MetricsMiddleware, metrics=http_metrics, access_log_sample_rate=args.access_log_sample_rate
+    )
+    # Mount the React build files, before the router whose last route catches every other path
+    app.mount("/data", SecureStaticFiles(directory=STATIC_DIR), name="static")
+    app.mount("/static", SecureStaticFiles(directory=STATIC_DIR_HTML), name="static_dir_html")
+    app.mount("/assets", SecureStaticFiles(directory=assets_dir), name="static_dir_assets_html")
+    app.include_router(router)
+    return app
+
+
+_default_app: Optional[FastAPI] = None
+
+
+def __getattr__(name: str):
+    # Keeps `uvicorn dashboard.server:app` working, the app is only built when first asked for
+    global _default_app
+    if name == "app":
+        if _default_app is None:
+            _default_app = create_app()
+        return _default_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Entry point for the package when run directly, also used by the CLI to serve in-process.
+
+    Args:
+        argv (List[str], optional): Server arguments, defaults to the command line
+    """
     import uvicorn
 
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_server_args(argv)
+
     logger.info(f"Starting server on {args.host}:{args.port}")
-    logger.info(f"Using data directory: {BUILD_DIR}")
-    if EXPERIMENTS_DIR:
-        logger.info(f"Using experiments directory: {EXPERIMENTS_DIR}")
-    uvicorn.run("dashboard.server:app", host=args.host, port=args.port)
+    logger.info(f"Using data directory: {args.data_dir}")
+    if args.experiments_dir:
+        logger.info(f"Using experiments directory: {args.experiments_dir}")
+    options = _server_options()
+
+    if args.workers > 1:
+        # Hand over to the uvicorn CLI so worker processes import the app factory cleanly instead of
+        # re-running this module as their __main__
+        logger.info(f"Starting {args.workers} workers with {options or 'default loop and parser'}")
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "dashboard.server:create_app",
+            "--factory",
+            "--host",
+            args.host,
+            "--port",
+            str(args.port),
+            "--workers",
+            str(args.workers),
+        ]
+        for name, value in options.items():
+            command += [f"--{name}", value]
+        env = {**os.environ, SERVER_ARGS_ENV: json.dumps(argv)}
+        os.execve(sys.executable, command, env)
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, **options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class ShardPlanner:
+    """
+    Hands out batches of task IDs to a fixed number of shard workers.
+
+    Batches follow guided self-scheduling: each batch is the remaining work divided by twice
+    the number of shards, so early batches are large (few process start-ups) and the tail is
+    split into ever smaller pieces. A shard that finishes early simply pulls the next batch,
+    which rebalances the remaining tasks without ever assigning a task to two shards.
+    """
+
+    def __init__(self, task_ids: List[str], shards: int, min_batch: int = 1):
+        self.shards = max(1, shards)
+        self.min_batch = max(1, min_batch)
+        self._remaining = list(task_ids)
+        self._assigned: Dict[int, List[str]] = {shard_id: [] for shard_id in range(self.shards)}
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return len(self._remaining) + sum(len(ids) for ids in self._assigned.values())
+
+    def next_batch(self, shard_id: int) -> List[str]:
+        """
+        Take the next batch of tasks for a shard.
+
+        Args:
+            shard_id (int): The requesting shard
+
+        Returns:
+            List[str]: Task IDs to run, empty when all tasks were handed out
+        """
+        with self._lock:
+            if not self._remaining:
+                return []
+            size = max(self.min_batch, math.ceil(len(self._remaining) / (2 * self.shards)))
+            batch, self._remaining = self._remaining[:size], self._remaining[size:]
+            self._assigned[shard_id].extend(batch)
+            return batch
+
+    def drain(self) -> List[str]:
+        """Drop all tasks not handed out yet, e.g. when the run is cancelled."""
+        with self._lock:
+            remaining, self._remaining = self._remaining, []
+            return remaining
+
+    def state(self) -> Dict[str, Any]:
+        """JSON serializable assignment state, for progress reporting from other workers."""
+        with self._lock:
+            return {
+                "assigned": {str(shard_id): list(ids) for shard_id, ids in self._assigned.items()},
+                "pending": len(self._remaining),
+            }
+
+    def progress(self, completed_task_ids: set) -> Dict[str, Any]:
+        """Per-shard and aggregated progress given the completed task IDs from .progress."""
+        state = self.state()
+        return shard_progress(state["assigned"], state["pending"], completed_task_ids)
+
+
+def shard_progress(assigned: Dict[str, List[str]], pending: int, completed_task_ids: set) -> Dict[str, Any]:
+    """
+    Per-shard and aggregated progress of a sharded run.
+
+    Args:
+        assigned (Dict[str, List[str]]): Task IDs handed out so far, per shard ID
+        pending (int): Number of tasks not handed out yet
+        completed_task_ids (set): Task IDs listed in the experiment's .progress file
+
+    Returns:
+        Dict with one entry per shard and the totals over all shards
+    """
+    shards = []
+    for shard_id, ids in sorted(assigned.items(), key=lambda item: int(item[0])):
+        shards.append(
+            {
+                "shard_id": int(shard_id),
+                "assigned_tasks": len(ids),
+                "completed_tasks": sum(1 for task_id in ids if task_id in completed_task_ids),
+            }
+        )
+    total = pending + sum(len(ids) for ids in assigned.values())
+    completed = sum(shard["completed_tasks"] for shard in shards)
+    return {
+        "total_tasks": total,
+        "completed_tasks": completed,
+        "pending_tasks": pending,
+        "shards": shards,
+    }
+
+
+def split_cpus(cpu_ids: List[int], shards: int) -> List[List[int]]:
+    """Split reserved CPU ids into one contiguous group per shard (groups may share CPUs)."""
+    if not cpu_ids:
+        return [[] for _ in range(shards)]
+    if len(cpu_ids) < shards:
+        return [[cpu_ids[index % len(cpu_ids)]] for index in range(shards)]
+    size = len(cpu_ids) // shards
+    groups = [cpu_ids[index * size : (index + 1) * size] for index in range(shards)]
+    # Spread the leftover CPUs over the first shards
+    for index, cpu_id in enumerate(cpu_ids[size * shards :]):
+        groups[index].append(cpu_id)
+    return groups
+
+
+def read_completed_task_ids(experiment_dir: str) -> set:
+    """Read the task IDs listed in an experiment's .progress file."""
+    progress_path = os.path.join(experiment_dir, ".progress")
+    if not os.path.exists(progress_path):
+        return set()
+    with open(progress_path, 'r', encoding='utf-8') as f:
+        return set(line.strip() for line in f if line.strip())
+
+
+def read_experiment_task_ids(experiment_dir: str) -> Optional[List[str]]:
+    """Read the task IDs from an experiment's metadata.json, None if it has none."""
+    metadata_path = os.path.join(experiment_dir, "metadata.json")
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("task_ids") or None
@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the server runs a single worker
+    fcntl = None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    experiment_name TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+"""
+
+
+class StateStore:
+    """
+    SQLite database holding the state every server worker has to see.
+
+    The database runs in WAL mode so readers never block the worker writing, and each
+    thread gets its own connection. Values are stored as JSON.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection().executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one write transaction, taking the write lock up front."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = (
+            self.connection()
+            .execute("SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+            .fetchone()
+        )
+        return json.loads(row["value"]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time()),
+            )
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+        return cursor.rowcount > 0
+
+    def items(self, namespace: str) -> List[tuple]:
+        rows = (
+            self.connection()
+            .execute("SELECT key, value FROM kv WHERE namespace = ? ORDER BY key", (namespace,))
+            .fetchall()
+        )
+        return [(row["key"], json.loads(row["value"])) for row in rows]
+
+    def mapping(self, namespace: str) -> "SharedMap":
+        return SharedMap(self, namespace)
+
+
+class SharedMap(MutableMapping):
+    """
+    Dictionary view of one namespace of a StateStore.
+
+    Reads always hit the database, so changes made by other workers are visible right away.
+    Values are copies: update a nested value by assigning the whole entry again.
+    """
+
+    def __init__(self, store: StateStore, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.store.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store.set(self.namespace, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.store.delete(self.namespace, key):
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([key for key, _ in self.store.items(self.namespace)])
+
+    def __len__(self) -> int:
+        return len(self.store.items(self.namespace))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.store.items(self.namespace))
+
+
+class LeaderLock:
+    """
+    Non-blocking file lock electing the one worker that executes experiment runs.
+
+    The lock is released by the operating system when the holding process exits, so another
+    worker takes over after a crash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            self._file = True
+            return True
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        if self._file is not None and fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
@@ -0,0 +1,342 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+from loguru import logger
+
+from dashboard.prompt_store import expand_prompts, is_interned, open_store
+from dashboard.regex_scan import iter_chunk_steps
+from dashboard.trajectory_files import READ_ERRORS
+from dashboard.trajectory_pack import TrajectoryPack, trajectory_chunks, trajectory_versions
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+STEP_TABLE_FILE = ".step_table.npz"
+
+# Dictionary-encoded string columns, stored as codes plus a dictionary each
+DIMENSIONS = ("name", "action_type", "url_host")
+MEASURES = ("step", "prompt_count", "prompt_chars", "has_screenshot")
+GROUP_COLUMNS = ("experiment", "task_id", "outcome", *DIMENSIONS, "has_screenshot")
+OUTCOMES = ("passed", "failed", "unfinished")
+
+
+def _url_host(url: Any) -> str:
+    if not url or not isinstance(url, str):
+        return ""
+    try:
+        return urlsplit(url).netloc
+    except ValueError:
+        return ""
+
+
+def _step_row(step: Dict[str, Any], prompt_bodies: Optional[Dict[str, str]] = None) -> Tuple:
+    prompts = step.get("prompts") or []
+    if prompt_bodies is not None and is_interned(prompts):
+        prompts = expand_prompts(prompts, prompt_bodies)
+    prompts = [prompt for prompt in prompts if isinstance(prompt, dict)]
+    return (
+        str(step.get("name") or ""),
+        str(step.get("action_type") or ""),
+        _url_host(step.get("current_url")),
+        len(prompts),
+        sum(len(str(prompt.get("value") or "")) for prompt in prompts),
+        bool(step.get("image_before")),
+    )
+
+
+def read_step_rows(chunks: Iterable[bytes], prompt_bodies: Optional[Dict[str, str]] = None) -> List[Tuple]:
+    """
+    (name, action_type, url_host, prompt_count, prompt_chars, has_screenshot) of every step of a trajectory.
+
+    The trajectory is read from its JSON bytes in chunks, see trajectory_chunks. Interned prompts
+    are measured from prompt_bodies, the experiment's prompt store.
+    """
+    rows = []
+    for _, raw in iter_chunk_steps(chunks):
+        try:
+            step = json.loads(raw)
+        except ValueError:
+            continue
+        rows.append(_step_row(step, prompt_bodies) if isinstance(step, dict) else ("", "", "", 0, 0, False))
+    return rows
+
+
+class StepTable:
+    """
+    Materialized table with one row per trajectory step of an experiment.
+
+    The table is a single uncompressed .npz in the experiment folder holding one array per
+    column: fixed-width numbers, and codes into per-column dictionaries for the string
+    columns. Rows of a task are contiguous and the task of a row follows from the manifest
+    (task_id, mtime_ns, size, row count per task; a packed trajectory has its pack record's
+    version in place of mtime and size). A refresh only parses trajectories that changed, with the streaming step reader, and rewrites the file by
+    concatenating the kept rows with the new ones.
+    """
+
+    def __init__(self, experiment_dir: str, refresh_interval: float = 1.0):
+        self.experiment_dir = experiment_dir
+        self.path = os.path.join(experiment_dir, STEP_TABLE_FILE)
+        self.refresh_interval = refresh_interval
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._pack = TrajectoryPack(experiment_dir)
+
+    def _scan_files(self) -> Dict[str, Tuple[int, int]]:
+        return trajectory_versions(self.experiment_dir, self._pack)
+
+    def load(self) -> Optional[Dict[str, np.ndarray]]:
+        """The stored columns, None if the table was never built."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        return _load_table(self.path, mtime_ns)
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """
+        Bring the table up to date with the experiment's trajectories.
+
+        Returns:
+            Dict with the number of parsed and removed tasks and the total rows
+        """
+        counts = {"parsed": 0, "removed": 0, "rows": 0}
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return counts
+            files = self._scan_files()
+            table = self.load()
+            known: Dict[str, int] = {}
+            if table is not None:
+                known = {task_id: index for index, task_id in enumerate(table["task_ids"].tolist())}
+            changed = [
+                task_id
+                for task_id, version in files.items()
+                if task_id not in known
+                or (int(table["mtime_ns"][known[task_id]]), int(table["size"][known[task_id]])) != version
+            ]
+            removed = [task_id for task_id in known if task_id not in files]
+            self._refreshed_at = time.monotonic()
+            if not changed and not removed and table is not None:
+                counts["rows"] = len(table["step"])
+                return counts
+
+            new_rows: Dict[str, List[Tuple]] = {}
+            prompt_bodies = open_store(self.experiment_dir).bodies() if changed else None
+            for task_id in changed:
+                try:
+                    chunks = trajectory_chunks(self.experiment_dir, task_id, self._pack)
+                    if chunks is not None:
+                        new_rows[task_id] = read_step_rows(chunks, prompt_bodies)
+                except READ_ERRORS:
+                    continue
+            self._write(table, files, new_rows, removed)
+            counts.update(parsed=len(new_rows), removed=len(removed))
+            counts["rows"] = len(self.load()["step"])
+
+        logger.info(f"Step table of {os.path.basename(self.experiment_dir)} updated: {counts}")
+        return counts
+
+    def _write(
+        self,
+        table: Optional[Dict[str, np.ndarray]],
+        files: Dict[str, Tuple[int, int]],
+        new_rows: Dict[str, List[Tuple]],
+        removed: List[str],
+    ) -> None:
+        dictionaries = {
+            column: table[f"{column}_values"].tolist() if table is not None else [] for column in DIMENSIONS
+        }
+        lookups = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in dictionaries.items()
+        }
+
+        # Rows of tasks that neither changed nor disappeared are kept as they are
+        if table is not None:
+            dropped = set(removed) | set(new_rows)
+            keep_tasks = np.array(
+                [task_id not in dropped for task_id in table["task_ids"].tolist()], dtype=bool
+            )
+            keep_rows = np.repeat(keep_tasks, table["row_counts"])
+            columns = {
+                column: table[column][keep_rows]
+                for column in (*MEASURES, *(f"{c}_codes" for c in DIMENSIONS))
+            }
+            manifest = {key: table[key][keep_tasks] for key in ("task_ids", "mtime_ns", "size", "row_counts")}
+        else:
+            columns = {
+                "step": np.zeros(0, dtype=np.int32),
+                "prompt_count": np.zeros(0, dtype=np.int32),
+                "prompt_chars": np.zeros(0, dtype=np.int64),
+                "has_screenshot": np.zeros(0, dtype=bool),
+                **{f"{column}_codes": np.zeros(0, dtype=np.int32) for column in DIMENSIONS},
+            }
+            manifest = {
+                "task_ids": np.zeros(0, dtype=str),
+                "mtime_ns": np.zeros(0, dtype=np.int64),
+                "size": np.zeros(0, dtype=np.int64),
+                "row_counts": np.zeros(0, dtype=np.int64),
+            }
+
+        rows = [row for task_rows in new_rows.values() for row in task_rows]
+        added = {
+            "step": np.concatenate(
+                [np.arange(len(task_rows), dtype=np.int32) for task_rows in new_rows.values()]
+                or [np.zeros(0, np.int32)]
+            ),
+            "prompt_count": np.fromiter((row[3] for row in rows), dtype=np.int32, count=len(rows)),
+            "prompt_chars": np.fromiter((row[4] for row in rows), dtype=np.int64, count=len(rows)),
+            "has_screenshot": np.fromiter((row[5] for row in rows), dtype=bool, count=len(rows)),
+        }
+        for position, column in enumerate(DIMENSIONS):
+            lookup, values = lookups[column], dictionaries[column]
+            codes = np.empty(len(rows), dtype=np.int32)
+            for index, row in enumerate(rows):
+                code = lookup.get(row[position])
+                if code is None:
+                    code = lookup[row[position]] = len(values)
+                    values.append(row[position])
+                codes[index] = code
+            added[f"{column}_codes"] = codes
+
+        new_tasks = list(new_rows)
+        arrays = {column: np.concatenate([columns[column], added[column]]) for column in columns}
+        arrays.update(
+            task_ids=np.array(manifest["task_ids"].tolist() + new_tasks, dtype=str),
+            mtime_ns=np.concatenate(
+                [manifest["mtime_ns"], [files[task_id][0] for task_id in new_tasks]]
+            ).astype(np.int64),
+            size=np.concatenate([manifest["size"], [files[task_id][1] for task_id in new_tasks]]).astype(
+                np.int64
+            ),
+            row_counts=np.concatenate(
+                [manifest["row_counts"], [len(new_rows[task_id]) for task_id in new_tasks]]
+            ).astype(np.int64),
+            **{f"{column}_values": np.array(dictionaries[column], dtype=str) for column in DIMENSIONS},
+        )
+
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.path)
+
+
+@lru_cache(maxsize=32)
+def _load_table(path: str, mtime_ns: int) -> Dict[str, np.ndarray]:
+    """Read a step table, cached until the file changes"""
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _outcomes(experiment_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(experiment_dir, "results.json"), 'r', encoding='utf-8') as f:
+            results = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {}
+    outcomes = {}
+    for task_id, result in results.items():
+        try:
+            passed = float(result.get("score") or 0.0) >= 1.0
+        except (TypeError, ValueError):
+            passed = False
+        outcomes[task_id] = "passed" if passed else "failed"
+    return outcomes
+
+
+def step_frame(tables: Dict[str, StepTable]) -> "pd.DataFrame":
+    """
+    One frame over the step tables of several experiments, with the task outcome per row.
+
+    String columns are categoricals built from the stored codes, so no strings are
+    materialized per row.
+    """
+    import pandas as pd
+
+    frames = []
+    for experiment, step_table in tables.items():
+        table = step_table.load()
+        if table is None or not len(table["step"]):
+            continue
+        task_codes = np.repeat(np.arange(len(table["task_ids"])), table["row_counts"])
+        outcomes = _outcomes(step_table.experiment_dir)
+        task_outcomes = np.array(
+            [OUTCOMES.index(outcomes.get(task_id, "unfinished")) for task_id in table["task_ids"].tolist()],
+            dtype=np.int8,
+        )
+        frame = pd.DataFrame(
+            {
+                "experiment": pd.Categorical.from_codes(
+                    np.zeros(len(task_codes), dtype=np.int8), [experiment]
+                ),
+                "task_id": pd.Categorical.from_codes(task_codes, table["task_ids"]),
+                "outcome": pd.Categorical.from_codes(task_outcomes[task_codes], OUTCOMES),
+                **{
+                    column: pd.Categorical.from_codes(table[f"{column}_codes"], table[f"{column}_values"])
+                    for column in DIMENSIONS
+                },
+                **{column: table[column] for column in MEASURES},
+            }
+        )
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=[*GROUP_COLUMNS, "step", "prompt_count", "prompt_chars"])
+    # union_categoricals keeps the columns categorical across experiments with different dictionaries
+    from pandas.api.types import union_categoricals
+
+    combined = {}
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            combined[column] = union_categoricals([frame[column] for frame in frames])
+        else:
+            combined[column] = np.concatenate([frame[column].to_numpy() for frame in frames])
+    return pd.DataFrame(combined)
+
+
+def group_steps(
+    frame: "pd.DataFrame", by: List[str], outcome: Optional[str] = None, sort: str = "steps", limit: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    Aggregate steps per group.
+
+    Every group reports its steps, distinct tasks, steps per task, mean and max prompt size
+    and the share of steps with a screenshot.
+
+    Raises:
+        ValueError: If a group column, the outcome or the sort key is unknown
+    """
+    unknown = [column for column in by if column not in GROUP_COLUMNS]
+    if not by or unknown:
+        raise ValueError(f"by must name columns of {', '.join(GROUP_COLUMNS)}")
+    if outcome is not None and outcome not in OUTCOMES:
+        raise ValueError(f"outcome must be one of {', '.join(OUTCOMES)}")
+    if outcome is not None:
+        frame = frame[frame["outcome"] == outcome]
+    if frame.empty:
+        return []
+
+    grouped = frame.groupby(list(by), observed=True, sort=False)
+    summary = grouped.agg(
+        steps=("step", "size"),
+        tasks=("task_id", "nunique"),
+        mean_prompt_chars=("prompt_chars", "mean"),
+        max_prompt_chars=("prompt_chars", "max"),
+        screenshot_share=("has_screenshot", "mean"),
+    )
+    # A task counts in several groups when it has steps in each, steps per task is within the group
+    summary["steps_per_task"] = summary["steps"] / summary["tasks"]
+    if sort not in summary.columns:
+        raise ValueError(f"sort must be one of {', '.join(summary.columns)}")
+    summary = summary.sort_values(sort, ascending=False).head(limit).reset_index()
+    records = summary.to_dict(orient="records")
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, np.generic):
+                record[key] = value.item()
+    return records
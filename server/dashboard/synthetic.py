@@ -0,0 +1,182 @@
+import base64
+import csv
+import json
+import os
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from dashboard.activity_tracker import Prompt, Step
+
+RESULT_COLUMNS = [
+    'task_id',
+    'site',
+    'intent',
+    'agent_answer',
+    'eval',
+    'score',
+    'exception',
+    'num_steps',
+    'fail_category',
+    'agent_v',
+]
+SITES = ["shopping", "gitlab", "reddit", "map", "wikipedia", "shopping_admin"]
+AGENTS = ["PlannerAgent", "BrowserAgent", "APIPlannerAgent", "CodeAgent", "FinalAnswerAgent"]
+ACTION_TYPES = ["click", "type", "scroll", "goto", "api_call", "answer"]
+FAIL_CATEGORIES = ["wrong_answer", "timeout", "navigation", "tool_error"]
+WORDS = ["the", "agent", "opens", "page", "search", "result", "item", "click", "list", "order", "user"]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def synthetic_screenshot(rng: random.Random, size_bytes: int) -> str:
+    """Base64 data URL of `size_bytes` random bytes, standing in for a screenshot."""
+    if size_bytes <= 0:
+        return ""
+    return "data:image/png;base64," + base64.b64encode(rng.randbytes(size_bytes)).decode("ascii")
+
+
+def synthetic_step(rng: random.Random, index: int, screenshot_bytes: int = 0) -> Step:
+    """A step shaped like the ones agents record, with a couple of prompts and an optional screenshot."""
+    return Step(
+        name=AGENTS[index % len(AGENTS)],
+        plan=_text(rng, 20),
+        prompts=[
+            Prompt(role="system", value=_text(rng, 120)),
+            Prompt(role="user", value=_text(rng, 40)),
+        ],
+        data=json.dumps({"thought": _text(rng, 15), "step": index}),
+        current_url=f"http://localhost:7770/page/{rng.randint(1, 500)}",
+        action_formatted=f"{rng.choice(ACTION_TYPES)}('{_text(rng, 2)}')",
+        action_type=rng.choice(ACTION_TYPES),
+        action_args={"target": rng.randint(1, 200)},
+        observation_before=_text(rng, 200),
+        image_before=synthetic_screenshot(rng, screenshot_bytes),
+    )
+
+
+def generate_experiment(
+    base_dir: str,
+    experiment_folder: str,
+    tasks: int = 50,
+    steps_per_task: int = 10,
+    screenshot_bytes: int = 0,
+    seed: int = 0,
+    completed_fraction: float = 1.0,
+) -> str:
+    """
+    Write one experiment folder in the layout the ActivityTracker produces.
+
+    Args:
+        base_dir (str): Experiments directory
+        experiment_folder (str): Folder name of the experiment
+        tasks (int): Number of tasks in metadata.json
+        steps_per_task (int): Steps in every trajectory
+        screenshot_bytes (int): Size of the screenshot attached to every step, 0 for none
+        seed (int): Seed making the content reproducible
+        completed_fraction (float): Share of the tasks that have results and a trajectory
+
+    Returns:
+        str: Path of the experiment folder
+    """
+    rng = random.Random(f"{seed}:{experiment_folder}")
+    experiment_dir = os.path.join(base_dir, experiment_folder)
+    os.makedirs(experiment_dir, exist_ok=True)
+
+    task_ids = [f"task_{index:05d}" for index in range(tasks)]
+    with open(os.path.join(experiment_dir, "metadata.json"), 'w', encoding='utf-8') as f:
+        json.dump(
+            {
+                "task_ids": task_ids,
+                "description": "Synthetic experiment",
+                "experiment_name": experiment_folder,
+                "experiment_folder": experiment_folder,
+                "created_at": datetime.now().isoformat(),
+            },
+            f,
+            indent=2,
+        )
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for task_id in task_ids[: int(tasks * completed_fraction)]:
+        exception = rng.random() < 0.05
+        score = 0.0 if exception else float(rng.random() < 0.6)
+        intent = _text(rng, 12)
+        results[task_id] = {
+            "site": rng.choice(SITES),
+            "intent": intent,
+            "agent_answer": _text(rng, 8),
+            "eval": "exact_match",
+            "score": score,
+            "exception": exception,
+            "num_steps": steps_per_task,
+            "fail_category": None if score else rng.choice(FAIL_CATEGORIES),
+            "agent_v": "synthetic-1",
+        }
+        steps = [synthetic_step(rng, index, screenshot_bytes).model_dump() for index in range(steps_per_task)]
+        with open(os.path.join(experiment_dir, f"{task_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    "intent": intent,
+                    "dataset_name": "synthetic",
+                    "actions_count": steps_per_task,
+                    "task_id": task_id,
+                    "eval": None,
+                    "steps": steps,
+                    "score": score,
+                },
+                f,
+                ensure_ascii=False,
+                indent=4,
+            )
+
+    with open(os.path.join(experiment_dir, "results.json"), 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(experiment_dir, "results.csv"), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for task_id, result in results.items():
+            writer.writerow({"task_id": task_id, **result})
+    with open(os.path.join(experiment_dir, ".progress"), 'w', encoding='utf-8') as f:
+        f.write("".join(f"{task_id}\n" for task_id in results))
+    return experiment_dir
+
+
+def generate_experiment_tree(
+    base_dir: str,
+    experiments: int = 5,
+    tasks_per_experiment: int = 50,
+    steps_per_task: int = 10,
+    screenshot_bytes: int = 0,
+    seed: int = 0,
+    prefix: str = "synthetic",
+    completed_fraction: Optional[float] = None,
+) -> List[str]:
+    """
+    Write a directory of synthetic experiments for benchmarks and load tests.
+
+    The last experiment is left partially completed, like a run still in progress, unless
+    `completed_fraction` is given.
+
+    Returns:
+        List[str]: The experiment folder names
+    """
+    folders = []
+    for index in range(experiments):
+        folder = f"{prefix}_{index:03d}"
+        fraction = completed_fraction
+        if fraction is None:
+            fraction = 0.5 if index == experiments - 1 and experiments > 1 else 1.0
+        generate_experiment(
+            base_dir,
+            folder,
+            tasks=tasks_per_experiment,
+            steps_per_task=steps_per_task,
+            screenshot_bytes=screenshot_bytes,
+            seed=seed,
+            completed_fraction=fraction,
+        )
+        folders.append(folder)
+    return folders
@@ -0,0 +1,178 @@
+import gzip
+import json
+import os
+import zlib
+from functools import lru_cache
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:  # Optional, trajectories are then written plain or gzipped
+    zstandard = None
+
+# How the tracker writes trajectories: plain JSON (unset), "gzip" or "zstd"
+TRAJECTORY_COMPRESSION_ENV = "CUGA_VIZ_TRAJECTORY_COMPRESSION"
+GZIP = "gzip"
+ZSTD = "zstd"
+
+# Stored forms of a trajectory; the encoding names double as HTTP Content-Encoding values
+TRAJECTORY_SUFFIXES = {".json": None, ".json.gz": GZIP, ".json.zst": ZSTD}
+_GZIP_LEVEL = 6
+_ZSTD_LEVEL = 3
+CHUNK_SIZE = 1 << 20
+
+# Files inside an experiment folder that are not task trajectories
+NON_TRAJECTORY_FILES = {"results.json", "metadata.json"}
+# Screenshots pulled out of trajectories, stored once per experiment under their SHA-256 and
+# referenced from the step as ".screenshots/{sha256}.{ext}"
+SCREENSHOT_DIR = ".screenshots"
+
+# Errors of reading a damaged or partially written trajectory in any form
+READ_ERRORS: Tuple[type, ...] = (OSError, EOFError, ValueError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def available_encodings() -> List[str]:
+    return [GZIP] + ([ZSTD] if zstandard is not None else [])
+
+
+@lru_cache(maxsize=None)
+def _checked_encoding(value: str) -> Optional[str]:
+    encoding = value.strip().lower() or None
+    if encoding is not None and encoding not in available_encodings():
+        logger.warning(f"Unsupported {TRAJECTORY_COMPRESSION_ENV}={value}, writing plain JSON trajectories")
+        return None
+    return encoding
+
+
+def configured_encoding() -> Optional[str]:
+    """Encoding the tracker writes trajectories with, plain JSON when unset or unsupported."""
+    return _checked_encoding(os.environ.get(TRAJECTORY_COMPRESSION_ENV, ""))
+
+
+def split_trajectory_name(name: str) -> Optional[Tuple[str, Optional[str]]]:
+    """(file name without its suffix, encoding) of a trajectory file name, None for other names."""
+    for suffix, encoding in TRAJECTORY_SUFFIXES.items():
+        if name.endswith(suffix):
+            return name[: -len(suffix)], encoding
+    return None
+
+
+def trajectory_task_id(name: str) -> Optional[str]:
+    """Task ID of a trajectory file name in an experiment folder, plain or compressed, None for other files."""
+    if name in NON_TRAJECTORY_FILES or name.startswith("results.shard-"):
+        return None
+    split = split_trajectory_name(name)
+    return split[0] if split else None
+
+
+def is_trajectory_file(name: str) -> bool:
+    """Whether a file name in an experiment folder is a task trajectory."""
+    return trajectory_task_id(name) is not None
+
+
+def trajectory_name(task_id: str, encoding: Optional[str] = None) -> str:
+    for suffix, suffix_encoding in TRAJECTORY_SUFFIXES.items():
+        if suffix_encoding == encoding:
+            return f"{task_id}{suffix}"
+    raise ValueError(f"Unknown trajectory encoding: {encoding}")
+
+
+def find_trajectory(experiment_dir: str, task_id: str) -> Optional[str]:
+    """Path of a task's trajectory in whichever form it is stored, None if there is none."""
+    for suffix in TRAJECTORY_SUFFIXES:
+        path = os.path.join(experiment_dir, f"{task_id}{suffix}")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def encoding_of(path: str) -> Optional[str]:
+    split = split_trajectory_name(os.path.basename(path))
+    return split[1] if split else None
+
+
+def open_trajectory(path: str) -> BinaryIO:
+    """A trajectory file opened for reading its plain JSON bytes, decompressing as it is read."""
+    encoding = encoding_of(path)
+    if encoding == GZIP:
+        return gzip.open(path, 'rb')
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise OSError(f"{path} is zstd-compressed and zstandard is not installed")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def read_trajectory(path: str) -> Any:
+    """
+    Parse a trajectory file in any of its forms.
+
+    Raises:
+        One of READ_ERRORS if the file is missing, damaged or partially written
+    """
+    with open_trajectory(path) as f:
+        return json.load(f)
+
+
+def compress(payload: bytes, encoding: Optional[str]) -> bytes:
+    if encoding is None:
+        return payload
+    if encoding == GZIP:
+        # A fixed mtime keeps the bytes of identical trajectories identical
+        return gzip.compress(payload, compresslevel=_GZIP_LEVEL, mtime=0)
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(payload)
+    raise ValueError(f"Unknown trajectory encoding: {encoding}")
+
+
+def decompress_chunks(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Decompress a stream of compressed chunks as it goes by."""
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == GZIP:
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    elif zstandard is not None:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise OSError("zstd-compressed trajectory and zstandard is not installed")
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    if encoding == GZIP:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+def file_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """A file's raw bytes in chunks."""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows a content encoding, honouring q=0."""
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() not in (encoding, "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
@@ -0,0 +1,302 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from dashboard.trajectory_files import (
+    decompress_chunks,
+    encoding_of,
+    file_chunks,
+    find_trajectory,
+    trajectory_task_id,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows, where a single process writes an experiment
+    fcntl = None
+
+# Append-only file of every trajectory of an experiment, and the index of where each one is
+PACK_FILE = "trajectories.pack"
+INDEX_FILE = "trajectories.pack.idx"
+
+# Record header: magic, task ID length, payload length, CRC-32 of the payload
+_MAGIC = b"CVPK"
+_HEADER = struct.Struct("<4sHQI")
+CHUNK_SIZE = 1 << 20
+_FINGERPRINT_MASK = (1 << 62) - 1
+
+
+class PackEntry(NamedTuple):
+    offset: int  # Of the payload, past the record header and task ID
+    length: int
+    crc32: int
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        """
+        Change version in the (mtime_ns, size) form of a trajectory file's: a fingerprint of the
+        record's offset and checksum, negative so no file mtime equals it, and the payload length.
+        """
+        return -1 - (hash((self.offset, self.crc32)) & _FINGERPRINT_MASK), self.length
+
+
+class ChecksumError(ValueError):
+    pass
+
+
+def has_pack(experiment_dir: str) -> bool:
+    return os.path.isfile(os.path.join(experiment_dir, PACK_FILE))
+
+
+def _inode(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+class TrajectoryPack:
+    """
+    One experiment's trajectories in a single append-only pack file.
+
+    Each write appends a record (header, task ID, JSON payload) to the pack and then a line
+    to the index mapping the task ID to the payload's offset, length and checksum; a task
+    written again gets a new record and the last index line wins. Bytes of replaced records
+    stay in the pack until it is compacted. The pack alone is enough to rebuild the index, so
+    a writer dying between the two appends loses nothing.
+
+    Readers keep the index in memory and only parse the lines appended since they last looked.
+    """
+
+    def __init__(self, experiment_dir: str):
+        self.experiment_dir = experiment_dir
+        self.path = os.path.join(experiment_dir, PACK_FILE)
+        self.index_path = os.path.join(experiment_dir, INDEX_FILE)
+        self._entries: Dict[str, PackEntry] = {}
+        self._index_read = 0  # Bytes of the index file already parsed
+        self._index_inode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def append(self, task_id: str, payload: bytes) -> PackEntry:
+        """Append a trajectory, replacing any earlier one of the same task."""
+        name = task_id.encode('utf-8')
+        crc = zlib.crc32(payload)
+        header = _HEADER.pack(_MAGIC, len(name), len(payload), crc)
+        while True:
+            pack = open(self.path, 'ab')
+            # Shard processes of one experiment append to the same pack
+            if fcntl is not None:
+                fcntl.flock(pack, fcntl.LOCK_EX)
+            # A compaction replaced the pack while this writer waited for the lock
+            if fcntl is None or os.fstat(pack.fileno()).st_ino == _inode(self.path):
+                break
+            pack.close()
+        with pack:
+            try:
+                start = pack.seek(0, os.SEEK_END)
+                pack.write(header + name)
+                pack.write(payload)
+                pack.flush()
+                entry = PackEntry(start + _HEADER.size + len(name), len(payload), crc)
+                line = {"task_id": task_id, "offset": entry.offset, "length": entry.length, "crc32": crc}
+                with open(self.index_path, 'a', encoding='utf-8') as index:
+                    index.write(json.dumps(line) + "\n")
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(pack, fcntl.LOCK_UN)
+        return entry
+
+    def _refresh(self) -> None:
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            self._entries, self._index_read, self._index_inode = {}, 0, None
+            if not os.path.isfile(self.path):
+                return
+            # A writer died before indexing its first record
+            self.rebuild_index()
+            st = os.stat(self.index_path)
+        if st.st_ino != self._index_inode or st.st_size < self._index_read:
+            # Rewritten by a rebuild or a compaction
+            self._entries, self._index_read, self._index_inode = {}, 0, st.st_ino
+        if st.st_size == self._index_read:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._index_read)
+            chunk = f.read(st.st_size - self._index_read)
+        # Only consume complete lines, a partial line is picked up on the next read
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return
+        self._index_read += end + 1
+        for line in chunk[:end].splitlines():
+            try:
+                record = json.loads(line)
+                self._entries[record["task_id"]] = PackEntry(
+                    record["offset"], record["length"], record["crc32"]
+                )
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Skipping a malformed line of {self.index_path}")
+
+    def entries(self) -> Dict[str, PackEntry]:
+        """Current entry of every task in the pack."""
+        with self._lock:
+            self._refresh()
+            return dict(self._entries)
+
+    def get(self, task_id: str) -> Optional[PackEntry]:
+        with self._lock:
+            self._refresh()
+            return self._entries.get(task_id)
+
+    def task_ids(self) -> List[str]:
+        return list(self.entries())
+
+    def iter_chunks(self, entry: PackEntry, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        A trajectory's payload in chunks, read with a seek and bounded reads.
+
+        The checksum is verified as the chunks go by, a mismatch raises ChecksumError after the
+        last chunk.
+        """
+        crc = 0
+        remaining = entry.length
+        with open(self.path, 'rb') as f:
+            f.seek(entry.offset)
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise ChecksumError(f"{self.path} ends inside the record at {entry.offset}")
+                crc = zlib.crc32(chunk, crc)
+                remaining -= len(chunk)
+                yield chunk
+        if crc != entry.crc32:
+            raise ChecksumError(f"Checksum mismatch in {self.path} at {entry.offset}")
+
+    def read(self, task_id: str) -> Optional[bytes]:
+        """A trajectory's JSON payload, None if the task is not in the pack."""
+        entry = self.get(task_id)
+        if entry is None:
+            return None
+        return b"".join(self.iter_chunks(entry))
+
+    def rebuild_index(self) -> int:
+        """
+        Rewrite the index from the records in the pack, returning the number of tasks.
+
+        A record cut short by a crashed writer ends the scan; whatever follows it is ignored.
+        """
+        entries: Dict[str, PackEntry] = {}
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            position = 0
+            while position + _HEADER.size <= size:
+                f.seek(position)
+                magic, name_length, length, crc = _HEADER.unpack(f.read(_HEADER.size))
+                offset = position + _HEADER.size + name_length
+                if magic != _MAGIC or offset + length > size:
+                    logger.warning(f"Stopping at a damaged record at {position} of {self.path}")
+                    break
+                entries[f.read(name_length).decode('utf-8')] = PackEntry(offset, length, crc)
+                position = offset + length
+
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for task_id, entry in entries.items():
+                line = {
+                    "task_id": task_id,
+                    "offset": entry.offset,
+                    "length": entry.length,
+                    "crc32": entry.crc32,
+                }
+                f.write(json.dumps(line) + "\n")
+        os.replace(tmp_path, self.index_path)
+        return len(entries)
+
+    def compact(self) -> Tuple[int, int]:
+        """
+        Rewrite the pack with only the current record of each task, returning its size before and after.
+
+        Writers wait on the pack's lock meanwhile, and every kept payload is checked against its
+        checksum as it is copied. Nothing is rewritten when the pack holds no replaced records.
+        """
+        with open(self.path, 'ab') as pack:
+            if fcntl is not None:
+                fcntl.flock(pack, fcntl.LOCK_EX)
+            try:
+                before = os.fstat(pack.fileno()).st_size
+                entries = self.entries()
+                live = sum(
+                    _HEADER.size + len(task_id.encode('utf-8')) + entry.length
+                    for task_id, entry in entries.items()
+                )
+                if live == before:
+                    return before, before
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                index_tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp_path, 'wb') as out, open(index_tmp_path, 'w', encoding='utf-8') as index:
+                        for task_id, entry in entries.items():
+                            name = task_id.encode('utf-8')
+                            out.write(_HEADER.pack(_MAGIC, len(name), entry.length, entry.crc32) + name)
+                            offset = out.tell()
+                            for chunk in self.iter_chunks(entry):
+                                out.write(chunk)
+                            line = {
+                                "task_id": task_id,
+                                "offset": offset,
+                                "length": entry.length,
+                                "crc32": entry.crc32,
+                            }
+                            index.write(json.dumps(line) + "\n")
+                    after = os.path.getsize(tmp_path)
+                    os.replace(tmp_path, self.path)
+                    os.replace(index_tmp_path, self.index_path)
+                finally:
+                    for path in (tmp_path, index_tmp_path):
+                        if os.path.exists(path):
+                            os.remove(path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(pack, fcntl.LOCK_UN)
+        return before, after
+
+
+def trajectory_versions(experiment_dir: str, pack: TrajectoryPack) -> Dict[str, Tuple[int, int]]:
+    """
+    Change version of every trajectory of an experiment by task ID: the (mtime_ns, size) of its
+    file, or PackEntry.version for tasks only in the pack. Loose files win over the pack, as they
+    do when the server serves a task.
+    """
+    versions = {}
+    with os.scandir(experiment_dir) as entries:
+        for entry in entries:
+            task_id = trajectory_task_id(entry.name)
+            if task_id is None:
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            versions[task_id] = (st.st_mtime_ns, st.st_size)
+    if has_pack(experiment_dir):
+        for task_id, entry in pack.entries().items():
+            versions.setdefault(task_id, entry.version)
+    return versions
+
+
+def trajectory_chunks(experiment_dir: str, task_id: str, pack: TrajectoryPack) -> Optional[Iterator[bytes]]:
+    """
+    A task's trajectory as plain JSON bytes in chunks, from its file or else from the pack, None
+    if it has neither. Files are decompressed and pack records checked as the chunks are read.
+    """
+    path = find_trajectory(experiment_dir, task_id)
+    if path is not None:
+        return decompress_chunks(file_chunks(path), encoding_of(path))
+    entry = pack.get(task_id) if has_pack(experiment_dir) else None
+    return pack.iter_chunks(entry) if entry is not None else None
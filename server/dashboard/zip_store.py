@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dashboard.trajectory_files import TRAJECTORY_SUFFIXES, trajectory_task_id
+
+ARCHIVE_SUFFIX = ".zip"
+# Decompressed members kept per archive; larger members are streamed every time
+CACHE_BYTES = 64 << 20
+MAX_CACHED_MEMBER = 8 << 20
+CHUNK_SIZE = 1 << 20
+
+
+def _member_prefix(names: List[str]) -> str:
+    """Folder the experiment sits in inside the archive, "" when its files are at the top."""
+    if "results.json" in names:
+        return ""
+    for name in names:
+        parts = name.split("/")
+        if len(parts) == 2 and parts[1] == "results.json":
+            return f"{parts[0]}/"
+    return ""
+
+
+class ZipExperiment:
+    """
+    An experiment folder shipped as a zip archive, read in place.
+
+    Opening an archive reads its central directory only. Members are decompressed on demand
+    straight from their offset in the archive, and small members (results, metadata and most
+    trajectories) are kept decompressed in a bounded LRU cache so repeated views do not inflate
+    them again. Archives produced by the download endpoint hold the experiment's files at the
+    top; archives of the folder itself, with one top-level directory, work too.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        st = os.stat(path)
+        self.version = (st.st_mtime_ns, st.st_size)
+        self._archive = zipfile.ZipFile(path)
+        infos = [info for info in self._archive.infolist() if not info.is_dir()]
+        self.prefix = _member_prefix([info.filename for info in infos])
+        self.members: Dict[str, zipfile.ZipInfo] = {
+            info.filename[len(self.prefix) :]: info for info in infos if info.filename.startswith(self.prefix)
+        }
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)[: -len(ARCHIVE_SUFFIX)]
+
+    def has(self, name: str) -> bool:
+        return name in self.members
+
+    def size(self, name: str) -> int:
+        return self._info(name).file_size
+
+    def _info(self, name: str) -> zipfile.ZipInfo:
+        info = self.members.get(name)
+        if info is None:
+            raise FileNotFoundError(f"{name} not found in {self.path}")
+        return info
+
+    def _cached(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._cache.get(name)
+            if data is not None:
+                self._cache.move_to_end(name)
+            return data
+
+    def _remember(self, name: str, data: bytes) -> None:
+        if len(data) > MAX_CACHED_MEMBER:
+            return
+        with self._lock:
+            if name in self._cache:
+                return
+            self._cache[name] = data
+            self._cached_bytes += len(data)
+            while self._cached_bytes > CACHE_BYTES:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+    def iter_chunks(self, name: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """A member's decompressed content in chunks, from the cache when it is there."""
+        cached = self._cached(name)
+        if cached is not None:
+            yield cached
+            return
+        info = self._info(name)
+        keep = info.file_size <= MAX_CACHED_MEMBER
+        chunks = []
+        # ZipFile serialises seeks on the shared file handle, so members can be read from several threads
+        with self._archive.open(info) as member:
+            while True:
+                chunk = member.read(chunk_size)
+                if not chunk:
+                    break
+                if keep:
+                    chunks.append(chunk)
+                yield chunk
+        if keep:
+            self._remember(name, b"".join(chunks))
+
+    def read(self, name: str) -> bytes:
+        """
+        A member's decompressed content.
+
+        Raises:
+            FileNotFoundError: If the archive has no such member
+        """
+        return b"".join(self.iter_chunks(name))
+
+    def read_json(self, name: str, default: Any = None) -> Any:
+        try:
+            return json.loads(self.read(name))
+        except FileNotFoundError:
+            return default
+
+    def task_ids(self) -> List[str]:
+        return [
+            task_id
+            for task_id in (trajectory_task_id(name) for name in self.members if "/" not in name)
+            if task_id is not None
+        ]
+
+    def find_trajectory(self, task_id: str) -> Optional[str]:
+        """Member name of a task's trajectory in whichever form it was stored, None if there is none."""
+        for suffix in TRAJECTORY_SUFFIXES:
+            if f"{task_id}{suffix}" in self.members:
+                return f"{task_id}{suffix}"
+        return None
+
+    def progress(self) -> Dict[str, Any]:
+        """Same shape as ActivityTracker.get_experiment_progress, from the archived metadata and progress."""
+        all_task_ids = set((self.read_json("metadata.json") or {}).get("task_ids", []))
+        completed = set()
+        if self.has(".progress"):
+            completed = {
+                line.strip() for line in self.read(".progress").decode('utf-8').splitlines() if line.strip()
+            }
+        return {
+            "total_tasks": len(all_task_ids),
+            "completed_tasks": len(completed),
+            "uncompleted_task_ids": sorted(all_task_ids - completed),
+        }
+
+    def close(self) -> None:
+        self._archive.close()
+
+
+_archives: Dict[str, ZipExperiment] = {}
+_archives_lock = threading.Lock()
+
+
+def open_archive(path: str) -> ZipExperiment:
+    """
+    The shared reader of an archive, reopened when the file is replaced.
+
+    Raises:
+        FileNotFoundError: If the archive does not exist
+        zipfile.BadZipFile: If the file is not a zip archive
+    """
+    path = os.path.realpath(path)
+    st = os.stat(path)
+    with _archives_lock:
+        archive = _archives.get(path)
+        if archive is not None and archive.version == (st.st_mtime_ns, st.st_size):
+            return archive
+        if archive is not None:
+            archive.close()
+        archive = _archives[path] = ZipExperiment(path)
+        return archive
+
+
+def forget_archive(path: str) -> None:
+    with _archives_lock:
+        archive = _archives.pop(os.path.realpath(path), None)
+    if archive is not None:
+        archive.close()
+
+
+def list_archives(directory: str) -> List[Tuple[str, str]]:
+    """(experiment name, path) of every zip archive directly inside a directory."""
+    archives = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(ARCHIVE_SUFFIX) and entry.is_file():
+                archives.append((entry.name[: -len(ARCHIVE_SUFFIX)], entry.path))
+    return archives
@@ -7,6 +7,8 @@ import {
   downloadExperiment,
   fetchUncompletedTasks,
   fetchFailedTasks,
+  runExperiment,
+  subscribeExperimentEvents,
 } from "../services/api";
 import Header from "./Header";
 import "./ExperimentManager.css";
@@ -109,11 +111,23 @@ const ExperimentManager: React.FC = () => {
   useEffect(() => {
     loadLoggedExperiments(currentPage, searchQuery);
 
+    // Progress is pushed by the server, polling is only a slow safety net
+    let refreshTimer: ReturnType<typeof setTimeout> | undefined;
+    const unsubscribe = subscribeExperimentEvents((type) => {
+      if (type === "step-appended") return;
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => loadLoggedExperiments(currentPage, searchQuery), 1000);
+    });
+
     const interval = setInterval(() => {
       loadLoggedExperiments(currentPage, searchQuery);
-    }, 30000);
+    }, 300000);
 
-    return () => clearInterval(interval);
+    return () => {
+      unsubscribe();
+      clearTimeout(refreshTimer);
+      clearInterval(interval);
+    };
   }, [currentPage, searchQuery]);
 
   const handleJoinExperiments = async () => {
@@ -213,6 +227,26 @@ const ExperimentManager: React.FC = () => {
     navigator.clipboard.writeText(content);
   };
 
+  const handleRunInPlace = async () => {
+    const mode = showUncompletedTasks ? "resume" : "rerun_failed";
+    const action = showUncompletedTasks ? "Resume" : "Rerun";
+    if (!confirm(`${action} ${currentModalData.length} task(s) in ${currentExperimentName}?`)) return;
+
+    try {
+      setLoading(true);
+      await runExperiment(removeTimestamp(currentExperimentName), {
+        mode,
+        experiment_folder: currentExperimentName,
+        shards: splitCount,
+      });
+      closeModal();
+    } catch (error) {
+      console.error("Error starting run:", error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const closeModal = () => {
     setShowUncompletedTasks(null);
     setShowFailedTasks(null);
@@ -572,6 +606,14 @@ const ExperimentManager: React.FC = () => {
             <div className="modal-body">
               <pre>{generateVariableString(currentExperimentName, currentModalData, splitCount)}</pre>
               <button onClick={handleCopyToClipboard}>Copy to Clipboard</button>
+              <button
+                onClick={handleRunInPlace}
+                disabled={currentModalData.length === 0}
+                title="Run these tasks into the same experiment folder, split into the chosen number of parallel shards"
+                style={{ marginLeft: "8px" }}
+              >
+                {showUncompletedTasks ? "Resume Experiment" : "Rerun Failed Tasks"}
+              </button>
             </div>
           </div>
         </div>
@@ -2,6 +2,7 @@
 
 import { JSX, useState } from "react";
 import { parseJsonSafely } from "../utils/renderHelpers";
+import { fetchStepPrompts } from "../services/api";
 // Assuming ExpandableText is not used in the provided snippet, otherwise, it should be imported.
 // import ExpandableText from "./ExpandableText";
 import MarkdownPreview from "@uiw/react-markdown-preview";
@@ -22,6 +23,19 @@ function StepView({ step, index, config, expandedImages, toggleImage, isCollapse
   const [expanded, setExpanded] = useState(false);
   const [showJsonPopup, setShowJsonPopup] = useState(false);
   const [showJsonPopupPrompts, setShowJsonPopupPrompts] = useState(false);
+  // Interned prompts are only references until the popup asks the server to expand them
+  const [expandedPrompts, setExpandedPrompts] = useState(null);
+
+  const showPrompts = async () => {
+    if (step.prompts_url && expandedPrompts === null) {
+      try {
+        setExpandedPrompts(await fetchStepPrompts(step.prompts_url));
+      } catch (error) {
+        console.error("Error expanding prompts:", error);
+      }
+    }
+    setShowJsonPopupPrompts(true);
+  };
 
   const [expandedSections, setExpandedSections] = useState<Set<string>>(new Set(["interesting-" + index]));
   const [expandedKeys, setExpandedKeys] = useState<Set<string>>(
@@ -536,7 +550,7 @@ function StepView({ step, index, config, expandedImages, toggleImage, isCollapse
       >
         <span className="step-icon">{isCollapsed ? "▶" : "⚡"}</span>Step {index + 1}: {step.name}
         <div className="interesting-keys-controls" style={{ float: "right" }} onClick={(e) => e.stopPropagation()}>
-          <button onClick={() => setShowJsonPopupPrompts(true)} className="interesting-keys-btn">
+          <button onClick={showPrompts} className="interesting-keys-btn">
             Show Prompts 🔍
           </button>
           <button onClick={() => setShowJsonPopup(true)} className="interesting-keys-btn">
@@ -565,7 +579,7 @@ function StepView({ step, index, config, expandedImages, toggleImage, isCollapse
       )}
       {showJsonPopupPrompts && (
         <JsonPopupModal
-          jsonData={parseJsonSafely(step.prompts || "{}")}
+          jsonData={parseJsonSafely(expandedPrompts || step.prompts || "{}")}
           onClose={() => setShowJsonPopupPrompts(false)}
         />
       )}
@@ -1,3 +1,6 @@
+// Screenshots extracted by `cuga-viz compact` are referenced by path instead of inlined
+const SCREENSHOT_PREFIX = ".screenshots/";
+
 /**
  * Fetches trajectory data from the API for a given task ID
  * @param {string} taskId - ID of the task to fetch
@@ -7,22 +10,50 @@
 export async function fetchTrajectoryData(taskId: string, experimentName?: string) {
   try {
     const timestamp = Date.now();
-    const path = experimentName ? `/data/${encodeURIComponent(experimentName)}/${encodeURIComponent(taskId)}.json` : `/data/${encodeURIComponent(taskId)}.json`;
+    const path = experimentName
+      ? `/api/experiments/${encodeURIComponent(experimentName)}/trajectories/${encodeURIComponent(taskId)}`
+      : `/data/${encodeURIComponent(taskId)}.json`;
     const response = await fetch(`${path}?t=${timestamp}`);
     if (!response.ok) {
       throw new Error(`Failed to fetch trajectory data: ${response.status} ${response.statusText}`);
     }
-    return await response.json();
+    const trajectory = await response.json();
+    const steps = Array.isArray(trajectory?.steps) ? trajectory.steps : [];
+    steps.forEach((step: any, index: number) => {
+      // Interned prompts are expanded by the server when the step's prompts are opened
+      if (Array.isArray(step?.prompts) && step.prompts.some((prompt: any) => prompt?.ref)) {
+        step.prompts_url = experimentName
+          ? `/api/experiments/${encodeURIComponent(experimentName)}/trajectories/${encodeURIComponent(taskId)}/steps/${index}/prompts`
+          : `/api/data/trajectories/${encodeURIComponent(taskId)}/steps/${index}/prompts`;
+      }
+      const image = step?.image_before;
+      if (typeof image === "string" && image.startsWith(SCREENSHOT_PREFIX)) {
+        step.image_before = experimentName
+          ? `/api/experiments/${encodeURIComponent(experimentName)}/screenshots/${image.slice(SCREENSHOT_PREFIX.length)}`
+          : `/data/${image}`;
+      }
+    });
+    return trajectory;
   } catch (error) {
     console.error("Error fetching trajectory data:", error);
     throw error;
   }
 }
 
+export async function fetchStepPrompts(url: string) {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch step prompts: ${response.status} ${response.statusText}`);
+  }
+  return await response.json();
+}
+
 export async function fetchDataTable(experimentName?: string) {
   try {
-    const query = experimentName ? `?experiment_name=${encodeURIComponent(experimentName)}` : "";
-    const response = await fetch(`/api/get_data_table${query}`);
+    const path = experimentName
+      ? `/api/experiments/${encodeURIComponent(experimentName)}/data_table`
+      : "/api/get_data_table";
+    const response = await fetch(path);
 
     if (!response.ok) {
       throw new Error(`Error fetching data table: ${response.status}`);
@@ -74,8 +105,8 @@ export async function fetchConfig() {
 
 export async function fetchStatsTables(experimentName?: string) {
   try {
-    const query = experimentName ? `?experiment_name=${encodeURIComponent(experimentName)}` : "";
-    const response = await fetch(`/api/stats${query}`);
+    const path = experimentName ? `/api/experiments/${encodeURIComponent(experimentName)}/stats` : "/api/stats";
+    const response = await fetch(path);
 
     if (!response.ok) {
       throw new Error(`Failed to fetch configuration: ${response.status} ${response.statusText}`);
@@ -192,18 +223,28 @@ export async function fetchActiveRuns() {
 }
 
 /**
- * Runs an experiment
+ * Queues an experiment run
  * @param {string} experimentName - Name of the experiment to run
+ * @param {Object} options - Optional queue priority and number of CPU slots for the run
  * @returns {Promise<Object>} - The response data
  */
-export async function runExperiment(experimentName: string) {
+export async function runExperiment(
+  experimentName: string,
+  options: {
+    priority?: number;
+    cpus?: number;
+    shards?: number;
+    experiment_folder?: string;
+    mode?: "full" | "resume" | "rerun_failed";
+  } = {}
+) {
   try {
     const response = await fetch("/api/experiments/run", {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
       },
-      body: JSON.stringify({ experiment_name: experimentName }),
+      body: JSON.stringify({ experiment_name: experimentName, ...options }),
     });
 
     if (!response.ok) {
@@ -218,26 +259,87 @@ export async function runExperiment(experimentName: string) {
 }
 
 /**
- * Joins multiple experiments into a new one
+ * Cancels a queued or running experiment
+ * @param {string} experimentName - Name of the experiment to cancel
+ * @returns {Promise<Object>} - The response data
+ */
+export async function cancelExperiment(experimentName: string) {
+  try {
+    const response = await fetch(`/api/experiments/${encodeURIComponent(experimentName)}/cancel`, {
+      method: "POST",
+    });
+
+    if (!response.ok) {
+      throw new Error(`Failed to cancel experiment: ${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Error cancelling experiment:", error);
+    throw error;
+  }
+}
+
+/**
+ * Fetches the status of a background join job
+ * @param {string} jobId - Job ID returned when the join was started
+ * @returns {Promise<Object>} - The job with its status, phase and progress counts
+ */
+export async function fetchJoinJob(jobId: string) {
+  const response = await fetch(`/api/experiments/join/${encodeURIComponent(jobId)}`);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch join job: ${response.status} ${response.statusText}`);
+  }
+  return await response.json();
+}
+
+/**
+ * Joins multiple experiments into a new one. The merge runs as a background job on the
+ * server; this resolves once it has finished.
  * @param {string[]} experimentNames - Names of experiments to join
  * @param {string} newName - Name for the new joined experiment
- * @returns {Promise<Object>} - The response data
+ * @param {Function} onProgress - Optional callback receiving the job while it runs
+ * @param {string} policy - Merge policy picking each task's result, see /api/experiments/join/policies
+ * @param {string} agentV - Agent version kept by the agent_version policy
+ * @returns {Promise<Object>} - The finished job
  */
-export async function joinExperiments(experimentNames: string[], newName: string) {
+export async function joinExperiments(
+  experimentNames: string[],
+  newName: string,
+  onProgress?: (job: { phase: string; done: number; total: number }) => void,
+  policy: string = "best_score",
+  agentV?: string
+) {
   try {
     const response = await fetch("/api/experiments/join", {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
       },
-      body: JSON.stringify({ experiment_names: experimentNames, new_name: newName }),
+      body: JSON.stringify({
+        experiment_names: experimentNames,
+        new_name: newName,
+        policy,
+        agent_v: agentV,
+      }),
     });
 
     if (!response.ok) {
       throw new Error(`Failed to join experiments: ${response.status} ${response.statusText}`);
     }
 
-    return await response.json();
+    const { job_id: jobId } = await response.json();
+    for (;;) {
+      await new Promise((resolve) => setTimeout(resolve, 500));
+      const job = await fetchJoinJob(jobId);
+      if (job.status === "finished") {
+        return job;
+      }
+      if (job.status === "failed") {
+        throw new Error(`Failed to join experiments: ${job.error}`);
+      }
+      onProgress?.(job);
+    }
   } catch (error) {
     console.error("Error joining experiments:", error);
     throw error;
@@ -331,9 +433,36 @@ export async function fetchFailedTasks(experimentName: string) {
 }
 
 /**
- * Starts a dashboard for a specific experiment
- * @param {string} experimentName - Name of the experiment to start dashboard for
- * @returns {Promise<Object>} - The response data
+ * Tails the output log of an experiment run
+ * @param {string} experimentName - Name of the experiment
+ * @param {number} since - The next_offset of the previous response (-1 for the latest lines)
+ * @param {number} generation - The generation of the previous response, so lines written before a log rotation are not missed
+ * @returns {Promise<Object>} - The new lines, the next offset and generation, and whether the run is still going
+ */
+export async function fetchExperimentLog(experimentName: string, since: number = -1, generation?: number) {
+  try {
+    const params = new URLSearchParams({ since: String(since) });
+    if (generation !== undefined && generation !== null) {
+      params.set("generation", String(generation));
+    }
+    const response = await fetch(`/api/experiments/${encodeURIComponent(experimentName)}/log?${params}`);
+
+    if (!response.ok) {
+      throw new Error(`Failed to fetch experiment log: ${response.status} ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Error fetching experiment log:", error);
+    throw error;
+  }
+}
+
+/**
+ * Gets the dashboard URL for a specific experiment. Dashboards are served by the
+ * experiments server itself, so no separate process is started.
+ * @param {string} experimentName - Name of the experiment to open the dashboard for
+ * @returns {Promise<Object>} - The response data, including the dashboard url
  */
 export async function startDashboard(experimentName: string) {
   try {
@@ -395,3 +524,36 @@ export async function getDashboardStatus() {
     throw error;
   }
 }
+
+export type ExperimentEventType = "step-appended" | "task-finished" | "experiment-progress" | "reset";
+
+/**
+ * Subscribes to live experiment updates pushed by the server over Server-Sent Events.
+ * The browser reconnects automatically and resumes from the last received event id.
+ * @param {Function} onEvent - Called with the event type and its parsed payload
+ * @param {Object} filters - Optional experiment and task_id to restrict the stream to
+ * @returns {Function} - Call to close the subscription
+ */
+export function subscribeExperimentEvents(
+  onEvent: (type: ExperimentEventType, data: any) => void,
+  filters: { experiment?: string; taskId?: string } = {}
+) {
+  const params = new URLSearchParams();
+  if (filters.experiment) params.set("experiment", filters.experiment);
+  if (filters.taskId) params.set("task_id", filters.taskId);
+  const query = params.toString();
+  const source = new EventSource(`/api/events${query ? `?${query}` : ""}`);
+
+  const eventTypes: ExperimentEventType[] = ["step-appended", "task-finished", "experiment-progress", "reset"];
+  eventTypes.forEach((type) => {
+    source.addEventListener(type, (event) => {
+      try {
+        onEvent(type, JSON.parse((event as MessageEvent).data));
+      } catch (error) {
+        console.error("Error parsing experiment event:", error);
+      }
+    });
+  });
+
+  return () => source.close();
+}